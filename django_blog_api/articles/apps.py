@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class ArticlesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'articles'
-    verbose_name = 'Blog Articles'
\ No newline at end of file
+    verbose_name = 'Blog Articles'
+
+    def ready(self):
+        """Import signals when Django starts"""
+        import articles.signals
\ No newline at end of file
@@ -0,0 +1,79 @@
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+from django.utils import timezone
+from taggit.models import Tag, TaggedItem
+from core.cache import invalidate_namespace, model_namespace
+from .models import Article
+from .search import refresh_search_vectors
+
+# Largest number of items accepted by one bulk request
+BULK_MAX_ITEMS = 500
+
+
+def set_tags(tagged):
+    """
+    Replace the tags of several articles with a fixed number of queries.
+
+    `tagged` is a list of (article, tag names) pairs. Existing tags are
+    fetched in one query and tagged items are rewritten with one DELETE and
+    one bulk INSERT; only tags that do not exist yet are created one by one
+    so taggit can give them a unique slug.
+    """
+    if not tagged:
+        return
+    names = {name for _, tag_names in tagged for name in tag_names}
+    tags = {tag.name: tag for tag in Tag.objects.filter(name__in=names)}
+    for name in names - tags.keys():
+        tags[name] = Tag.objects.create(name=name)
+
+    content_type = ContentType.objects.get_for_model(Article)
+    TaggedItem.objects.filter(
+        content_type=content_type,
+        object_id__in=[article.pk for article, _ in tagged]
+    ).delete()
+    TaggedItem.objects.bulk_create([
+        TaggedItem(content_type=content_type, object_id=article.pk, tag=tags[name])
+        for article, tag_names in tagged
+        for name in dict.fromkeys(tag_names)
+    ])
+
+
+def bulk_save_articles(instances, validated_data, author):
+    """
+    Create or update many articles in one transaction.
+
+    `instances` and `validated_data` are aligned: a None instance creates a
+    new article by `author`, any other is updated with the given fields
+    (e.g. only a new status). Rows are written with bulk_create/bulk_update
+    and tags with set_tags(). Bulk writes skip model signals, so search
+    vectors and the articles cache generation are refreshed here.
+    Returns the articles in input order.
+    """
+    now = timezone.now()
+    articles, created, updated, tagged = [], [], [], []
+    update_fields = {'updated_at'}
+    for instance, attrs in zip(instances, validated_data):
+        attrs = dict(attrs)
+        tag_names = attrs.pop('tags', None)
+        if instance is None:
+            instance = Article(author=author, **attrs)
+            created.append(instance)
+        else:
+            for name, value in attrs.items():
+                setattr(instance, name, value)
+            # bulk_update does not apply auto_now
+            instance.updated_at = now
+            update_fields.update(attrs)
+            updated.append(instance)
+        if tag_names is not None:
+            tagged.append((instance, tag_names))
+        articles.append(instance)
+
+    with transaction.atomic():
+        Article.objects.bulk_create(created)
+        if updated:
+            Article.objects.bulk_update(updated, sorted(update_fields))
+        set_tags(tagged)
+        refresh_search_vectors([article.pk for article in articles])
+        invalidate_namespace(model_namespace(Article))
+    return articles
@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.utils import timezone
+from core.background import run_in_background
+from core.cache import invalidate_namespace, model_namespace
+from .models import Article
+
+
+def hide_article(article):
+    """
+    Delete an article as far as readers are concerned.
+
+    The article is hidden with a single-row update; its comments and then
+    the article itself are purged in the background once this commits,
+    instead of the cascade collector loading every comment at once.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        Article.objects.filter(pk=article.pk).update(hidden_at=now, updated_at=now)
+        invalidate_namespace(model_namespace(Article))
+        run_in_background(purge_article, article.pk)
+
+
+def purge_article(article_id, batch_size=None):
+    """Delete a hidden article and its comments in batches; return the number of rows deleted."""
+    # comments depends on articles, not the other way round
+    from comments.deletion import purge_article_comments
+
+    deleted = purge_article_comments(article_id, batch_size)
+    article = Article.objects.filter(pk=article_id).first()
+    if article is not None:
+        deleted += article.delete()[0]
+    return deleted
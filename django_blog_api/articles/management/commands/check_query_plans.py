@@ -0,0 +1,165 @@
+import itertools
+import json
+import random
+from django.contrib.auth.models import User
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+from taggit.models import Tag, TaggedItem
+from articles.models import Article
+from articles.views import ArticleViewSet
+
+# Tables large enough that a full scan of them is a plan regression
+WATCHED_TABLES = ('articles_article', 'taggit_taggeditem')
+
+# Filters through a join (author by username, tags by name) narrow the
+# result to a few rows that are sorted rather than read in index order,
+# so sorts are expected there; full scans are not
+SORTED_FILTERS = ('author__username', 'tags__name')
+
+STATUSES = ('draft', 'published', 'archived')
+
+
+class Command(BaseCommand):
+    help = ('Seeds a large article dataset, EXPLAINs the article list query for '
+            'every filter/ordering combination and reports sequential scans and sorts. '
+            'Everything runs in a transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--articles', type=int, default=50000,
+                            help='Number of articles to seed (default: 50000)')
+        parser.add_argument('--authors', type=int, default=200,
+                            help='Number of authors to seed (default: 200)')
+        parser.add_argument('--tags', type=int, default=100,
+                            help='Number of tags to seed (default: 100)')
+        parser.add_argument('--no-seed', action='store_true',
+                            help='Explain against the existing data only')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in ('postgresql', 'sqlite'):
+            raise CommandError(f'Query plans cannot be checked on {connection.vendor}.')
+
+        # The seeded rows and refreshed statistics never outlive the check
+        with transaction.atomic():
+            if not options['no_seed']:
+                self.seed(options['articles'], options['authors'], options['tags'])
+            self.analyze()
+            issues = self.check_plans()
+            transaction.set_rollback(True)
+
+        if issues:
+            raise CommandError(f'{issues} query shape(s) scan or sort instead of using an index.')
+        self.stdout.write(self.style.SUCCESS('All article list queries use indexes.'))
+
+    def check_plans(self):
+        """Report the problems of every query shape and return how many have some."""
+        issues = 0
+        for params in self.combinations():
+            queryset = self.list_queryset(params)
+            problems = self.find_problems(queryset)
+            if any(field in params for field in SORTED_FILTERS):
+                problems = [problem for problem in problems if not problem.startswith('sort')]
+            label = '&'.join(f'{key}={value}' for key, value in params.items()) or '(no filters)'
+            if problems:
+                issues += 1
+                self.stdout.write(self.style.WARNING(f'{label}: {", ".join(problems)}'))
+            else:
+                self.stdout.write(f'{label}: ok')
+        return issues
+
+    def seed(self, article_count, author_count, tag_count):
+        """Top up the database to the requested number of authors, tags and articles."""
+        existing = User.objects.filter(username__startswith='plan_author_').count()
+        User.objects.bulk_create([
+            User(username=f'plan_author_{i}') for i in range(existing, author_count)
+        ])
+        existing = Tag.objects.filter(name__startswith='plan-tag-').count()
+        Tag.objects.bulk_create([
+            Tag(name=f'plan-tag-{i}', slug=f'plan-tag-{i}') for i in range(existing, tag_count)
+        ])
+
+        missing = article_count - Article.objects.count()
+        if missing <= 0:
+            return
+        self.stdout.write(f'Seeding {missing} articles...')
+        author_ids = list(User.objects.filter(username__startswith='plan_author_').values_list('id', flat=True))
+        tag_ids = list(Tag.objects.filter(name__startswith='plan-tag-').values_list('id', flat=True))
+        content_type = ContentType.objects.get_for_model(Article)
+        offset = Article.objects.filter(title__startswith='Plan article ').count()
+        for start in range(0, missing, 1000):
+            articles = Article.objects.bulk_create([
+                Article(
+                    title=f'Plan article {offset + start + i}',
+                    content='Seeded article content for query plan checks.',
+                    author_id=random.choice(author_ids),
+                    status=random.choice(STATUSES),
+                )
+                for i in range(min(1000, missing - start))
+            ])
+            TaggedItem.objects.bulk_create([
+                TaggedItem(content_type=content_type, object_id=article.pk, tag_id=tag_id)
+                for article in articles
+                for tag_id in random.sample(tag_ids, min(3, len(tag_ids)))
+            ])
+
+    def analyze(self):
+        """Refresh planner statistics so the seeded rows are taken into account."""
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    def combinations(self):
+        """Every filter subset the viewset accepts, combined with every ordering."""
+        sample = Article.objects.select_related('author').order_by('?').first()
+        tag = Tag.objects.order_by('?').first()
+        values = {
+            'status': 'published',
+            'author__username': sample.author.username if sample else 'admin',
+            'tags__name': tag.name if tag else 'django',
+        }
+        orderings = [None] + [
+            prefix + field for field in ArticleViewSet.ordering_fields for prefix in ('', '-')
+        ]
+        for size in range(len(ArticleViewSet.filterset_fields) + 1):
+            for fields in itertools.combinations(ArticleViewSet.filterset_fields, size):
+                for ordering in orderings:
+                    params = {field: values[field] for field in fields}
+                    if ordering:
+                        params['ordering'] = ordering
+                    yield params
+
+    def list_queryset(self, params):
+        """The first page of the article list exactly as the viewset builds it."""
+        request = Request(APIRequestFactory().get('/api/articles/', params), authenticators=())
+        view = ArticleViewSet(request=request, action='list', kwargs={}, format_kwarg=None)
+        queryset = view.filter_queryset(view.get_queryset())
+        return queryset[:view.paginator.get_page_size(request)]
+
+    def find_problems(self, queryset):
+        """Return descriptions of the full scans and sorts in the queryset's plan."""
+        if connection.vendor == 'postgresql':
+            plan = queryset.explain(format='json')
+            return self._postgres_problems(json.loads(plan)[0]['Plan'])
+        return self._sqlite_problems(queryset.explain())
+
+    def _postgres_problems(self, node):
+        problems = []
+        if node['Node Type'] == 'Seq Scan' and node.get('Relation Name') in WATCHED_TABLES:
+            problems.append(f"sequential scan on {node['Relation Name']}")
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append(f"sort on {', '.join(node.get('Sort Key', []))}")
+        for child in node.get('Plans', []):
+            problems += self._postgres_problems(child)
+        return problems
+
+    def _sqlite_problems(self, plan):
+        problems = []
+        for line in plan.splitlines():
+            detail = line.split(' ', 3)[-1]
+            words = detail.split()
+            if detail.startswith('SCAN ') and words[1] in WATCHED_TABLES and 'INDEX' not in detail:
+                problems.append(f'sequential scan on {words[1]}')
+            elif 'TEMP B-TREE FOR' in detail:
+                problems.append(f"sort ({detail.lower()})")
+        return problems
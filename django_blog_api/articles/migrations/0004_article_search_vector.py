@@ -0,0 +1,66 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:08
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+class PostgresOnlyAddIndex(migrations.AddIndex):
+    """
+    GIN indexes only exist on PostgreSQL; SQLite development databases keep
+    the column but skip the index.
+    """
+
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == 'postgresql':
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+
+
+BACKFILL_SQL = """
+UPDATE articles_article AS article SET search_vector =
+    setweight(to_tsvector('english', coalesce(article.title, '')), 'A') ||
+    setweight(to_tsvector('english', coalesce((
+        SELECT string_agg(tag.name, ' ')
+        FROM taggit_tag AS tag
+        JOIN taggit_taggeditem AS item ON item.tag_id = tag.id
+        WHERE item.object_id = article.id AND item.content_type_id = %s
+    ), '')), 'B') ||
+    setweight(to_tsvector('english', coalesce(article.content, '')), 'C')
+"""
+
+
+def backfill_search_vectors(apps, schema_editor):
+    """Populate the search vector of every existing article"""
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    ContentType = apps.get_model('contenttypes', 'ContentType')
+    content_type, _ = ContentType.objects.get_or_create(app_label='articles', model='article')
+    schema_editor.execute(BACKFILL_SQL, params=[content_type.id])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0003_article_status'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, help_text='Weighted full-text search vector of title, tags and content', null=True),
+        ),
+        PostgresOnlyAddIndex(
+            model_name='article',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+        ),
+        migrations.RunPython(backfill_search_vectors, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:28
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def backfill_comment_counts(apps, schema_editor):
+    """
+    Count the existing comments and replies of every article. No comment is
+    hidden yet (Comment.hidden_at comes later), so all of them count.
+    """
+    Article = apps.get_model('articles', 'Article')
+    Comment = apps.get_model('comments', 'Comment')
+    counts = Comment.objects.filter(article=OuterRef('pk')).order_by().values('article').annotate(total=Count('pk'))
+    Article.objects.update(
+        comment_count=Coalesce(Subquery(counts.values('total'), output_field=IntegerField()), 0)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0005_article_filter_indexes'),
+        ('comments', '0003_comment_updated_at'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of comments and replies on the article (denormalized)'),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(fields=['-comment_count', 'id'], name='article_comment_count_idx'),
+        ),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop),
+    ]
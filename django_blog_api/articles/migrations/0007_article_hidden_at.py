@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_comment_count'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='hidden_at',
+            field=models.DateTimeField(blank=True, editable=False, help_text='Set when the article is deleted; its rows are then removed in the background', null=True),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(condition=models.Q(('hidden_at__isnull', False)), fields=['hidden_at'], name='article_hidden_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from taggit.managers import TaggableManager
 
 class Article(models.Model):
@@ -42,9 +44,47 @@ class Article(models.Model):
         default='draft',
         help_text="Publication status of the article"
     )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of comments and replies on the article (denormalized)"
+    )
+    hidden_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Set when the article is deleted; its rows are then removed in the background"
+    )
+    search_vector = SearchVectorField(
+        null=True,
+        editable=False,
+        help_text="Weighted full-text search vector of title, tags and content"
+    )
 
     class Meta:
         ordering = ['-publication_date']
+        # Match the list endpoint's query shapes: each filter combined with
+        # the default date ordering (plus the id tie-breaker used by cursor
+        # pagination), and the public listing of published articles.
+        indexes = [
+            GinIndex(fields=['search_vector'], name='article_search_vector_gin'),
+            models.Index(fields=['-publication_date', 'id'], name='article_pubdate_idx'),
+            models.Index(
+                fields=['-publication_date', 'id'],
+                name='article_published_pubdate_idx',
+                condition=models.Q(status='published'),
+            ),
+            models.Index(fields=['status', '-publication_date', 'id'], name='article_status_pubdate_idx'),
+            models.Index(fields=['author', '-publication_date', 'id'], name='article_author_pubdate_idx'),
+            models.Index(fields=['status', 'title'], name='article_status_title_idx'),
+            models.Index(fields=['-comment_count', 'id'], name='article_comment_count_idx'),
+            # Deleted articles still waiting to be purged
+            models.Index(
+                fields=['hidden_at'],
+                name='article_hidden_idx',
+                condition=models.Q(hidden_at__isnull=False),
+            ),
+        ]
 
     def __str__(self):
         return self.title
\ No newline at end of file
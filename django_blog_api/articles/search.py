@@ -0,0 +1,99 @@
+from django.contrib.postgres.search import (
+    SearchHeadline, SearchQuery, SearchRank, SearchVector
+)
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.db.models import F, Value
+
+# Text search configuration used for both indexing and querying
+SEARCH_CONFIG = 'english'
+
+
+def full_text_search_available():
+    """
+    Return True when the database supports the stored search vector.
+    Full-text search relies on PostgreSQL; other backends (e.g. SQLite in
+    development) fall back to the plain SearchFilter.
+    """
+    return connection.vendor == 'postgresql'
+
+
+def build_search_vector(title, tag_names, content):
+    """
+    Build the weighted search vector for an article:
+    title (A) ranks above tags (B), which rank above content (C).
+    """
+    return (
+        SearchVector(Value(title), weight='A', config=SEARCH_CONFIG)
+        + SearchVector(Value(' '.join(tag_names)), weight='B', config=SEARCH_CONFIG)
+        + SearchVector(Value(content), weight='C', config=SEARCH_CONFIG)
+    )
+
+
+def update_search_vector(article):
+    """
+    Recompute the stored search vector of a single article.
+    Uses an UPDATE so saving the vector does not trigger post_save again.
+    """
+    if not full_text_search_available():
+        return
+    from .models import Article
+
+    Article.objects.filter(pk=article.pk).update(
+        search_vector=build_search_vector(
+            article.title, article.tags.names(), article.content
+        )
+    )
+
+
+# Same weighting as build_search_vector, computed in SQL for many rows at once
+REFRESH_SQL = """
+UPDATE articles_article AS article SET search_vector =
+    setweight(to_tsvector(%(config)s, coalesce(article.title, '')), 'A') ||
+    setweight(to_tsvector(%(config)s, coalesce((
+        SELECT string_agg(tag.name, ' ')
+        FROM taggit_tag AS tag
+        JOIN taggit_taggeditem AS item ON item.tag_id = tag.id
+        WHERE item.object_id = article.id AND item.content_type_id = %(content_type)s
+    ), '')), 'B') ||
+    setweight(to_tsvector(%(config)s, coalesce(article.content, '')), 'C')
+WHERE article.id = ANY(%(ids)s)
+"""
+
+
+def refresh_search_vectors(article_ids):
+    """
+    Recompute the stored search vectors of many articles in one statement,
+    e.g. after bulk writes that bypass the post_save/m2m_changed signals.
+    """
+    if not full_text_search_available() or not article_ids:
+        return
+    from .models import Article
+
+    with connection.cursor() as cursor:
+        cursor.execute(REFRESH_SQL, {
+            'config': SEARCH_CONFIG,
+            'content_type': ContentType.objects.get_for_model(Article).id,
+            'ids': list(article_ids),
+        })
+
+
+def full_text_search(queryset, terms):
+    """
+    Filter a queryset of articles by a web-search style query, annotating
+    each match with its rank (search_rank) and a highlighted content
+    snippet (search_headline).
+    """
+    query = SearchQuery(terms, search_type='websearch', config=SEARCH_CONFIG)
+    return queryset.filter(search_vector=query).annotate(
+        search_rank=SearchRank(F('search_vector'), query),
+        search_headline=SearchHeadline(
+            'content',
+            query,
+            config=SEARCH_CONFIG,
+            start_sel='<mark>',
+            stop_sel='</mark>',
+            max_words=35,
+            min_words=15,
+        ),
+    )
@@ -1,16 +1,120 @@
+from collections import defaultdict
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from taggit.serializers import TagListSerializerField, TaggitSerializer
+from core.fieldsets import SparseFieldsetMixin
 from .models import Article
+from .bulk import bulk_save_articles
 
-class ArticleSerializer(TaggitSerializer, serializers.ModelSerializer):
+# Length of the content excerpt shown on list pages
+EXCERPT_LENGTH = 200
+
+class ArticleListSerializer(serializers.ListSerializer):
+    """
+    Bulk writes through ArticleSerializer(data=[...], many=True).
+
+    Items with an `id` partially update that article (e.g. only its status),
+    items without one create a new article. Each item is validated against
+    its own instance, titles are checked for uniqueness once for the whole
+    batch, and save() writes all items in one transaction.
+    """
+    
+    def to_internal_value(self, data):
+        if not isinstance(data, list):
+            return super().to_internal_value(data)
+        if self.max_length is not None and len(data) > self.max_length:
+            raise serializers.ValidationError({
+                'non_field_errors': [self.error_messages['max_length'].format(max_length=self.max_length)]
+            }, code='max_length')
+        
+        instances = self.get_instances(data)
+        title_field = self.child.fields.get('title')
+        if title_field is not None:
+            # Checked for the whole batch in validate_titles()
+            title_field.validators = [
+                validator for validator in title_field.validators
+                if not isinstance(validator, UniqueValidator)
+            ]
+        
+        validated, errors = [], []
+        for item, instance in zip(data, instances):
+            if isinstance(item, dict) and 'id' in item and instance is None:
+                errors.append({'id': [f"Article {item['id']} does not exist."]})
+                validated.append(None)
+                continue
+            # Updates are partial; required fields only apply to creates
+            self.child.instance = instance
+            self.partial = instance is not None
+            try:
+                validated.append(self.child.run_validation(item))
+                errors.append({})
+            except serializers.ValidationError as exc:
+                validated.append(None)
+                errors.append(exc.detail)
+        self.child.instance = None
+        self.partial = False
+        
+        self.validate_titles(validated, instances, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        self.item_instances = instances
+        return validated
+    
+    def get_instances(self, data):
+        """Return the article each item updates (None for creates), fetched in one query."""
+        ids = {}
+        for index, item in enumerate(data):
+            if isinstance(item, dict) and 'id' in item:
+                try:
+                    ids[index] = int(item['id'])
+                except (TypeError, ValueError):
+                    pass
+        articles = Article.objects.filter(hidden_at__isnull=True).in_bulk(set(ids.values()))
+        return [articles.get(ids[index]) if index in ids else None for index in range(len(data))]
+    
+    def validate_titles(self, validated, instances, errors):
+        """Record an error on every item whose title is taken, inside or outside the batch."""
+        indexes = defaultdict(list)
+        for index, attrs in enumerate(validated):
+            if attrs and 'title' in attrs:
+                indexes[attrs['title']].append(index)
+        if not indexes:
+            return
+        owners = dict(Article.objects.filter(title__in=indexes).values_list('title', 'id'))
+        message = 'article with this title already exists.'
+        for title, positions in indexes.items():
+            for index in positions:
+                instance = instances[index]
+                taken = owners.get(title) not in (None, getattr(instance, 'pk', None))
+                if taken or len(positions) > 1:
+                    errors[index] = {**errors[index], 'title': [message]}
+    
+    def save(self, **kwargs):
+        """Write every validated item in one transaction; returns the articles in input order."""
+        author = kwargs.get('author') or self.context['request'].user
+        self.instance = bulk_save_articles(self.item_instances, self.validated_data, author)
+        return self.instance
+
+
+class ArticleSerializer(SparseFieldsetMixin, TaggitSerializer, serializers.ModelSerializer):
     tags = TagListSerializerField()
     author_username = serializers.ReadOnlyField(source='author.username')
+    # Computed by the database on list pages instead of loading the content
+    excerpt = serializers.CharField(read_only=True)
+    # Only present on full-text search results
+    search_rank = serializers.FloatField(read_only=True)
+    search_headline = serializers.CharField(read_only=True)
     
     class Meta:
         model = Article
-        fields = ['id', 'title', 'content', 'author', 'author_username', 
-                 'publication_date', 'updated_at', 'tags', 'status']
-        read_only_fields = ['author', 'publication_date', 'updated_at']
+        fields = ['id', 'title', 'content', 'excerpt', 'author', 'author_username', 
+                 'publication_date', 'updated_at', 'tags', 'status', 'comment_count',
+                 'search_rank', 'search_headline']
+        read_only_fields = ['author', 'publication_date', 'updated_at', 'comment_count']
+        # Summary representation for list pages
+        list_omit = ['content']
+        detail_omit = ['excerpt']
+        list_serializer_class = ArticleListSerializer
     
     def create(self, validated_data):
         """
@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, m2m_changed
+from django.dispatch import receiver
+from taggit.models import TaggedItem
+from .models import Article
+from .search import update_search_vector
+
+@receiver(post_save, sender=Article)
+def refresh_search_vector_on_save(sender, instance, **kwargs):
+    """Keep the stored search vector in sync with title and content"""
+    update_search_vector(instance)
+
+@receiver(m2m_changed, sender=TaggedItem)
+def refresh_search_vector_on_tags(sender, instance, action, **kwargs):
+    """Keep the stored search vector in sync with the article's tags"""
+    if isinstance(instance, Article) and action in ('post_add', 'post_remove', 'post_clear'):
+        update_search_vector(instance)
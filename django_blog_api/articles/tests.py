@@ -1,10 +1,19 @@
-from django.test import TestCase
+from unittest import skipUnless
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.core.management import call_command
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework.test import APIClient
 from rest_framework import status
 from django.contrib.auth.models import User, Group
 from articles.models import Article
-from articles.serializers import ArticleSerializer
+from comments.models import Comment
+from articles.serializers import ArticleSerializer, EXCERPT_LENGTH
+from django.db.models.functions import Left
+from io import StringIO
 import json
 
 class ArticleTests(TestCase):
@@ -40,12 +49,15 @@ class ArticleTests(TestCase):
         self.client = APIClient()
         
     def test_get_all_articles(self):
-        """Test retrieving all articles"""
+        """Test retrieving all articles as summaries without content"""
         response = self.client.get(reverse('article-list'))
-        articles = Article.objects.all()
-        serializer = ArticleSerializer(articles, many=True)
+        articles = Article.objects.annotate(excerpt=Left('content', EXCERPT_LENGTH))
+        summary_fields = [name for name in ArticleSerializer.Meta.fields if name != 'content']
+        serializer = ArticleSerializer(articles, many=True, fields=summary_fields)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['results'], serializer.data)
+        self.assertNotIn('content', response.data['results'][0])
+        self.assertEqual(response.data['results'][0]['excerpt'], self.article.content)
         
     def test_get_single_article(self):
         """Test retrieving a single article"""
@@ -135,4 +147,272 @@ class ArticleTests(TestCase):
         )
         response = self.client.get(f"{reverse('article-list')}?tag=test")
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(len(response.data['results']), 1)  
\ No newline at end of file
+        self.assertEqual(len(response.data['results']), 1)
+    
+    def test_search_articles_basic_mode(self):
+        """Test basic search mode matches title, content and tags"""
+        Article.objects.create(
+            title='Unrelated Article',
+            content='Nothing to see in this article content',
+            author=self.regular_user
+        )
+        response = self.client.get(f"{reverse('article-list')}?search=admin&search_mode=basic")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['id'], self.article.id)
+        self.assertNotIn('search_rank', response.data['results'][0])
+    
+    @skipUnless(connection.vendor == 'postgresql', 'Full-text search needs PostgreSQL')
+    def test_search_articles_fulltext_mode(self):
+        """Test full-text search ranks title matches first and highlights matches in the content"""
+        title_match = Article.objects.create(
+            title='Django performance',
+            content='Notes about something else entirely',
+            author=self.admin_user
+        )
+        content_match = Article.objects.create(
+            title='Another Test Article',
+            content='Tuning the performance of a large Django site',
+            author=self.admin_user
+        )
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{reverse('article-list')}?search=performance")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([article['id'] for article in results], [title_match.id, content_match.id])
+        self.assertGreater(results[0]['search_rank'], results[1]['search_rank'])
+        self.assertIn('<mark>performance</mark>', results[1]['search_headline'])
+        # Matched against the stored (GIN-indexed) vector, not one computed per row
+        self.assertTrue(any('"search_vector" @@' in query['sql'] for query in queries.captured_queries))
+    
+    def test_cursor_pagination_walks_all_articles(self):
+        """Test cursor pagination visits every article once in both directions"""
+        for i in range(4):
+            Article.objects.create(
+                title=f'Cursor Article {i}',
+                content='This is cursor pagination content',
+                author=self.admin_user
+            )
+        expected = list(Article.objects.order_by('-publication_date', 'id').values_list('id', flat=True))
+        
+        url = f"{reverse('article-list')}?pagination=cursor&page_size=2"
+        seen, pages = [], []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            pages.append(url)
+            seen += [article['id'] for article in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+        
+        # Walking back from the last page returns the previous page
+        response = self.client.get(pages[-1])
+        previous = self.client.get(response.data['previous'])
+        self.assertEqual([article['id'] for article in previous.data['results']], expected[2:4])
+    
+    def test_cursor_pagination_respects_ordering(self):
+        """Test cursor pagination follows the requested ordering"""
+        Article.objects.create(
+            title='Another Test Article',
+            content='This is another test article content',
+            author=self.admin_user
+        )
+        response = self.client.get(f"{reverse('article-list')}?pagination=cursor&page_size=1&ordering=title")
+        self.assertEqual(response.data['results'][0]['title'], 'Another Test Article')
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['title'], 'Test Article')
+        self.assertIsNone(response.data['next'])
+    
+    @override_settings(RESPONSE_CACHE_ENABLED=True, SHARED_CACHE=True)
+    def test_anonymous_responses_are_cached_until_write(self):
+        """Test anonymous article responses are served from cache until an article changes"""
+        cache.clear()
+        url = reverse('article-detail', kwargs={'pk': self.article.id})
+        self.assertEqual(self.client.get(url)['X-Cache'], 'MISS')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 1)  # ETag fingerprint only
+        self.assertEqual(response.data['title'], 'Test Article')
+        
+        # List ETags come from cache generations, so a hit runs no query
+        self.client.get(f"{reverse('article-list')}?pagination=cursor")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f"{reverse('article-list')}?pagination=cursor")
+        self.assertEqual(response['X-Cache'], 'HIT')
+        self.assertEqual(len(queries), 0)
+        
+        self.article.title = 'Renamed Test Article'
+        self.article.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], 'Renamed Test Article')
+        
+        # Equivalent query strings share an entry
+        self.client.get(f"{reverse('article-list')}?status=draft&ordering=title")
+        response = self.client.get(f"{reverse('article-list')}?ordering=title&search=&status=draft")
+        self.assertEqual(response['X-Cache'], 'HIT')
+    
+    def test_conditional_get_article_detail(self):
+        """Test article detail returns 304 while its ETag still matches"""
+        url = reverse('article-detail', kwargs={'pk': self.article.id})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertIn('Last-Modified', response)
+        
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        self.article.content = 'This is changed test article content'
+        self.article.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_conditional_get_article_list(self):
+        """Test article list ETags change with the collection and the filters"""
+        url = reverse('article-list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(self.client.get(f'{url}?status=draft', HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        
+        Article.objects.create(
+            title='Another Test Article',
+            content='This is another test article content',
+            author=self.admin_user
+        )
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+        
+        # Without a shared cache, writes by other processes (which bump no
+        # generation here) still change the ETag
+        etag = self.client.get(url)['ETag']
+        Article.objects.filter(pk=self.article.pk).update(updated_at=timezone.now())
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+    
+    def test_sparse_fieldsets(self):
+        """Test ?fields= and ?omit= limit the rendered fields"""
+        url = reverse('article-detail', kwargs={'pk': self.article.id})
+        response = self.client.get(f'{url}?fields=id,title,tags')
+        self.assertEqual(set(response.data), {'id', 'title', 'tags'})
+        
+        response = self.client.get(f'{url}?omit=content,tags')
+        self.assertNotIn('content', response.data)
+        self.assertNotIn('tags', response.data)
+        self.assertIn('title', response.data)
+        
+        response = self.client.get(f"{reverse('article-list')}?fields=id,content")
+        self.assertEqual(response.data['results'][0], {'id': self.article.id, 'content': self.article.content})
+    
+    def test_list_defers_unused_columns(self):
+        """Test list queries do not load the article content"""
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('article-list'))
+        page_query = next(q['sql'] for q in queries.captured_queries if 'LIMIT' in q['sql'])
+        self.assertNotRegex(page_query, r'"articles_article"\."content"(?!, 1, )')
+        self.assertNotIn('"articles_article"."search_vector"', page_query)
+        self.assertNotIn('"auth_user"."password"', page_query)
+    
+    def test_bulk_create_update_and_status_change(self):
+        """Test one bulk request creates, updates and publishes articles"""
+        self.client.force_authenticate(user=self.admin_user)
+        draft = Article.objects.create(
+            title='Draft Article',
+            content='This draft is about to be published',
+            author=self.admin_user
+        )
+        data = [
+            {'title': 'Bulk Article One', 'content': 'First bulk article content', 'tags': ['bulk', 'test']},
+            {'title': 'Bulk Article Two', 'content': 'Second bulk article content', 'tags': ['bulk']},
+            {'id': self.article.id, 'title': 'Renamed Test Article', 'tags': ['renamed']},
+            {'id': draft.id, 'status': 'published'},
+        ]
+        response = self.client.post(
+            reverse('article-bulk'),
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [item['result'] for item in response.data['results']],
+            ['created', 'created', 'updated', 'updated']
+        )
+        
+        created = Article.objects.get(id=response.data['results'][0]['id'])
+        self.assertEqual(created.author, self.admin_user)
+        self.assertEqual(sorted(created.tags.names()), ['bulk', 'test'])
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.title, 'Renamed Test Article')
+        self.assertEqual(list(self.article.tags.names()), ['renamed'])
+        draft.refresh_from_db()
+        self.assertEqual(draft.status, 'published')
+        self.assertEqual(draft.title, 'Draft Article')
+    
+    def test_bulk_invalid_item_writes_nothing(self):
+        """Test a bulk request with an invalid item is rejected as a whole"""
+        self.client.force_authenticate(user=self.admin_user)
+        data = [
+            {'title': 'Bulk Article One', 'content': 'First bulk article content', 'tags': []},
+            {'title': 'Test Article', 'content': 'Duplicate title of an existing article', 'tags': []},
+            {'id': 0, 'status': 'published'},
+        ]
+        response = self.client.post(
+            reverse('article-bulk'),
+            data=json.dumps(data),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data['results']
+        self.assertEqual([item['result'] for item in results], ['valid', 'invalid', 'invalid'])
+        self.assertIn('title', results[1]['errors'])
+        self.assertIn('id', results[2]['errors'])
+        self.assertEqual(Article.objects.count(), 1)
+    
+    def test_bulk_regular_user_forbidden(self):
+        """Test regular users cannot use the bulk endpoint"""
+        self.client.force_authenticate(user=self.regular_user)
+        response = self.client.post(
+            reverse('article-bulk'),
+            data=json.dumps([{'title': 'Bulk Article', 'content': 'Bulk article content'}]),
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+    
+    def test_check_query_plans_finds_no_scans(self):
+        """Test every article list filter/ordering combination is served by an index"""
+        out = StringIO()
+        call_command('check_query_plans', articles=500, authors=20, tags=20, stdout=out)
+        self.assertIn('All article list queries use indexes.', out.getvalue())
+        # The seeded data is rolled back
+        self.assertEqual(Article.objects.count(), 1)
+        self.assertFalse(User.objects.filter(username__startswith='plan_author_').exists())
+    
+    def test_delete_article_hides_then_purges_in_batches(self):
+        """Test a deleted article disappears at once and is purged with its comments after commit"""
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        self.admin_user.groups.add(admin_group)
+        parent = None
+        for depth in range(5):
+            parent = Comment.objects.create(
+                article=self.article,
+                content=f'Comment at depth {depth}',
+                author=self.regular_user,
+                reply_to=parent
+            )
+        self.client.force_authenticate(user=self.admin_user)
+        url = reverse('article-detail', kwargs={'pk': self.article.id})
+        
+        with override_settings(BACKGROUND_TASKS_INLINE=True, DELETION_BATCH_SIZE=2):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.delete(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            # Hidden right away, rows still there until the purge runs
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+            self.assertEqual(Article.objects.filter(hidden_at__isnull=False).count(), 1)
+            self.assertEqual(Comment.objects.count(), 5)
+            
+            for callback in callbacks:
+                callback()
+        self.assertEqual(Article.objects.count(), 0)
+        self.assertEqual(Comment.objects.count(), 0)
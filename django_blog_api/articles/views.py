@@ -1,21 +1,54 @@
 from rest_framework import viewsets, filters, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Article
-from .serializers import ArticleSerializer
+from .serializers import ArticleSerializer, EXCERPT_LENGTH
+from .bulk import BULK_MAX_ITEMS
+from .deletion import hide_article
 from utils.permissions import IsAdminUser, IsAdminOrEditorUser
+from utils.filter_classes import ArticleSearchFilter
+from core.pagination import KeysetPaginationMixin
+from core.response_cache import ResponseCacheMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetViewMixin
+from django.db.models import Sum
+from django.db.models.functions import Left
 
-class ArticleViewSet(viewsets.ModelViewSet):
+class ArticleViewSet(ConditionalGetMixin, ResponseCacheMixin, KeysetPaginationMixin,
+                     SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing articles.
+    Supports opt-in keyset pagination with ?pagination=cursor,
+    conditional GET (ETag/Last-Modified) on list and retrieve, and
+    sparse fieldsets with ?fields= / ?omit= (list omits content by default).
+    Anonymous list/retrieve responses are cached until an article or
+    comment is written. Editors can create, update and change the status
+    of many articles in one request with POST /articles/bulk/.
+    Deleted articles disappear at once and are purged in the background.
+    Searches are throttled per client (the 'search' throttle scope).
     """
-    queryset = Article.objects.all()
+    # Authors are joined and tags prefetched so a page costs a constant
+    # number of queries regardless of its size. Hidden (deleted) articles
+    # are left out until they are purged.
+    queryset = Article.objects.filter(hidden_at__isnull=True).select_related('author').prefetch_related('tags')
     serializer_class = ArticleSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    # Search runs after ordering so full-text results can be ordered by rank
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, ArticleSearchFilter]
     filterset_fields = ['tags__name', 'author__username', 'status']
     search_fields = ['title', 'content', 'tags__name', 'author__username']
-    ordering_fields = ['publication_date', 'title']
+    ordering_fields = ['publication_date', 'title', 'comment_count']
     ordering = ['-publication_date']  # Default ordering
+    response_cache_namespaces = ('articles.article', 'comments.comment', 'auth.user')
+    # comment_count is updated without touching updated_at
+    conditional_detail_fields = ('id', 'updated_at', 'comment_count')
+    # Author names are rendered too
+    conditional_namespaces = ('articles.article', 'comments.comment', 'auth.user')
+    field_annotations = {'excerpt': Left('content', EXCERPT_LENGTH)}
+    
+    def get_collection_aggregates(self):
+        """comment_count is updated without touching updated_at."""
+        return {**super().get_collection_aggregates(), 'comments': Sum('comment_count')}
     
     def get_permissions(self):
         """
@@ -26,7 +59,7 @@ class ArticleViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.AllowAny]
         elif self.action == 'create':
             permission_classes = [permissions.IsAuthenticated, IsAdminOrEditorUser]
-        elif self.action in ['update', 'partial_update']:
+        elif self.action in ['update', 'partial_update', 'bulk']:
             permission_classes = [permissions.IsAuthenticated, IsAdminOrEditorUser]
         elif self.action == 'destroy':
             permission_classes = [permissions.IsAuthenticated, IsAdminUser]
@@ -34,12 +67,45 @@ class ArticleViewSet(viewsets.ModelViewSet):
             permission_classes = [permissions.IsAuthenticated]
         return [permission() for permission in permission_classes]
     
+    def get_throttle_scope(self, request):
+        """Throttle searches (see core.throttling); plain listing is cheap and cached."""
+        if self.action == 'list' and request.query_params.get(ArticleSearchFilter.search_param):
+            return 'search'
+        return None
+    
     def perform_create(self, serializer):
         """
         Save the author as the current user when creating an article.
         """
         serializer.save(author=self.request.user)
     
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Create, update or change the status of up to BULK_MAX_ITEMS articles
+        in one transaction. Items with an `id` are partial updates, items
+        without one are creates. Nothing is written unless every item is
+        valid; the response reports the outcome of each item in order.
+        """
+        serializer = self.get_serializer(data=request.data, many=True, max_length=BULK_MAX_ITEMS)
+        if not serializer.is_valid():
+            if not isinstance(serializer.errors, list):
+                return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+            results = [
+                {'index': index, 'result': 'invalid', 'errors': errors} if errors
+                else {'index': index, 'result': 'valid'}
+                for index, errors in enumerate(serializer.errors)
+            ]
+            return Response({'results': results}, status=status.HTTP_400_BAD_REQUEST)
+        
+        created = [instance is None for instance in serializer.item_instances]
+        articles = serializer.save(author=request.user)
+        results = [
+            {'index': index, 'id': article.id, 'result': 'created' if is_new else 'updated'}
+            for index, (article, is_new) in enumerate(zip(articles, created))
+        ]
+        return Response({'results': results}, status=status.HTTP_200_OK)
+    
     def destroy(self, request, *args, **kwargs):
         """
         Override destroy method to return a custom success message.
@@ -49,4 +115,11 @@ class ArticleViewSet(viewsets.ModelViewSet):
         return Response(
             {'message': 'Article deleted successfully'}, 
             status=status.HTTP_200_OK
-        )
\ No newline at end of file
+        )
+    
+    def perform_destroy(self, instance):
+        """
+        Hide the article now and purge it with its comments in batches in
+        the background (see articles.deletion).
+        """
+        hide_article(instance)
\ No newline at end of file
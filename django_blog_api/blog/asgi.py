@@ -1,7 +1,10 @@
 """
-ASGI config for blog_project project.
+ASGI config for blog project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
+Serve the API with an ASGI server (e.g. ``uvicorn blog.asgi:application``)
+so comment streams (Server-Sent Events) are held open by the event loop
+instead of occupying a worker thread each.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/5.1/howto/deployment/asgi/
@@ -11,6 +14,6 @@ import os
 
 from django.core.asgi import get_asgi_application
 
-os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog_project.settings')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blog.settings')
 
 application = get_asgi_application()
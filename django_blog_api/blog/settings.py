@@ -1,3 +1,4 @@
+import importlib.util
 from decouple import config
 from pathlib import Path
 
@@ -18,6 +19,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     # Third-party apps
     'rest_framework',
     'rest_framework_simplejwt',
@@ -26,6 +28,7 @@ INSTALLED_APPS = [
     'corsheaders',
     # Local apps
     'blog.apps.BlogConfig',
+    'core',
     'articles',
     'comments',
     'users',
@@ -88,18 +91,153 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
+    # ClaimUserAuthentication authenticates JWTs without loading the user
+    # (set JWT_STATELESS_AUTH=False to load it on every request)
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.ClaimUserAuthentication' if config('JWT_STATELESS_AUTH', default=True, cast=bool)
+        else 'rest_framework_simplejwt.authentication.JWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 10
+    'EXCEPTION_HANDLER': 'core.utils.custom_exception_handler',
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.StandardResultsSetPagination',
+    'PAGE_SIZE': 10,
+    # Only views that name a scope (searches, comment creation, login) are
+    # throttled; each scope's bucket holds `number` requests per client and
+    # refills over the period
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.TokenBucketThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'search': config('THROTTLE_RATE_SEARCH', default='60/min'),
+        'comment_create': config('THROTTLE_RATE_COMMENT_CREATE', default='10/min'),
+        'login': config('THROTTLE_RATE_LOGIN', default='10/min'),
+    },
+}
+
+# Cache. The default local-memory cache is private to each process, so a
+# write served by one worker does not invalidate what the others cached:
+# with several worker processes configure a shared CACHE_BACKEND (e.g.
+# memcached or Redis). Without one, the response cache and cached
+# pagination counts are off by default
+CACHE_BACKEND = config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache')
+CACHES = {
+    'default': {
+        'BACKEND': CACHE_BACKEND,
+        'LOCATION': config('CACHE_LOCATION', default='blog-api'),
+    }
+}
+SHARED_CACHE = CACHE_BACKEND not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+# Tokens issued by login, registration and token obtain/refresh carry the
+# username and the user's groups, so authentication and permission checks
+# need no query. Refreshing returns a new refresh token and revokes the old
+# one (see users.revocation)
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.ClaimsTokenRefreshSerializer',
+    'ROTATE_REFRESH_TOKENS': config('JWT_ROTATE_REFRESH_TOKENS', default=True, cast=bool),
+}
+
+# Seconds a process trusts its last look-up of a user's token revocation
+# (deactivation, read from the database)
+JWT_REVOCATION_CHECK_INTERVAL = config('JWT_REVOCATION_CHECK_INTERVAL', default=5, cast=int)
+
+# Revoked refresh tokens are checked against a per-process Bloom filter
+# (1% false positives up to this many unexpired revocations, ~1.2 bytes
+# each), synchronized with the database every JWT_REVOCATION_CHECK_INTERVAL
+# seconds and rebuilt without expired tokens every JWT_REVOCATION_FILTER_REBUILD
+JWT_REVOCATION_FILTER_CAPACITY = config('JWT_REVOCATION_FILTER_CAPACITY', default=1000000, cast=int)
+JWT_REVOCATION_FILTER_REBUILD = config('JWT_REVOCATION_FILTER_REBUILD', default=3600, cast=int)
+
+# Where throttle buckets live, shared by all worker processes:
+# 'core.throttling.DatabaseBucketStore' (a table) or
+# 'core.throttling.CacheBucketStore' (needs a shared cache server)
+THROTTLE_STORE = config('THROTTLE_STORE', default='core.throttling.DatabaseBucketStore')
+
+# How StandardResultsSetPagination computes 'count' and 'total_pages':
+# 'exact' (COUNT(*) per request), 'cached' (exact count cached per filter set
+# until the model is written to), 'estimated' (planner estimate for large
+# results) or 'none' (no count, only has_next/has_previous)
+PAGINATION_COUNT_STRATEGY = config('PAGINATION_COUNT_STRATEGY', default='cached' if SHARED_CACHE else 'exact')
+PAGINATION_COUNT_CACHE_TIMEOUT = config('PAGINATION_COUNT_CACHE_TIMEOUT', default=300, cast=int)
+PAGINATION_ESTIMATE_THRESHOLD = config('PAGINATION_ESTIMATE_THRESHOLD', default=10000, cast=int)
+
+# Whether anonymous article list/detail responses are cached, and for how
+# many seconds; writes invalidate them earlier
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=SHARED_CACHE, cast=bool)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+
+# Seconds a user's group names stay cached (only with a shared cache);
+# changes are invalidated at once, the timeout bounds a missed invalidation
+GROUPS_CACHE_TIMEOUT = config('GROUPS_CACHE_TIMEOUT', default=300, cast=int)
+
+# Deepest level of replies inlined below a comment; clients can ask for
+# less with ?max_depth=
+COMMENT_THREAD_MAX_DEPTH = config('COMMENT_THREAD_MAX_DEPTH', default=10, cast=int)
+
+# Replies inlined per comment; the rest of a branch is fetched from its
+# replies_next link. Clients can ask for another number with ?replies=
+COMMENT_REPLIES_PER_BRANCH = config('COMMENT_REPLIES_PER_BRANCH', default=3, cast=int)
+
+# Comment event streams (/api/articles/<id>/comments/stream/): seconds
+# between keepalive comments, events buffered per client before a slow
+# client is disconnected, and the reconnect delay suggested to clients
+COMMENT_STREAM_KEEPALIVE = config('COMMENT_STREAM_KEEPALIVE', default=15, cast=int)
+COMMENT_STREAM_QUEUE_SIZE = config('COMMENT_STREAM_QUEUE_SIZE', default=100, cast=int)
+COMMENT_STREAM_RETRY_MS = config('COMMENT_STREAM_RETRY_MS', default=3000, cast=int)
+
+# Deleted articles and comment threads are hidden at once and their rows
+# removed in the background, this many per transaction
+DELETION_BATCH_SIZE = config('DELETION_BATCH_SIZE', default=1000, cast=int)
+
+# Run background tasks (e.g. purging deleted rows) in the request thread
+# after commit instead of in a separate thread
+BACKGROUND_TASKS_INLINE = config('BACKGROUND_TASKS_INLINE', default=False, cast=bool)
+
+# API errors are logged as JSON lines by a background thread, to the
+# API_ERROR_LOG file (rotated) or, without one, to stderr when DEBUG is on
+# (like Django's own request logging). Logging never blocks a request: when
+# more than API_ERROR_LOG_QUEUE records wait to be written, new ones are dropped
+API_ERROR_LOG = config('API_ERROR_LOG', default='')
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'filters': {
+        'require_debug_true': {
+            '()': 'django.utils.log.RequireDebugTrue',
+        },
+    },
+    'handlers': {
+        'api_errors': {
+            '()': 'core.logs.QueueFileHandler',
+            'filename': API_ERROR_LOG,
+            'queue_size': config('API_ERROR_LOG_QUEUE', default=10000, cast=int),
+            'filters': [] if API_ERROR_LOG else ['require_debug_true'],
+        },
+    },
+    'loggers': {
+        'core.utils': {
+            'handlers': ['api_errors'],
+            'level': config('API_ERROR_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
 }
 
+# Errors are counted per error_code; of the client errors (4xx) of one
+# code, the first ERROR_LOG_SAMPLE_BURST per ERROR_LOG_SAMPLE_WINDOW seconds
+# are logged, then one in ERROR_LOG_SAMPLE_RATE. Server errors always are
+ERROR_LOG_SAMPLE_WINDOW = config('ERROR_LOG_SAMPLE_WINDOW', default=60, cast=int)
+ERROR_LOG_SAMPLE_BURST = config('ERROR_LOG_SAMPLE_BURST', default=10, cast=int)
+ERROR_LOG_SAMPLE_RATE = config('ERROR_LOG_SAMPLE_RATE', default=100, cast=int)
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -116,6 +254,29 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# The first hasher hashes new passwords; the others still verify older
+# hashes, which are upgraded to the first on the next successful login.
+# Argon2 (argon2-cffi) verifies faster than PBKDF2 at comparable strength
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+]
+if not importlib.util.find_spec('argon2'):
+    PASSWORD_HASHERS.pop(0)
+
+# Logins check passwords through this backend, which hashes them on the
+# pool below
+AUTHENTICATION_BACKENDS = ['users.hashing.HashingModelBackend']
+
+# Password hashes (login, registration) run on a pool of this many threads
+# per process; up to PASSWORD_HASHING_QUEUE more requests wait for it, at
+# most PASSWORD_HASHING_TIMEOUT seconds, and further ones get a 503 at once
+PASSWORD_HASHING_WORKERS = config('PASSWORD_HASHING_WORKERS', default=2, cast=int)
+PASSWORD_HASHING_QUEUE = config('PASSWORD_HASHING_QUEUE', default=16, cast=int)
+PASSWORD_HASHING_TIMEOUT = config('PASSWORD_HASHING_TIMEOUT', default=5, cast=float)
+
 # Internationalization
 LANGUAGE_CODE = 'en-us'
 TIME_ZONE = 'UTC'
@@ -125,5 +286,26 @@ USE_TZ = True
 # Static files (CSS, JavaScript, Images)
 STATIC_URL = 'static/'
 
+# Uploaded files (profile pictures). MEDIA_URL may point at a CDN or
+# another host; a local path is served by core.views.serve_media
+MEDIA_URL = config('MEDIA_URL', default='/media/')
+MEDIA_ROOT = config('MEDIA_ROOT', default=str(BASE_DIR / 'media'))
+
+# Seconds browsers and proxies may cache a media file; file names are
+# never reused, so responses are also marked immutable
+MEDIA_CACHE_MAX_AGE = config('MEDIA_CACHE_MAX_AGE', default=365 * 24 * 60 * 60, cast=int)
+
+# Let the web server send media files: 'X-Accel-Redirect' (nginx, with an
+# internal location at MEDIA_SENDFILE_PREFIX aliased to MEDIA_ROOT) or
+# 'X-Sendfile' (Apache mod_xsendfile, lighttpd). Empty streams them from
+# the application
+MEDIA_SENDFILE_HEADER = config('MEDIA_SENDFILE_HEADER', default='')
+MEDIA_SENDFILE_PREFIX = config('MEDIA_SENDFILE_PREFIX', default='/protected-media/')
+
+# Largest accepted profile picture upload (bytes), and the square
+# thumbnail sizes (pixels) rendered in WebP and JPEG for every picture
+PROFILE_PIC_MAX_UPLOAD_SIZE = config('PROFILE_PIC_MAX_UPLOAD_SIZE', default=5 * 1024 * 1024, cast=int)
+PROFILE_PIC_SIZES = (48, 128, 256)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
\ No newline at end of file
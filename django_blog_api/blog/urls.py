@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
@@ -6,8 +7,9 @@ from rest_framework_simplejwt.views import TokenRefreshView
 # Import views separately to avoid circular imports
 from blog.views import CustomApiRootView
 from articles.views import ArticleViewSet
-from comments.views import CommentViewSet
-from users.views import login_view, RegisterView, UserViewSet
+from comments.views import CommentViewSet, comment_stream
+from users.views import login_view, logout_view, RegisterView, UserViewSet
+from core.views import cache_stats, error_stats, serve_media
 
 # Create a router and register our viewsets
 router = DefaultRouter()
@@ -30,6 +32,7 @@ urlpatterns = [
     
     # Authentication endpoints
     path('api/login/', login_view, name='login'),
+    path('api/logout/', logout_view, name='logout'),
     path('api/register/', RegisterView.as_view(), name='register'),
     
     # Article comments endpoint
@@ -37,6 +40,22 @@ urlpatterns = [
          CommentViewSet.as_view({'get': 'list', 'post': 'create'}), 
          name='article-comments'),
     
+    # Live stream of an article's new and edited comments (Server-Sent Events, ASGI)
+    path('api/articles/<int:article_id>/comments/stream/', comment_stream,
+         name='article-comments-stream'),
+    
+    # Response cache hit/miss counters (admin)
+    path('api/cache-stats/', cache_stats, name='cache-stats'),
+    
+    # API error counters per error code (admin)
+    path('api/error-stats/', error_stats, name='error-stats'),
+    
     # DRF browsable API authentication (for development)
     path('api-auth/', include('rest_framework.urls')),
-]
\ No newline at end of file
+]
+
+# Uploaded media (profile pictures), unless served from another host
+if settings.MEDIA_URL.startswith('/'):
+    urlpatterns.append(
+        path(f"{settings.MEDIA_URL.strip('/')}/<path:path>", serve_media, name='media')
+    )
\ No newline at end of file
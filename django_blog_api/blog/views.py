@@ -39,6 +39,9 @@ class CustomApiRootView(APIView):
                     },
                     'users': {
                         'list (admin)': f'{api_url}api/users/',
+                    },
+                    'monitoring': {
+                        'cache stats (admin)': f'{api_url}api/cache-stats/',
                     }
                 }
             },
@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class CommentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'comments'
-    verbose_name = 'Article Comments'
\ No newline at end of file
+    verbose_name = 'Article Comments'
+
+    def ready(self):
+        """Import signals when Django starts"""
+        import comments.signals
\ No newline at end of file
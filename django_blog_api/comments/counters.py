@@ -0,0 +1,46 @@
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+from articles.models import Article
+from .models import Comment
+
+
+def comment_added(comment):
+    """Count a new comment on its article and, for a reply, on its parent."""
+    Article.objects.filter(pk=comment.article_id).update(comment_count=F('comment_count') + 1)
+    if comment.reply_to_id:
+        Comment.objects.filter(pk=comment.reply_to_id).update(reply_count=F('reply_count') + 1)
+
+
+def thread_removed(comment, size):
+    """
+    Uncount a deleted thread of `size` comments rooted at `comment`.
+    Counters never go below zero, even if they had drifted.
+    """
+    Article.objects.filter(pk=comment.article_id).update(
+        comment_count=Greatest(F('comment_count') - size, 0)
+    )
+    if comment.reply_to_id:
+        Comment.objects.filter(pk=comment.reply_to_id).update(
+            reply_count=Greatest(F('reply_count') - 1, 0)
+        )
+
+
+def _count_of(field):
+    """
+    Correlated COUNT(*) of the comments whose `field` is the outer row.
+    Deleted comments are not counted, even before they are purged: their
+    whole thread is hidden (see hide_comment).
+    """
+    counts = (Comment.objects.filter(**{field: OuterRef('pk')}, hidden_at__isnull=True).order_by()
+              .values(field).annotate(total=Count('pk')).values('total'))
+    return Coalesce(Subquery(counts, output_field=IntegerField()), 0)
+
+
+def recompute_article_counts(article_ids):
+    """Recount comment_count of the given articles with one UPDATE."""
+    return Article.objects.filter(pk__in=article_ids).update(comment_count=_count_of('article'))
+
+
+def recompute_reply_counts(comment_ids):
+    """Recount reply_count of the given comments with one UPDATE."""
+    return Comment.objects.filter(pk__in=comment_ids).update(reply_count=_count_of('reply_to'))
@@ -0,0 +1,57 @@
+from django.db import transaction
+from django.utils import timezone
+from core.background import delete_in_batches, run_in_background
+from core.cache import invalidate_namespace, model_namespace
+from .counters import thread_removed
+from .models import Comment
+from .paths import subtree_filter
+
+
+def hide_comment(comment):
+    """
+    Delete a comment and its replies as far as readers are concerned.
+
+    The whole thread is hidden with one UPDATE over its path range (so no
+    reply stays reachable on its own) and uncounted with a few single-row
+    updates; the rows themselves are purged in the background once this
+    commits.
+    """
+    with transaction.atomic():
+        now = timezone.now()
+        # Replies hidden by an earlier delete were uncounted then
+        size = thread_comments(comment).filter(hidden_at__isnull=True).update(hidden_at=now, updated_at=now)
+        thread_removed(comment, size)
+        invalidate_namespace(model_namespace(Comment))
+        run_in_background(purge_comment, comment.pk)
+
+
+def thread_comments(comment):
+    """The comment and all its nested replies."""
+    if comment.path:
+        return Comment.objects.filter(subtree_filter(comment))
+    # Not backfilled yet: walk the thread level by level
+    pks = level = [comment.pk]
+    while level:
+        level = list(Comment.objects.filter(reply_to__in=level).values_list('pk', flat=True))
+        pks = pks + level
+    return Comment.objects.filter(pk__in=pks)
+
+
+def purge_comment(comment_id, batch_size=None):
+    """Delete a hidden comment and its replies in batches; return the number of rows deleted."""
+    comment = Comment.objects.filter(pk=comment_id).first()
+    if comment is None:
+        return 0
+    if not comment.path:
+        # Not backfilled yet: let the collector cascade
+        return comment.delete()[0]
+    # A reply's path extends its parent's, so in reverse path order replies
+    # are deleted before their parents and no batch cascades
+    thread = Comment.objects.filter(subtree_filter(comment)).order_by('-path')
+    return delete_in_batches(thread, batch_size)
+
+
+def purge_article_comments(article_id, batch_size=None):
+    """Delete all comments of an article in batches, replies first."""
+    comments = Comment.objects.filter(article_id=article_id).order_by('-path')
+    return delete_in_batches(comments, batch_size)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from comments.models import Comment
+from comments.paths import backfill_paths
+
+
+class Command(BaseCommand):
+    help = 'Fills in the materialized path and depth of comments that have none'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Comments updated per batch (default: 1000)')
+
+    def handle(self, *args, **options):
+        updated = backfill_paths(Comment, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Backfilled the path of {updated} comments.'))
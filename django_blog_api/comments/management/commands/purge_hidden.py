@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from articles.deletion import purge_article
+from articles.models import Article
+from comments.deletion import purge_comment
+from comments.models import Comment
+
+
+class Command(BaseCommand):
+    help = ('Removes deleted (hidden) articles and comment threads whose background '
+            'purge did not finish, e.g. because the server restarted')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows deleted per transaction (default: settings.DELETION_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        deleted = 0
+        for article_id in list(Article.objects.filter(hidden_at__isnull=False).values_list('pk', flat=True)):
+            deleted += purge_article(article_id, batch_size)
+        # Only the top of each hidden thread: its replies are hidden with it
+        threads = Comment.objects.filter(hidden_at__isnull=False).filter(
+            Q(reply_to__isnull=True) | Q(reply_to__hidden_at__isnull=True)
+        )
+        for comment_id in list(threads.values_list('pk', flat=True)):
+            deleted += purge_comment(comment_id, batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Purged {deleted} rows of deleted articles and comments.'))
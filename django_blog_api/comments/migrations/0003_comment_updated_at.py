@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:16
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def copy_created_at(apps, schema_editor):
+    """Existing comments were last modified when they were created"""
+    Comment = apps.get_model('comments', 'Comment')
+    Comment.objects.update(updated_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0002_alter_comment_article_alter_comment_author_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, help_text='Date and time when the comment was last updated'),
+        ),
+        migrations.RunPython(copy_created_at, migrations.RunPython.noop),
+    ]
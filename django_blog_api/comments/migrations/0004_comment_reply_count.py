@@ -0,0 +1,34 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:28
+
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _count_of(queryset, field):
+    """Correlated COUNT(*) of `queryset` rows whose `field` is the outer row"""
+    counts = queryset.filter(**{field: OuterRef('pk')}).order_by().values(field).annotate(total=Count('pk'))
+    return Coalesce(Subquery(counts.values('total'), output_field=IntegerField()), 0)
+
+
+def backfill_counters(apps, schema_editor):
+    """Count the existing replies of every comment (articles.0006 counts the articles' comments)"""
+    Comment = apps.get_model('comments', 'Comment')
+    Comment.objects.update(reply_count=_count_of(Comment.objects.all(), 'reply_to'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('comments', '0003_comment_updated_at'),
+        ('articles', '0006_article_comment_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='reply_count',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Number of direct replies to this comment (denormalized)'),
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:32
+
+from django.conf import settings
+from django.db import migrations, models
+from comments.paths import backfill_paths
+
+
+def backfill_comment_paths(apps, schema_editor):
+    """Compute the path and depth of every existing comment"""
+    backfill_paths(apps.get_model('comments', 'Comment'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0006_article_comment_count'),
+        ('comments', '0004_comment_reply_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='depth',
+            field=models.PositiveIntegerField(default=0, editable=False, help_text='Nesting level of the comment, 0 for root comments'),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='path',
+            field=models.TextField(blank=True, default='', editable=False, help_text="Materialized path: ids of the thread's comments from the root down to this one"),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['article', 'path'], name='comment_article_path_idx'),
+        ),
+        migrations.RunPython(backfill_comment_paths, migrations.RunPython.noop),
+    ]
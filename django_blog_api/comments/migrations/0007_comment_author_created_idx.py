@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 03:04
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_article_hidden_at'),
+        ('comments', '0006_comment_hidden_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['author', '-created_at', 'id'], name='comment_author_created_idx'),
+        ),
+    ]
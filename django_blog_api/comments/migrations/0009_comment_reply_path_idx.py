@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-17 03:25
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0007_article_hidden_at'),
+        ('comments', '0008_comment_article_roots_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(fields=['reply_to', 'path'], name='comment_reply_path_idx'),
+        ),
+    ]
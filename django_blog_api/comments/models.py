@@ -2,6 +2,7 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.core.validators import MinLengthValidator
 from articles.models import Article
+from .paths import child_path
 
 class Comment(models.Model):
     article = models.ForeignKey(
@@ -24,6 +25,10 @@ class Comment(models.Model):
         auto_now_add=True,
         help_text="Date and time when the comment was created"
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        help_text="Date and time when the comment was last updated"
+    )
     reply_to = models.ForeignKey(
         'self', 
         on_delete=models.CASCADE, 
@@ -32,9 +37,68 @@ class Comment(models.Model):
         related_name='replies',
         help_text="The parent comment this comment is replying to, if any"
     )
+    reply_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Number of direct replies to this comment (denormalized)"
+    )
+    path = models.TextField(
+        blank=True,
+        default='',
+        editable=False,
+        help_text="Materialized path: ids of the thread's comments from the root down to this one"
+    )
+    depth = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        help_text="Nesting level of the comment, 0 for root comments"
+    )
+    hidden_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        editable=False,
+        help_text="Set when the comment is deleted; its thread is then removed in the background"
+    )
 
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            # Subtrees, depth-limited slices and whole threads in path order
+            # are single range scans of this index
+            models.Index(fields=['article', 'path'], name='comment_article_path_idx'),
+            # An article's root comments in list order (keyset pages seek
+            # into it instead of sorting all of them)
+            models.Index(
+                fields=['article', 'created_at', 'id'],
+                name='comment_article_roots_idx',
+                condition=models.Q(reply_to__isnull=True),
+            ),
+            # The first replies of a comment (collapsed branches read only
+            # those, however many replies it has)
+            models.Index(fields=['reply_to', 'path'], name='comment_reply_path_idx'),
+            # An author's comments newest first (their activity feed)
+            models.Index(fields=['author', '-created_at', 'id'], name='comment_author_created_idx'),
+            # Deleted threads still waiting to be purged
+            models.Index(
+                fields=['hidden_at'],
+                name='comment_hidden_idx',
+                condition=models.Q(hidden_at__isnull=False),
+            ),
+        ]
+
+    def save(self, *args, **kwargs):
+        """
+        Set the depth from the parent comment and, once the comment has an
+        id, its materialized path.
+        """
+        creating = self._state.adding
+        if creating:
+            self.depth = self.reply_to.depth + 1 if self.reply_to_id else 0
+        super().save(*args, **kwargs)
+        if creating or not self.path:
+            parent_path = self.reply_to.path if self.reply_to_id else ''
+            self.path = child_path(parent_path, self.pk)
+            Comment.objects.filter(pk=self.pk).update(path=self.path)
 
     def __str__(self):
         return f'Comment by {self.author.username} on {self.article.title}'
\ No newline at end of file
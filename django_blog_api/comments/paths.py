@@ -0,0 +1,83 @@
+from django.db.models import Q
+from django.db.models.functions import Left
+from django.db.models.lookups import In
+
+# Every level of a materialized path is the comment id zero-padded to a fixed
+# width, so paths only contain digits and sort like the thread: a comment
+# comes right before its replies, siblings in id (creation) order.
+PATH_SEGMENT_WIDTH = 12
+
+
+def path_segment(pk):
+    """The path level of a comment id, e.g. 42 -> '000000000042'."""
+    return str(pk).zfill(PATH_SEGMENT_WIDTH)
+
+
+def child_path(parent_path, pk):
+    """The path of comment `pk` replying to a comment with `parent_path`."""
+    return f'{parent_path}{path_segment(pk)}'
+
+
+def _path_upper_bound(path):
+    """Smallest path sorting after every path that starts with `path`."""
+    return str(int(path) + 1).zfill(len(path))
+
+
+def subtree_filter(comment, max_depth=None, include_self=True):
+    """
+    Filter selecting the comments below `comment` (and itself unless
+    `include_self` is False), optionally only `max_depth` levels deep, as
+    one range over the (article, path) index.
+    """
+    lookup = 'path__gte' if include_self else 'path__gt'
+    condition = Q(article_id=comment.article_id, **{
+        lookup: comment.path,
+        'path__lt': _path_upper_bound(comment.path),
+    })
+    if max_depth is not None:
+        condition &= Q(depth__lte=comment.depth + max_depth)
+    return condition
+
+
+def threads_of(queryset, comments, max_depth=None):
+    """
+    Narrow `queryset` to the replies below several comments of the same
+    depth (e.g. a page of root comments), optionally only `max_depth` levels
+    deep: one range over the (article, path) index from the first to the
+    last of the subtrees, keeping only rows whose path starts with one of
+    the comments' paths.
+    """
+    paths = sorted(comment.path for comment in comments)
+    queryset = queryset.filter(
+        article_id__in={comment.article_id for comment in comments},
+        path__gt=paths[0],
+        path__lt=_path_upper_bound(paths[-1]),
+    ).filter(In(Left('path', len(paths[0])), paths))
+    if max_depth is not None:
+        queryset = queryset.filter(depth__lte=comments[0].depth + max_depth)
+    return queryset
+
+
+def backfill_paths(model, batch_size=1000):
+    """
+    Fill in the path and depth of comments that have none (e.g. created with
+    bulk_create or before paths existed), in batches of `batch_size`.
+    Each pass picks comments whose parent already has a path, so threads are
+    filled top-down. Returns the number of comments updated.
+    """
+    total = 0
+    while True:
+        batch = list(
+            model.objects.filter(path='')
+            .filter(Q(reply_to__isnull=True) | ~Q(reply_to__path=''))
+            .select_related('reply_to')
+            .order_by('pk')[:batch_size]
+        )
+        if not batch:
+            return total
+        for comment in batch:
+            parent = comment.reply_to
+            comment.path = child_path(parent.path if parent else '', comment.pk)
+            comment.depth = parent.depth + 1 if parent else 0
+        model.objects.bulk_update(batch, ['path', 'depth'])
+        total += len(batch)
@@ -1,24 +1,67 @@
+from django.conf import settings
 from rest_framework import serializers
+from rest_framework.reverse import reverse
 from .models import Comment
+from .threads import BRANCH_ORDERING, get_replies
 from articles.models import Article
+from core.fieldsets import SparseFieldsetMixin
+from core.pagination import keyset_cursor_url
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     author_username = serializers.ReadOnlyField(source='author.username')
     replies = serializers.SerializerMethodField()
+    replies_next = serializers.SerializerMethodField()
     
     class Meta:
         model = Comment
         fields = ['id', 'content', 'author', 'author_username', 'article', 
-                 'created_at', 'reply_to', 'replies']
-        read_only_fields = ['author', 'created_at', 'article']
+                 'created_at', 'updated_at', 'reply_to', 'depth', 'reply_count',
+                 'replies', 'replies_next']
+        read_only_fields = ['author', 'created_at', 'updated_at', 'article', 'depth', 'reply_count']
     
     def get_replies(self, obj):
-        """Return serialized replies for this comment"""
-        # Only include direct replies to avoid recursion issues
-        replies = obj.replies.all()
-        if replies:
-            return CommentSerializer(replies, many=True, context=self.context).data
-        return []
+        """
+        Return the serialized reply tree below this comment, down to
+        context['max_depth'] levels (settings.COMMENT_THREAD_MAX_DEPTH by
+        default). The tree is walked iteratively with a single serializer
+        for all nodes, so deep threads cost neither recursion nor a new
+        serializer per reply.
+        """
+        max_depth = self.context.get('max_depth', settings.COMMENT_THREAD_MAX_DEPTH)
+        node_serializer = self._get_node_serializer()
+        tree = []
+        stack = [(obj, tree, 1)]
+        while stack:
+            parent, siblings, depth = stack.pop()
+            if depth > max_depth:
+                continue
+            for reply in get_replies(parent):
+                data = node_serializer.to_representation(reply)
+                data['replies'] = []
+                siblings.append(data)
+                stack.append((reply, data['replies'], depth + 1))
+        return tree
+    
+    def get_replies_next(self, obj):
+        """
+        Link to the replies of this comment that are not inlined (the branch
+        was cut after its first replies or at the maximum depth), or None.
+        """
+        shown = getattr(obj, 'thread_replies', None)
+        if shown is None or obj.reply_count <= len(shown):
+            return None
+        url = reverse('comment-replies', kwargs={'pk': obj.pk}, request=self.context.get('request'))
+        if not shown:
+            return url
+        last = shown[-1]
+        return keyset_cursor_url(url, BRANCH_ORDERING, [last.path, last.pk])
+    
+    def _get_node_serializer(self):
+        """Serializer for the replies: the same fields, without the replies field itself."""
+        if not hasattr(self, '_node_serializer'):
+            fields = [name for name in self.fields if name != 'replies']
+            self._node_serializer = CommentSerializer(context=self.context, fields=fields)
+        return self._node_serializer
     
     def create(self, validated_data):
         """
@@ -33,7 +76,7 @@ class CommentSerializer(serializers.ModelSerializer):
         article_id = self.context['view'].kwargs.get('article_id')
         if article_id:
             try:
-                article = Article.objects.get(id=article_id)
+                article = Article.objects.get(id=article_id, hidden_at__isnull=True)
                 validated_data['article'] = article
             except Article.DoesNotExist:
                 raise serializers.ValidationError("Article not found")
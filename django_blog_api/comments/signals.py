@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from .models import Comment
+from .stream import publish_comment_event
+
+@receiver(post_save, sender=Comment)
+def publish_saved_comment(sender, instance, created, **kwargs):
+    """Push new and edited comments to the article's stream clients once committed"""
+    event = 'created' if created else 'updated'
+    transaction.on_commit(lambda: publish_comment_event(instance, event))
@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import select
+import threading
+import time
+from collections import defaultdict
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection, connections
+from rest_framework.renderers import JSONRenderer
+from .models import Comment
+from .serializers import CommentSerializer
+
+logger = logging.getLogger(__name__)
+
+# PostgreSQL NOTIFY channel carrying comment events between workers
+NOTIFY_CHANNEL = 'comment_events'
+
+# Fields of the comments pushed to subscribers (no inlined replies)
+STREAM_FIELDS = ['id', 'content', 'author', 'author_username', 'article',
+                 'created_at', 'updated_at', 'reply_to', 'depth', 'reply_count']
+
+# Most comments replayed to a client reconnecting with Last-Event-ID
+CATCH_UP_LIMIT = 100
+
+
+def format_event(comment, event):
+    """
+    Render a comment as a Server-Sent Event. Only new comments carry an
+    `id`, so a reconnecting client's Last-Event-ID is the newest comment it
+    has seen.
+    """
+    data = JSONRenderer().render(CommentSerializer(comment, fields=STREAM_FIELDS).data).decode()
+    lines = [f'event: comment.{event}']
+    if event == 'created':
+        lines.append(f'id: {comment.pk}')
+    lines.append(f'data: {data}')
+    return '\n'.join(lines) + '\n\n'
+
+
+def render_event(comment_id, event):
+    """The event for a comment, or None if it was deleted meanwhile."""
+    comment = (Comment.objects.filter(pk=comment_id, hidden_at__isnull=True)
+               .select_related('author').first())
+    return format_event(comment, event) if comment is not None else None
+
+
+def render_missed_events(article_id, last_event_id):
+    """Events for the comments created on an article after `last_event_id`."""
+    comments = (Comment.objects.filter(article_id=article_id, pk__gt=last_event_id, hidden_at__isnull=True)
+                .select_related('author').order_by('pk')[:CATCH_UP_LIMIT])
+    return [format_event(comment, 'created') for comment in comments]
+
+
+class Subscription:
+    """The pending events of one stream client."""
+
+    def __init__(self, article_id):
+        self.article_id = article_id
+        self.queue = asyncio.Queue(maxsize=settings.COMMENT_STREAM_QUEUE_SIZE)
+        # Set when the client fell too far behind: its stream is closed once
+        # drained and the client reconnects with Last-Event-ID
+        self.overflowed = False
+
+    def push(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class CommentHub:
+    """
+    Fans comment events out to the stream clients of this worker process.
+
+    Subscribers are queues on the worker's event loop, grouped by article:
+    an idle client costs one queue and no work. Each event is loaded and
+    rendered once per worker, however many clients watch the article, and
+    only if someone does. Events reach the hub from every worker through
+    PostgreSQL LISTEN/NOTIFY; on other databases only this process's own
+    writes are seen (enough for a single worker in development).
+    """
+
+    def __init__(self):
+        self.subscribers = defaultdict(set)
+        self.loop = None
+        self._tasks = set()
+        self._listener = None
+
+    def subscribe(self, article_id):
+        """Start receiving an article's events; call from the event loop."""
+        self.loop = asyncio.get_running_loop()
+        self._start_listener()
+        subscription = Subscription(article_id)
+        self.subscribers[article_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        subscribers = self.subscribers.get(subscription.article_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self.subscribers[subscription.article_id]
+
+    def notify(self, article_id, comment_id, event):
+        """Deliver a comment event to the article's subscribers; safe to call from any thread."""
+        if self.loop is None or self.loop.is_closed() or article_id not in self.subscribers:
+            return
+        self.loop.call_soon_threadsafe(self._schedule, article_id, comment_id, event)
+
+    def _schedule(self, article_id, comment_id, event):
+        task = self.loop.create_task(self._dispatch(article_id, comment_id, event))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, article_id, comment_id, event):
+        if article_id not in self.subscribers:
+            return
+        message = await sync_to_async(render_event)(comment_id, event)
+        if message is None:
+            return
+        for subscription in list(self.subscribers.get(article_id, ())):
+            subscription.push(message)
+
+    def _start_listener(self):
+        if self._listener is None and connection.vendor == 'postgresql':
+            self._listener = threading.Thread(target=self._listen, name='comment-hub', daemon=True)
+            self._listener.start()
+
+    def _listen(self):
+        """Forward this channel's NOTIFY payloads to notify(), reconnecting on errors."""
+        database = connections['default']
+        while True:
+            try:
+                listener = database.get_new_connection(database.get_connection_params())
+                listener.autocommit = True
+                with listener.cursor() as cursor:
+                    cursor.execute(f'LISTEN {NOTIFY_CHANNEL}')
+                while True:
+                    if select.select([listener], [], [], 60) == ([], [], []):
+                        continue
+                    listener.poll()
+                    while listener.notifies:
+                        self.notify(**json.loads(listener.notifies.pop(0).payload))
+            except Exception:
+                logger.exception('Comment event listener failed, reconnecting')
+                time.sleep(5)
+
+
+hub = CommentHub()
+
+
+def publish_comment_event(comment, event):
+    """
+    Announce a created or updated comment to the stream clients of every
+    worker. Only ids are sent; each worker's hub loads the comment itself.
+    """
+    if connection.vendor == 'postgresql':
+        payload = json.dumps({'article_id': comment.article_id, 'comment_id': comment.pk, 'event': event})
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_notify(%s, %s)', [NOTIFY_CHANNEL, payload])
+    else:
+        hub.notify(comment.article_id, comment.pk, event)
+
+
+async def comment_events(article_id, last_event_id=None):
+    """
+    The event stream of one client: missed comments first when resuming,
+    then live events, with a comment line every
+    settings.COMMENT_STREAM_KEEPALIVE seconds to keep proxies from closing
+    the idle connection.
+    """
+    # Subscribe before catching up so no event falls in between
+    subscription = hub.subscribe(article_id)
+    try:
+        yield f'retry: {settings.COMMENT_STREAM_RETRY_MS}\n\n'
+        if last_event_id is not None:
+            for message in await sync_to_async(render_missed_events)(article_id, last_event_id):
+                yield message
+        while not (subscription.overflowed and subscription.queue.empty()):
+            try:
+                yield await asyncio.wait_for(subscription.queue.get(), settings.COMMENT_STREAM_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield ': keepalive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
@@ -1,10 +1,18 @@
+import asyncio
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework import status
-from django.contrib.auth.models import User
+from django.contrib.auth.models import User, Group
+from django.core.management import call_command
+from django.utils import timezone
 from articles.models import Article
 from comments.models import Comment
+from comments.paths import backfill_paths, subtree_filter
+from comments.stream import CommentHub
+from io import StringIO
 import json
 
 class CommentTests(TestCase):
@@ -116,4 +124,283 @@ class CommentTests(TestCase):
         response = self.client.post(url, data=json.dumps(data), content_type='application/json')
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(Comment.objects.count(), 2)
-        self.assertEqual(Comment.objects.get(id=response.data['id']).reply_to.id, self.comment.id)
\ No newline at end of file
+        self.assertEqual(Comment.objects.get(id=response.data['id']).reply_to.id, self.comment.id)
+    
+    def test_cursor_pagination_for_article_comments(self):
+        """Test cursor pagination of an article's root comments"""
+        second = Comment.objects.create(
+            article=self.article,
+            content='This is a second comment',
+            author=self.regular_user
+        )
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        response = self.client.get(f'{url}?pagination=cursor&page_size=1')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['id'], self.comment.id)
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'][0]['id'], second.id)
+        self.assertIsNone(response.data['next'])
+    
+    def test_conditional_get_article_comments(self):
+        """Test the comment list ETag changes when a reply is edited"""
+        reply = Comment.objects.create(
+            article=self.article,
+            content='This is a reply',
+            author=self.regular_user,
+            reply_to=self.comment
+        )
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+        
+        reply.content = 'This is an edited reply'
+        reply.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+    
+    def test_counters_follow_comment_create_and_delete(self):
+        """Test comment and reply counters are maintained on create and thread delete"""
+        call_command('recompute_comment_counts', stdout=StringIO())
+        users_group, _ = Group.objects.get_or_create(name='users')
+        self.regular_user.groups.add(users_group)
+        self.client.force_authenticate(user=self.regular_user)
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        
+        reply = self.client.post(url, {'content': 'A reply', 'reply_to': self.comment.id}, format='json')
+        self.assertEqual(reply.status_code, status.HTTP_201_CREATED)
+        nested = self.client.post(url, {'content': 'A nested reply', 'reply_to': reply.data['id']}, format='json')
+        self.assertEqual(nested.status_code, status.HTTP_201_CREATED)
+        
+        self.article.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 3)
+        self.assertEqual(self.comment.reply_count, 1)
+        self.assertEqual(Comment.objects.get(id=reply.data['id']).reply_count, 1)
+        
+        # Deleting the root comment removes its whole thread
+        response = self.client.delete(reverse('comment-detail', kwargs={'pk': self.comment.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 0)
+    
+    def test_recompute_comment_counts(self):
+        """Test the recompute command repairs drifted counters"""
+        Comment.objects.create(
+            article=self.article,
+            content='This is a reply',
+            author=self.admin_user,
+            reply_to=self.comment
+        )
+        Article.objects.filter(id=self.article.id).update(comment_count=42)
+        call_command('recompute_comment_counts', batch_size=1, stdout=StringIO())
+        self.article.refresh_from_db()
+        self.comment.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 2)
+        self.assertEqual(self.comment.reply_count, 1)
+    
+    def test_reply_tree_is_inlined_to_max_depth(self):
+        """Test nested replies are inlined in order and cut at ?max_depth="""
+        parent = self.comment
+        for i in range(3):
+            parent = Comment.objects.create(
+                article=self.article,
+                content=f'Reply at depth {i + 1}',
+                author=self.regular_user,
+                reply_to=parent
+            )
+        call_command('recompute_comment_counts', stdout=StringIO())
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        node = self.client.get(f'{url}?max_depth=3').data['results'][0]
+        for i in range(3):
+            self.assertEqual(len(node['replies']), 1)
+            node = node['replies'][0]
+            self.assertEqual(node['content'], f'Reply at depth {i + 1}')
+        self.assertEqual(node['replies'], [])
+        
+        # Lists inline one level of replies by default
+        root = self.client.get(url).data['results'][0]
+        self.assertEqual(root['replies'][0]['replies'], [])
+        self.assertIsNotNone(root['replies'][0]['replies_next'])
+    
+    def test_retrieve_reply_subtree(self):
+        """Test a reply can be retrieved with the subtree below it"""
+        reply = Comment.objects.create(
+            article=self.article,
+            content='This is a reply',
+            author=self.regular_user,
+            reply_to=self.comment
+        )
+        Comment.objects.create(
+            article=self.article,
+            content='This is a nested reply',
+            author=self.admin_user,
+            reply_to=reply
+        )
+        response = self.client.get(reverse('comment-detail', kwargs={'pk': reply.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], reply.id)
+        self.assertEqual(response.data['replies'][0]['author_username'], 'admin_test')
+    
+    def test_paths_follow_threads(self):
+        """Test replies get a materialized path and depth below their parent"""
+        reply = Comment.objects.create(
+            article=self.article,
+            content='This is a reply',
+            author=self.regular_user,
+            reply_to=self.comment
+        )
+        nested = Comment.objects.create(
+            article=self.article,
+            content='This is a nested reply',
+            author=self.regular_user,
+            reply_to=reply
+        )
+        self.comment.refresh_from_db()
+        self.assertEqual((self.comment.depth, reply.depth, nested.depth), (0, 1, 2))
+        self.assertTrue(nested.path.startswith(reply.path))
+        self.assertTrue(reply.path.startswith(self.comment.path))
+        
+        subtree = Comment.objects.filter(subtree_filter(self.comment)).order_by('path')
+        self.assertEqual(list(subtree), [self.comment, reply, nested])
+        sliced = Comment.objects.filter(subtree_filter(self.comment, max_depth=1))
+        self.assertEqual(set(sliced), {self.comment, reply})
+        
+        # Rows written without save() are filled in by the backfill command
+        Comment.objects.filter(article=self.article).update(path='', depth=0)
+        call_command('backfill_comment_paths', batch_size=1, stdout=StringIO())
+        nested.refresh_from_db()
+        self.assertEqual(nested.depth, 2)
+        self.assertTrue(nested.path.startswith(reply.path))
+    
+    def test_collapsed_replies_with_more_replies_cursor(self):
+        """Test only the first replies are inlined and replies_next pages through the rest"""
+        replies = [
+            Comment.objects.create(
+                article=self.article,
+                content=f'Reply number {i}',
+                author=self.regular_user,
+                reply_to=self.comment
+            )
+            for i in range(5)
+        ]
+        call_command('recompute_comment_counts', stdout=StringIO())
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        root = self.client.get(f'{url}?replies=2').data['results'][0]
+        self.assertEqual(root['reply_count'], 5)
+        self.assertEqual([reply['id'] for reply in root['replies']], [reply.id for reply in replies[:2]])
+        
+        seen = []
+        next_url = root['replies_next']
+        while next_url:
+            response = self.client.get(next_url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            seen += [reply['id'] for reply in response.data['results']]
+            next_url = response.data['next']
+        self.assertEqual(seen, [reply.id for reply in replies[2:]])
+    
+    def test_collapsed_replies_read_only_the_first_replies(self):
+        """Test collapsed branches fetch only their first replies and no unrendered author columns"""
+        Comment.objects.bulk_create(
+            Comment(article=self.article, content=f'Reply number {i}', author=self.regular_user,
+                    reply_to=self.comment, depth=1)
+            for i in range(20)
+        )
+        backfill_paths(Comment)
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        with CaptureQueriesContext(connection) as queries:
+            root = self.client.get(f'{url}?replies=2').data['results'][0]
+        self.assertEqual(len(root['replies']), 2)
+        self.assertEqual(root['replies'][0]['author_username'], 'regular_test')
+        replies_sql = queries.captured_queries[-1]['sql']
+        self.assertIn('LIMIT', replies_sql)
+        self.assertNotIn('password', replies_sql)
+    
+    def test_deleted_thread_is_hidden_then_purged(self):
+        """Test a deleted thread disappears at once and purge_hidden removes its rows"""
+        parent = self.comment
+        for depth in range(1, 4):
+            parent = Comment.objects.create(
+                article=self.article,
+                content=f'Reply at depth {depth}',
+                author=self.admin_user,
+                reply_to=parent
+            )
+        other = Comment.objects.create(
+            article=self.article,
+            content='Another root comment',
+            author=self.admin_user
+        )
+        self.client.force_authenticate(user=self.regular_user)
+        
+        # The background purge only starts on commit, which tests never reach
+        response = self.client.delete(reverse('comment-detail', kwargs={'pk': self.comment.id}))
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(Comment.objects.count(), 5)
+        url = reverse('article-comments', kwargs={'article_id': self.article.id})
+        listed = self.client.get(url).data['results']
+        self.assertEqual([comment['id'] for comment in listed], [other.id])
+        detail_url = reverse('comment-detail', kwargs={'pk': self.comment.id})
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND)
+        
+        # No reply of the thread stays reachable or counted before the purge
+        reply_url = reverse('comment-detail', kwargs={'pk': parent.id})
+        self.assertEqual(self.client.get(reply_url).status_code, status.HTTP_404_NOT_FOUND)
+        # The feed only lists comments on published articles
+        Article.objects.filter(pk=self.article.pk).update(status='published')
+        activity = self.client.get(reverse('user-activity', kwargs={'pk': self.admin_user.id})).data
+        comments = [item['id'] for item in activity['results'] if item['type'] == 'comment']
+        self.assertEqual(comments, [other.id])
+        call_command('recompute_comment_counts', stdout=StringIO())
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 1)
+        
+        call_command('purge_hidden', batch_size=1, stdout=StringIO())
+        self.assertEqual(list(Comment.objects.values_list('id', flat=True)), [other.id])
+    
+    def test_comments_of_deleted_article_are_hidden(self):
+        """Test the comments of a deleted article cannot be listed or fetched before the purge"""
+        Article.objects.filter(id=self.article.id).update(hidden_at=timezone.now())
+        self.assertEqual(self.client.get(reverse('comment-list')).data['results'], [])
+        detail_url = reverse('comment-detail', kwargs={'pk': self.comment.id})
+        self.assertEqual(self.client.get(detail_url).status_code, status.HTTP_404_NOT_FOUND)
+    
+    async def test_stream_hub_fans_out_comment_events(self):
+        """Test a comment event is pushed to every subscriber of its article only"""
+        hub = CommentHub()
+        first = hub.subscribe(self.article.id)
+        second = hub.subscribe(self.article.id)
+        other = hub.subscribe(self.article.id + 1)
+        comment = await Comment.objects.acreate(
+            article=self.article,
+            content='A live comment',
+            author=self.regular_user
+        )
+        
+        hub.notify(self.article.id, comment.id, 'created')
+        for subscription in (first, second):
+            message = await asyncio.wait_for(subscription.queue.get(), 5)
+            self.assertTrue(message.startswith('event: comment.created\n'))
+            self.assertIn(f'id: {comment.id}\n', message)
+            self.assertIn('"content":"A live comment"', message)
+        self.assertTrue(other.queue.empty())
+        
+        for subscription in (first, second, other):
+            hub.unsubscribe(subscription)
+        self.assertEqual(dict(hub.subscribers), {})
+    
+    async def test_comment_stream_replays_missed_comments(self):
+        """Test the stream endpoint resumes after Last-Event-ID with the comments created since"""
+        url = reverse('article-comments-stream', kwargs={'article_id': self.article.id})
+        response = await self.async_client.get(url, headers={'Last-Event-ID': '0'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        
+        events = aiter(response.streaming_content)
+        self.assertTrue((await anext(events)).startswith(b'retry: '))
+        replayed = await anext(events)
+        self.assertIn(f'id: {self.comment.id}\n'.encode(), replayed)
+        await events.aclose()
+        
+        missing = reverse('article-comments-stream', kwargs={'article_id': self.article.id + 1})
+        response = await self.async_client.get(missing)
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
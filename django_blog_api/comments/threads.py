@@ -0,0 +1,106 @@
+from collections import defaultdict
+from django.db import connection
+from django.db.models import F, Window
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import RowNumber
+from .models import Comment
+from .paths import subtree_filter, threads_of
+
+# Order of the replies of a comment, also used by the "more replies" cursors
+BRANCH_ORDERING = ('path', 'id')
+
+
+def first_replies(comments, max_depth, per_branch):
+    """
+    Subquery of the ids of the first `per_branch` visible replies of each
+    of `comments`, of each of those replies and so on, down to `max_depth`
+    levels (unlimited if None).
+
+    A recursive walk reads every parent's replies from the (reply_to, path)
+    index and stops after `per_branch` of them, so a branch with thousands
+    of replies costs no more than one with `per_branch`.
+    """
+    table = connection.ops.quote_name(Comment._meta.db_table)
+    replies = (f'SELECT c.id FROM {table} c WHERE c.reply_to_id = b.id '
+               f'AND c.hidden_at IS NULL ORDER BY c.path LIMIT %s')
+    if connection.vendor == 'postgresql':
+        step = f'CROSS JOIN LATERAL ({replies}) r'
+    else:
+        # Without LATERAL: the id list of each parent's replies drives the join
+        step = f'JOIN {table} r ON r.id IN ({replies})'
+    params = [comment.pk for comment in comments] + [per_branch]
+    depth_limit = ''
+    if max_depth is not None:
+        depth_limit = 'WHERE b.level < %s'
+        params.append(max_depth)
+    placeholders = ', '.join(['%s'] * len(comments))
+    sql = (
+        f'WITH RECURSIVE branch (id, level) AS ('
+        f'SELECT id, 0 FROM {table} WHERE id IN ({placeholders}) '
+        f'UNION ALL SELECT r.id, b.level + 1 FROM branch b {step} {depth_limit}'
+        f') SELECT id FROM branch WHERE level > 0'
+    )
+    return RawSQL(sql, params)
+
+
+def load_threads(comments, max_depth=None, per_branch=None, project=None):
+    """
+    Attach the reply tree below each of `comments` in one query.
+
+    The replies of the comments' subtrees (down to `max_depth` levels, and
+    only the first `per_branch` replies of every comment) are fetched at
+    once, authors joined, grouped by parent in a single O(N) pass and
+    attached to each node as `thread_replies`, in thread order. Serializing
+    the tree afterwards needs no further queries, whatever its depth.
+    `project` narrows the replies' queryset to the rendered columns (see
+    SparseFieldsetViewMixin.project_queryset).
+    """
+    comments = list(comments)
+    if not comments:
+        return comments
+    if max_depth == 0:
+        replies = Comment.objects.none()
+    elif not all(comment.path for comment in comments):
+        # Not backfilled yet: fall back to all replies of the articles
+        replies = Comment.objects.filter(
+            article_id__in={comment.article_id for comment in comments},
+            reply_to__isnull=False,
+        )
+        if per_branch is not None:
+            replies = replies.annotate(branch_position=Window(
+                RowNumber(), partition_by=F('reply_to'), order_by=F('path').asc()
+            )).filter(branch_position__lte=per_branch)
+    elif per_branch is not None:
+        replies = Comment.objects.filter(pk__in=first_replies(comments, max_depth, per_branch))
+    elif len(comments) == 1:
+        replies = Comment.objects.filter(subtree_filter(comments[0], max_depth, include_self=False))
+    else:
+        # A page of root comments or of a comment's replies
+        replies = threads_of(Comment.objects.all(), comments, max_depth)
+    # Replies of a hidden (deleted) reply are dropped below with it
+    replies = replies.filter(hidden_at__isnull=True)
+    replies = replies.select_related('author').order_by(*BRANCH_ORDERING)
+    if project is not None:
+        replies = project(replies)
+
+    children = defaultdict(list)
+    nodes = {comment.pk: comment for comment in comments}
+    for reply in replies:
+        # Replies of a reply that was itself left out of its branch are
+        # dropped; path (and id) order guarantees parents come first
+        if reply.reply_to_id not in nodes:
+            continue
+        # Reuse instances already loaded (e.g. a requested reply)
+        reply = nodes.setdefault(reply.pk, reply)
+        children[reply.reply_to_id].append(reply)
+    for node in nodes.values():
+        node.thread_replies = children.get(node.pk, [])
+    return comments
+
+
+def get_replies(comment):
+    """The direct replies of a comment, from its loaded thread if available."""
+    replies = getattr(comment, 'thread_replies', None)
+    if replies is None:
+        replies = comment.replies.all()
+    return replies
@@ -1,30 +1,162 @@
 
 from rest_framework import viewsets, permissions, status
+from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.exceptions import NotFound, MethodNotAllowed
+from django.db import transaction
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import Http404, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from .models import Comment
 from .serializers import CommentSerializer
+from .counters import comment_added
+from .deletion import hide_comment
+from .threads import BRANCH_ORDERING, load_threads
+from .stream import comment_events
 from articles.models import Article
 from utils.permissions import IsAdminUser, IsOwner, AnyUser
+from core.pagination import KeysetPagination, KeysetPaginationMixin
+from core.conditional import ConditionalGetMixin
+from core.fieldsets import SparseFieldsetViewMixin
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalGetMixin, KeysetPaginationMixin, SparseFieldsetViewMixin,
+                     viewsets.ModelViewSet):
     """
     A viewset for viewing and editing comments.
+    Supports opt-in keyset pagination with ?pagination=cursor,
+    conditional GET (ETag) on list and retrieve, and sparse fieldsets
+    with ?fields= / ?omit=.
+    Reply trees are loaded with one query and inlined down to ?max_depth=
+    levels, showing the first ?replies= replies of every comment; the rest
+    of a branch is paged through with its `replies_next` link.
+    Creating and deleting comments keeps Article.comment_count and
+    Comment.reply_count up to date. Deleted threads disappear at once and
+    are purged in the background. Comment creation is throttled per user
+    (the 'comment_create' throttle scope).
     """
     queryset = Comment.objects.all()
     serializer_class = CommentSerializer
+    conditional_detail_fields = ('id', 'article_id', 'updated_at')
+    # Hiding an article only bumps the article generation; author names are rendered
+    conditional_namespaces = ('articles.article', 'comments.comment', 'auth.user')
+    # Replies are inlined, so a comment's representation changes with its thread
+    detail_last_modified = False
+    # Read when loading the reply trees
+    required_fields = ('path', 'depth')
+    # Lists inline one level of replies, the detail view the whole subtree
+    # (up to settings.COMMENT_THREAD_MAX_DEPTH)
+    collapsed_reply_depth = 1
+    max_replies_per_branch = 100
     
     def get_queryset(self):
         """
         Filter comments based on article_id if provided in the URL.
-        Returns only root comments (not replies) for better organization.
+        Lists only root comments (not replies) for better organization;
+        their replies are loaded separately (see load_threads). Hidden
+        (deleted) comments, and the comments of hidden articles, are left
+        out until they are purged.
         """
+        comments = Comment.objects.filter(hidden_at__isnull=True).select_related('author')
         article_id = self.kwargs.get('article_id')
         if article_id:
-            if not Article.objects.filter(id=article_id).exists():
+            if not Article.objects.filter(id=article_id, hidden_at__isnull=True).exists():
                 raise NotFound(detail="Article not found.")
-            return Comment.objects.filter(article_id=article_id, reply_to=None)
-        return Comment.objects.filter(reply_to=None)
+            return comments.filter(article_id=article_id, reply_to=None)
+        comments = comments.filter(article__hidden_at__isnull=True)
+        if self.action in ('retrieve', 'replies'):
+            # Any comment can be fetched with the subtree below it
+            return comments
+        return comments.filter(reply_to=None)
+    
+    def _thread_fingerprint(self, article_id=None):
+        """
+        Cache generations plus, without a shared cache, the latest change
+        and size of an article's comments (or of all comments).
+        """
+        fingerprint = {'generations': self.get_generations()}
+        if not settings.SHARED_CACHE:
+            comments = Comment.objects.all()
+            if article_id:
+                comments = comments.filter(article_id=article_id)
+            fingerprint.update(comments.aggregate(last_modified=Max('updated_at'), count=Count('pk')))
+        return fingerprint
+    
+    def get_collection_fingerprint(self):
+        """
+        Root comments are listed with their replies inlined, so the
+        collection changes whenever any comment of the article does.
+        """
+        return self._thread_fingerprint(self.kwargs.get('article_id'))
+    
+    def get_detail_fingerprint(self):
+        """A comment is rendered with its replies, so it changes with its thread."""
+        fingerprint = super().get_detail_fingerprint()
+        if fingerprint is not None:
+            thread = self._thread_fingerprint(fingerprint['article_id'])
+            fingerprint.update({f'thread_{key}': value for key, value in thread.items()})
+        return fingerprint
+    
+    def paginate_queryset(self, queryset):
+        """Load the reply trees of the page's root comments in one query."""
+        page = super().paginate_queryset(queryset)
+        if page is not None and self._renders_replies():
+            page = load_threads(page, self.get_max_depth(), self.get_replies_per_branch(),
+                                self.project_replies)
+        return page
+    
+    def get_object(self):
+        obj = super().get_object()
+        if self.action == 'retrieve' and self._renders_replies():
+            load_threads([obj], self.get_max_depth(), self.get_replies_per_branch(), self.project_replies)
+        return obj
+    
+    def project_replies(self, queryset):
+        """Read only the columns (of the comment and its author) the replies render."""
+        return self.project_queryset(queryset, self.get_serializer().fields)
+    
+    def _renders_replies(self):
+        fields = self.get_serializer().fields
+        return 'replies' in fields or 'replies_next' in fields
+    
+    def _int_param(self, name, default, maximum):
+        try:
+            value = int(self.request.query_params.get(name, default))
+        except ValueError:
+            value = default
+        return max(0, min(value, maximum))
+    
+    def get_max_depth(self):
+        """The requested reply depth (?max_depth=), capped by settings.COMMENT_THREAD_MAX_DEPTH."""
+        max_depth = settings.COMMENT_THREAD_MAX_DEPTH
+        default = max_depth if self.action == 'retrieve' else self.collapsed_reply_depth
+        return self._int_param('max_depth', min(default, max_depth), max_depth)
+    
+    def get_replies_per_branch(self):
+        """How many replies of each comment are inlined (?replies=)."""
+        return self._int_param('replies', settings.COMMENT_REPLIES_PER_BRANCH, self.max_replies_per_branch)
+    
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context['max_depth'] = self.get_max_depth()
+        return context
+    
+    @action(detail=True, methods=['get'])
+    def replies(self, request, pk=None):
+        """
+        Page through the direct replies of a comment in thread order with
+        keyset pagination (the `replies_next` links point here), each reply
+        with its own first replies inlined.
+        """
+        parent = self.get_object()
+        queryset = self.filter_queryset(
+            Comment.objects.filter(reply_to=parent, hidden_at__isnull=True)
+            .select_related('author').order_by(*BRANCH_ORDERING)
+        )
+        self._paginator = KeysetPagination()
+        page = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
     
     def get_permissions(self):
         """
@@ -36,10 +168,14 @@ class CommentViewSet(viewsets.ModelViewSet):
             permission_classes = [IsOwner]
         elif self.action == 'destroy':
             permission_classes = [permissions.IsAuthenticated, IsOwner]  # Allow authors to delete their own comments
-        else:  # 'list', 'retrieve'
+        else:  # 'list', 'retrieve', 'replies'
             permission_classes = [permissions.AllowAny]
         return [permission() for permission in permission_classes]
     
+    def get_throttle_scope(self, request):
+        """Throttle comment creation (see core.throttling)."""
+        return 'comment_create' if self.action == 'create' else None
+    
     def create(self, request, *args, **kwargs):
         """
         Create a new comment for a specific article.
@@ -52,16 +188,26 @@ class CommentViewSet(viewsets.ModelViewSet):
             )
         
         try:
-            article = Article.objects.get(id=article_id)
+            article = Article.objects.get(id=article_id, hidden_at__isnull=True)
         except Article.DoesNotExist:
             raise NotFound(detail="Article not found.")
         
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
-        serializer.save(author=request.user, article=article)
+        with transaction.atomic():
+            comment = serializer.save(author=request.user, article=article)
+            comment_added(comment)
         
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
+    def perform_destroy(self, instance):
+        """
+        Hide the comment with its replies and uncount the whole thread from
+        the article and the comment it replied to; the rows are purged in
+        batches in the background (see comments.deletion).
+        """
+        hide_comment(instance)
+    
     def update(self, request, *args, **kwargs):
         """
         Disallow full update (PUT method). Only partial updates allowed.
@@ -88,4 +234,26 @@ class CommentViewSet(viewsets.ModelViewSet):
         serializer.is_valid(raise_exception=True)
         self.perform_update(serializer)
         
-        return Response(serializer.data)
\ No newline at end of file
+        return Response(serializer.data)
+
+@require_GET
+async def comment_stream(request, article_id):
+    """
+    Server-Sent Events stream of the comments created or edited on an
+    article, replacing polling of the comment list. Resuming with a
+    Last-Event-ID header replays the comments created since. Must be served
+    through blog.asgi: each open stream is an idle coroutine, not a thread.
+    """
+    if not await Article.objects.filter(id=article_id, hidden_at__isnull=True).aexists():
+        raise Http404("Article not found.")
+    try:
+        last_event_id = int(request.headers['Last-Event-ID'])
+    except (KeyError, ValueError):
+        last_event_id = None
+    response = StreamingHttpResponse(
+        comment_events(article_id, last_event_id), content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Keep reverse proxies (nginx) from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,58 @@
+import logging
+import threading
+from django.conf import settings
+from django.db import connections, transaction
+from .cache import batched_invalidation
+
+logger = logging.getLogger(__name__)
+
+
+def run_in_background(func, *args):
+    """
+    Run func(*args) in a daemon thread once the current transaction commits.
+
+    There is no task queue: work started here is lost if the process exits,
+    so callers must leave enough state behind for a management command to
+    finish it (see purge_hidden). With settings.BACKGROUND_TASKS_INLINE the
+    function runs in the calling thread instead (tests, single-process tools).
+    """
+    def start():
+        if settings.BACKGROUND_TASKS_INLINE:
+            func(*args)
+        else:
+            threading.Thread(target=_run, args=(func, *args), daemon=True).start()
+    transaction.on_commit(start)
+
+
+def _run(func, *args):
+    try:
+        func(*args)
+    except Exception:
+        logger.exception('Background task %s failed', func.__qualname__)
+    finally:
+        # The thread opened its own connections
+        connections.close_all()
+
+
+def delete_in_batches(queryset, batch_size=None):
+    """
+    Delete the rows of `queryset` `batch_size` at a time, each batch in its
+    own short transaction, and return the number of rows deleted.
+
+    Only one batch of primary keys (and of instances, for signals and the
+    cascade collector) is held in memory at a time, and row locks are
+    released between batches. Order the queryset so rows come before the
+    rows they reference (e.g. replies before their parents), so a batch
+    never cascades. Cache namespaces are invalidated once per batch, not
+    once per deleted row.
+    """
+    batch_size = batch_size or settings.DELETION_BATCH_SIZE
+    model = queryset.model
+    deleted = 0
+    while True:
+        pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        with transaction.atomic(), batched_invalidation():
+            count, _ = model.objects.filter(pk__in=pks).delete()
+        deleted += count
@@ -0,0 +1,92 @@
+import hashlib
+import threading
+import time
+from contextlib import contextmanager
+from django.core.cache import cache
+from django.db import transaction
+
+GENERATION_KEY_PREFIX = 'generation'
+
+# Namespaces whose invalidation is deferred by batched_invalidation(), per thread
+_deferred = threading.local()
+
+
+def _generation_key(namespace):
+    return f'{GENERATION_KEY_PREFIX}:{namespace}'
+
+
+def _initial_generation():
+    # Time based so a generation key that was evicted never restarts at a
+    # number whose cache entries may still be alive.
+    return int(time.time() * 1000)
+
+
+def get_generation(namespace):
+    """
+    Return the current generation number of a cache namespace.
+
+    Cache keys embed the generation of the data they were built from, so
+    bumping it invalidates every entry of the namespace in O(1) without
+    scanning or deleting keys; stale entries simply expire.
+    """
+    key = _generation_key(namespace)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _initial_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+def bump_generation(namespace):
+    """Invalidate every cache entry built from the namespace's current generation."""
+    key = _generation_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # Key missing (never read or evicted): start a fresh generation
+        cache.set(key, _initial_generation(), timeout=None)
+
+
+def invalidate_namespace(namespace):
+    """
+    Bump a namespace's generation now and again once the current transaction
+    commits, so a reader that cached pre-commit data during the transaction
+    does not keep serving it.
+    """
+    pending = getattr(_deferred, 'namespaces', None)
+    if pending is not None:
+        pending.add(namespace)
+        return
+    bump_generation(namespace)
+    transaction.on_commit(lambda: bump_generation(namespace))
+
+
+@contextmanager
+def batched_invalidation():
+    """
+    Invalidate each namespace once when the block exits, however many rows
+    of it the block writes (e.g. a batch of deletes firing a signal per row).
+    """
+    if getattr(_deferred, 'namespaces', None) is not None:
+        # Nested: the outermost block invalidates
+        yield
+        return
+    _deferred.namespaces = set()
+    try:
+        yield
+    finally:
+        namespaces, _deferred.namespaces = _deferred.namespaces, None
+        for namespace in namespaces:
+            invalidate_namespace(namespace)
+
+
+def model_namespace(model):
+    """Return the cache namespace used for a model's data, e.g. 'articles.article'."""
+    # Proxy models (e.g. users.ClaimUser) share their concrete model's data
+    return model._meta.concrete_model._meta.label_lower
+
+
+def make_key(*parts):
+    """Build a short, cache-safe key from arbitrary parts."""
+    digest = hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+    return f'{parts[0]}:{digest}'
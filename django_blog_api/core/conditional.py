@@ -0,0 +1,96 @@
+import hashlib
+from django.conf import settings
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .cache import get_generation
+from .response_cache import normalize_query_params
+
+
+def make_etag(*parts):
+    """Weak ETag over arbitrary values (the same data may be rendered as JSON or HTML)."""
+    return 'W/"%s"' % hashlib.md5(repr(parts).encode('utf-8')).hexdigest()
+
+
+class ConditionalGetMixin:
+    """
+    Viewset mixin adding ETag / Last-Modified validators to list and
+    retrieve, answering matching conditional requests with 304 Not Modified
+    before the object is loaded or serialized.
+
+    - Detail validators come from a single-row query of
+      `conditional_detail_fields` (e.g. id and updated_at).
+    - Collection ETags come from a fingerprint of the collection plus the
+      URL kwargs and normalized query params. With a shared cache the
+      fingerprint is the cache generation (see core.cache) of every
+      namespace in `conditional_namespaces`, which every write to those
+      models bumps, and costs no query. A process-local cache never sees
+      the writes of other processes, so without one an aggregate over the
+      filtered queryset (latest `last_modified_field` and row count) is
+      added to it.
+      Collections send no Last-Modified header because deleting a row does
+      not move the latest modification time.
+    """
+    conditional_detail_fields = ('id', 'updated_at')
+    conditional_namespaces = ()
+    last_modified_field = 'updated_at'
+    detail_last_modified = True
+
+    def get_detail_fingerprint(self):
+        """
+        Return a dict of values identifying the object's current state, or
+        None if it does not exist.
+        """
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        queryset = self.get_queryset().prefetch_related(None).filter(
+            **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        )
+        return queryset.values(*self.conditional_detail_fields).first()
+
+    def get_generations(self):
+        """Current cache generations of the `conditional_namespaces`."""
+        return [get_generation(namespace) for namespace in self.conditional_namespaces]
+
+    def get_collection_fingerprint(self):
+        """Return a dict of values identifying the collection's current state."""
+        fingerprint = {'generations': self.get_generations()}
+        if not settings.SHARED_CACHE:
+            queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).order_by()
+            fingerprint.update(queryset.aggregate(**self.get_collection_aggregates()))
+        return fingerprint
+
+    def get_collection_aggregates(self):
+        """Aggregates fingerprinting the collection when there is no shared cache."""
+        return {
+            'last_modified': Max(self.last_modified_field),
+            'count': Count('pk', distinct=True),
+        }
+
+    def list(self, request, *args, **kwargs):
+        fingerprint = self.get_collection_fingerprint()
+        etag = make_etag('list', sorted(self.kwargs.items()), sorted(fingerprint.items()),
+                         normalize_query_params(request.query_params))
+        return self.conditional_response(super().list, etag, None, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        fingerprint = self.get_detail_fingerprint()
+        if fingerprint is None:
+            # Let the regular lookup produce the 404
+            return super().retrieve(request, *args, **kwargs)
+        etag = make_etag('retrieve', sorted(fingerprint.items()), normalize_query_params(request.query_params))
+        last_modified = None
+        if self.detail_last_modified and fingerprint.get(self.last_modified_field):
+            # HTTP dates have whole-second precision
+            last_modified = int(fingerprint[self.last_modified_field].timestamp())
+        return self.conditional_response(super().retrieve, etag, last_modified, request, *args, **kwargs)
+
+    def conditional_response(self, handler, etag, last_modified, request, *args, **kwargs):
+        """Return 304 if the client's validators match, otherwise the handler's response."""
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+        return response
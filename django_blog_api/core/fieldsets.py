@@ -0,0 +1,109 @@
+from rest_framework.serializers import BaseSerializer
+
+
+def _param_list(request, name):
+    """Parse a comma separated query parameter, or None if it is absent."""
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin limiting the rendered fields.
+
+    The field set comes from the `fields`/`omit` keyword arguments or, for
+    GET requests, the ?fields= / ?omit= query params (comma separated).
+    Without an explicit ?fields=, `list` leaves out Meta.list_omit (e.g. the
+    full body on list pages) and every other use leaves out Meta.detail_omit.
+    """
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def __init__(self, *args, **kwargs):
+        fields = kwargs.pop('fields', None)
+        omit = kwargs.pop('omit', None)
+        super().__init__(*args, **kwargs)
+
+        request = self.context.get('request')
+        view = self.context.get('view')
+        if request is not None and request.method == 'GET':
+            if fields is None:
+                fields = _param_list(request, self.fields_query_param)
+            if omit is None:
+                omit = _param_list(request, self.omit_query_param)
+        if fields is None:
+            default_omit = 'list_omit' if getattr(view, 'action', None) == 'list' else 'detail_omit'
+            omit = list(omit or []) + list(getattr(self.Meta, default_omit, []))
+
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        for name in omit or []:
+            self.fields.pop(name, None)
+
+
+class SparseFieldsetViewMixin:
+    """
+    Viewset mixin pushing the serializer's field set down to the ORM.
+
+    On GET requests, concrete columns that no rendered field (or the active
+    ordering) reads are deferred, except those listed in `required_fields`
+    (read by the view itself), and annotations in `field_annotations` are
+    only added when their field is rendered.
+    """
+    field_annotations = {}
+    required_fields = ()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method != 'GET':
+            return queryset
+        return self.project_queryset(queryset, self.get_serializer().fields)
+
+    def project_queryset(self, queryset, fields):
+        """Defer unused columns and annotate the rendered computed fields."""
+        sources = [field.source for field in fields.values() if field.source != '*']
+        ordering = queryset.query.order_by or queryset.model._meta.ordering
+        needed = {source.split('.')[0] for source in sources}
+        needed.update(self.required_fields)
+        needed.update(
+            field.lstrip('-').split('__')[0]
+            for field in ordering if isinstance(field, str)
+        )
+        deferred = self._unused_columns(queryset.model, needed)
+
+        # Joined relations only need the columns read through them,
+        # e.g. author.username, unless a nested serializer renders them whole
+        nested = {field.source for field in fields.values() if isinstance(field, BaseSerializer)}
+        select_related = queryset.query.select_related
+        if isinstance(select_related, dict):
+            for relation in select_related:
+                if relation in nested:
+                    continue
+                related_model = queryset.model._meta.get_field(relation).related_model
+                related_needed = {
+                    source.split('.')[1] for source in sources
+                    if source.startswith(f'{relation}.')
+                }
+                deferred += [
+                    f'{relation}__{name}'
+                    for name in self._unused_columns(related_model, related_needed)
+                ]
+        if deferred:
+            queryset = queryset.defer(*deferred)
+
+        annotations = {
+            name: expression for name, expression in self.field_annotations.items()
+            if name in fields
+        }
+        if annotations:
+            queryset = queryset.annotate(**annotations)
+        return queryset
+
+    def _unused_columns(self, model, needed):
+        return [
+            field.name for field in model._meta.concrete_fields
+            if not field.primary_key and not field.is_relation and field.name not in needed
+        ]
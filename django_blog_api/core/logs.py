@@ -0,0 +1,115 @@
+import json
+import logging
+import queue
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from django.conf import settings
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    One JSON object per record: time, level, logger and message, the
+    fields passed as extra={'fields': {...}}, and the traceback if any.
+    """
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update(getattr(record, 'fields', {}))
+        if record.exc_info:
+            entry['traceback'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class QueueFileHandler(QueueHandler):
+    """
+    Logging handler that only puts records on a bounded in-memory queue; a
+    background thread formats them as JSON and writes them to `filename`
+    (rotated at `max_bytes`) or to stderr. Logging never waits for the
+    disk: when the queue is full, records are dropped and counted in
+    `dropped`.
+    """
+
+    def __init__(self, filename=None, max_bytes=10 * 1024 * 1024, backup_count=5, queue_size=10000):
+        super().__init__(queue.Queue(queue_size))
+        if filename:
+            target = RotatingFileHandler(filename, maxBytes=max_bytes, backupCount=backup_count, delay=True)
+        else:
+            target = logging.StreamHandler()
+        target.setFormatter(JsonFormatter())
+        self.target = target
+        self.dropped = 0
+        self.listener = QueueListener(self.queue, target)
+        self.listener.start()
+
+    def prepare(self, record):
+        # Merge the arguments now, as they may change once the call
+        # returns; tracebacks are formatted on the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        # Called by logging.shutdown() at exit: write out the queued records
+        if self.listener is not None:
+            self.listener.stop()
+            self.listener = None
+            self.target.close()
+        super().close()
+
+
+class ErrorSampler:
+    """
+    Per error code counters, and sampling of repetitive errors: in every
+    window of settings.ERROR_LOG_SAMPLE_WINDOW seconds the first
+    settings.ERROR_LOG_SAMPLE_BURST errors of a code are logged, then one
+    in settings.ERROR_LOG_SAMPLE_RATE. Counters are per process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = Counter()
+        self._windows = {}
+
+    def record(self, error_code):
+        """
+        Count an error and return (log it?, errors of this code not logged
+        since the last one that was).
+        """
+        now = time.monotonic()
+        with self._lock:
+            self._totals[error_code] += 1
+            started, seen, suppressed = self._windows.get(error_code, (now, 0, 0))
+            if now - started >= settings.ERROR_LOG_SAMPLE_WINDOW:
+                started, seen = now, 0
+            seen += 1
+            sample = (seen <= settings.ERROR_LOG_SAMPLE_BURST
+                      or (seen - settings.ERROR_LOG_SAMPLE_BURST) % settings.ERROR_LOG_SAMPLE_RATE == 0)
+            self._windows[error_code] = (started, seen, 0 if sample else suppressed + 1)
+        return sample, suppressed
+
+    def counts(self):
+        """Errors counted by this process since it started, per error code."""
+        with self._lock:
+            return dict(self._totals)
+
+    def reset(self):
+        with self._lock:
+            self._totals.clear()
+            self._windows.clear()
+
+
+error_sampler = ErrorSampler()
@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from rest_framework.settings import api_settings
+from core.throttling import DatabaseBucketStore, parse_rate
+
+
+class Command(BaseCommand):
+    help = 'Deletes database throttle buckets that have refilled completely'
+
+    def handle(self, *args, **options):
+        # A bucket untouched for its longest refill time is full, which is
+        # the same as having no bucket at all
+        refill_times = [
+            capacity / refill_rate
+            for capacity, refill_rate in map(parse_rate, filter(None, api_settings.DEFAULT_THROTTLE_RATES.values()))
+        ]
+        deleted = DatabaseBucketStore().clear_expired(max(refill_times, default=0))
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} full throttle buckets.'))
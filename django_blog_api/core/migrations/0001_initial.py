@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ThrottleBucket',
+            fields=[
+                ('key', models.CharField(help_text="Throttle scope and client, e.g. 'throttle:login:ip:127.0.0.1'", max_length=200, primary_key=True, serialize=False)),
+                ('tokens', models.FloatField(help_text='Tokens left at the time of the last refill')),
+                ('updated', models.FloatField(db_index=True, help_text='Unix time of the last refill')),
+            ],
+        ),
+    ]
@@ -1,3 +1,23 @@
 from django.db import models
 
-# Create your models here.
+
+class ThrottleBucket(models.Model):
+    """
+    Token bucket of one throttle scope and client, shared by every worker
+    process (see core.throttling.DatabaseBucketStore).
+    """
+    key = models.CharField(
+        max_length=200,
+        primary_key=True,
+        help_text="Throttle scope and client, e.g. 'throttle:login:ip:127.0.0.1'"
+    )
+    tokens = models.FloatField(
+        help_text="Tokens left at the time of the last refill"
+    )
+    updated = models.FloatField(
+        db_index=True,
+        help_text="Unix time of the last refill"
+    )
+
+    def __str__(self):
+        return self.key
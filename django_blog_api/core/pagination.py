@@ -1,5 +1,132 @@
-from rest_framework.pagination import PageNumberPagination
+import heapq
+import json
+import operator
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import partial, reduce
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+from django.core.paginator import EmptyPage, Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor, CursorPagination, PageNumberPagination, _reverse_ordering
+)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+from .cache import get_generation, make_key, model_namespace
+
+def cached_count(queryset, timeout=None):
+    """
+    Exact count of a queryset, cached per distinct query (i.e. per filter
+    set) until the model's cache generation is bumped by a write.
+    """
+    namespace = model_namespace(queryset.model)
+    try:
+        sql, params = queryset.query.sql_with_params()
+    except EmptyResultSet:
+        return 0
+    key = make_key('pagination-count', namespace, get_generation(namespace), sql, params)
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, timeout)
+    return count
+
+
+def estimated_count(queryset):
+    """
+    Row estimate from the PostgreSQL planner: pg_class.reltuples for an
+    unfiltered queryset, the EXPLAIN row estimate otherwise. Returns None
+    when no estimate is available (other databases, never-analyzed tables).
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    queryset = queryset.order_by()
+    with connection.cursor() as cursor:
+        if not queryset.query.where and not queryset.query.distinct:
+            cursor.execute(
+                'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass',
+                [queryset.model._meta.db_table]
+            )
+            estimate = cursor.fetchone()[0]
+        else:
+            try:
+                sql, params = queryset.query.sql_with_params()
+            except EmptyResultSet:
+                return 0
+            cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            estimate = plan[0]['Plan']['Plan Rows']
+    return estimate if estimate >= 0 else None
+
+
+class CountStrategyPaginator(Paginator):
+    """
+    Django paginator whose count comes from a configurable strategy
+    instead of always running COUNT(*).
+    """
+    def __init__(self, object_list, per_page, count_strategy='exact', **kwargs):
+        self.count_strategy = count_strategy
+        self.count_is_estimate = False
+        super().__init__(object_list, per_page, **kwargs)
+    
+    @cached_property
+    def count(self):
+        if self.count_strategy == 'estimated':
+            estimate = estimated_count(self.object_list)
+            # Small results are cheap to count exactly
+            if estimate is not None and estimate >= settings.PAGINATION_ESTIMATE_THRESHOLD:
+                self.count_is_estimate = True
+                return estimate
+        if self.count_strategy in ('cached', 'estimated'):
+            return cached_count(self.object_list, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return super().count
+    
+    def validate_number(self, number):
+        try:
+            return super().validate_number(number)
+        except EmptyPage:
+            # An estimate may undercount, so allow pages past its end
+            if self.count_is_estimate and int(number) > 1:
+                return int(number)
+            raise
+
+
+class CountlessPage:
+    """
+    A page of results fetched without counting the object list.
+    Knows whether a next page exists from one extra fetched row.
+    """
+    def __init__(self, object_list, number, has_next):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+    
+    def __len__(self):
+        return len(self.object_list)
+    
+    def __iter__(self):
+        return iter(self.object_list)
+    
+    def has_next(self):
+        return self._has_next
+    
+    def has_previous(self):
+        return self.number > 1
+    
+    def next_page_number(self):
+        return self.number + 1
+    
+    def previous_page_number(self):
+        return self.number - 1
+
 
 class StandardResultsSetPagination(PageNumberPagination):
     """
@@ -10,22 +137,321 @@ class StandardResultsSetPagination(PageNumberPagination):
     - Max page size of 100
     - Client can control page size with 'page_size' query parameter
     - Returns next/previous links and count information
+    - Count strategy set by settings.PAGINATION_COUNT_STRATEGY, or per view
+      with a `pagination_count_strategy` attribute:
+      'exact', 'cached', 'estimated' or 'none' (no count or total_pages)
     """
     page_size = 10
     page_size_query_param = 'page_size'
     max_page_size = 100
+    count_strategies = ('exact', 'cached', 'estimated', 'none')
+    
+    def get_count_strategy(self, view):
+        strategy = getattr(view, 'pagination_count_strategy', None) or settings.PAGINATION_COUNT_STRATEGY
+        if strategy not in self.count_strategies:
+            raise ImproperlyConfigured(
+                f"Unknown pagination count strategy '{strategy}', "
+                f"expected one of {', '.join(self.count_strategies)}."
+            )
+        return strategy
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.count_strategy = self.get_count_strategy(view)
+        if self.count_strategy == 'none':
+            return self.paginate_queryset_without_count(queryset, request)
+        self.django_paginator_class = partial(CountStrategyPaginator, count_strategy=self.count_strategy)
+        return super().paginate_queryset(queryset, request, view)
+    
+    def paginate_queryset_without_count(self, queryset, request):
+        """
+        Fetch page_size + 1 rows at the page's offset; the extra row only
+        tells whether a next page exists.
+        """
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        
+        page_number = request.query_params.get(self.page_query_param) or 1
+        try:
+            number = int(page_number)
+            if number < 1:
+                raise ValueError('That page number is less than 1')
+        except ValueError as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        
+        offset = (number - 1) * page_size
+        rows = list(queryset[offset:offset + page_size + 1])
+        if not rows and number > 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=page_number, message='That page contains no results'
+            ))
+        
+        self.request = request
+        self.page = CountlessPage(rows[:page_size], number, has_next=len(rows) > page_size)
+        return list(self.page)
     
     def get_paginated_response(self, data):
         """
         Enhanced pagination response with extra metadata.
         """
-        return Response({
-            'total_pages': self.page.paginator.num_pages,
-            'count': self.page.paginator.count,
+        response = {}
+        if self.count_strategy != 'none':
+            response['total_pages'] = self.page.paginator.num_pages
+            response['count'] = self.page.paginator.count
+            if self.page.paginator.count_is_estimate:
+                response['count_is_estimate'] = True
+        response.update({
             'next': self.get_next_link(),
             'previous': self.get_previous_link(),
             'current_page': self.page.number,
             'has_next': self.page.has_next(),
             'has_previous': self.page.has_previous(),
             'results': data
-        })
\ No newline at end of file
+        })
+        return Response(response)
+
+
+def keyset_cursor_url(url, ordering, position, reverse=False, cursor_query_param='cursor'):
+    """
+    Link to the KeysetPagination page after (or, reversed, before) the row
+    at `position` in `ordering`, e.g. to continue a list that was partially
+    inlined in another response.
+    """
+    tokens = {'o': list(ordering), 'p': position}
+    if reverse:
+        tokens['r'] = 1
+    encoded = urlsafe_b64encode(json.dumps(tokens).encode('ascii')).decode('ascii')
+    return replace_query_param(url, cursor_query_param, encoded)
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Keyset (seek) pagination over the queryset's own ordering.
+    
+    Features:
+    - Opaque next/previous cursors encoding the boundary row's sort key
+    - Pages are fetched with a WHERE on the sort key instead of OFFSET and
+      without a COUNT(*), so every page costs the same at any depth
+    - Follows whatever ordering the filter backends applied (e.g. ?ordering=),
+      with the primary key appended as a unique tie-breaker
+    - Client can control page size with 'page_size' query parameter
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    # Opt-in query parameter: ?pagination=cursor
+    pagination_query_param = 'pagination'
+    pagination_query_value = 'cursor'
+    
+    @classmethod
+    def is_requested(cls, request):
+        """Return True if the client opted in to cursor pagination."""
+        params = request.query_params
+        return (params.get(cls.pagination_query_param) == cls.pagination_query_value
+                or cls.cursor_query_param in params)
+    
+    def get_ordering(self, request, queryset, view):
+        """
+        Use the ordering already applied to the queryset and make it total
+        by appending the primary key.
+        """
+        ordering = tuple(queryset.query.order_by or queryset.model._meta.ordering)
+        if not all(isinstance(field, str) for field in ordering):
+            ordering = tuple(super().get_ordering(request, queryset, view))
+        if not any(field.lstrip('-') in ('id', 'pk') for field in ordering):
+            ordering += ('id',)
+        return ordering
+    
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor.reverse if self.cursor else False
+        position = self.cursor.position if self.cursor else None
+        
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(position, reverse))
+        
+        # Fetch one extra row to learn whether another page follows
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+        
+        self.has_next = bool(self.page) and (position is not None if reverse else has_more)
+        self.has_previous = bool(self.page) and (has_more if reverse else position is not None)
+        if self.page:
+            self.previous_position = self._get_position_from_instance(self.page[0], self.ordering)
+            self.next_position = self._get_position_from_instance(self.page[-1], self.ordering)
+        
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        
+        return self.page
+    
+    def _seek_filter(self, position, reverse):
+        """
+        Build the condition selecting rows strictly after `position` in the
+        (optionally reversed) ordering, e.g. for (-publication_date, id):
+        publication_date <= p0 AND (publication_date < p0 OR
+        (publication_date = p0 AND id > p1))
+        
+        The redundant bound on the first field gives the index a range to
+        start from, so the database seeks to the position instead of
+        walking the index from its head.
+        """
+        clauses = []
+        equal = {}
+        bound = Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            descending = field.startswith('-') != reverse
+            lookup = 'lt' if descending else 'gt'
+            if not clauses and value is not None:
+                bound = Q(**{f'{name}__{lookup}e': value})
+            clauses.append(Q(**equal, **{f'{name}__{lookup}': value}))
+            equal[name] = value
+        return bound & reduce(operator.or_, clauses)
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=self.next_position))
+    
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=self.previous_position))
+    
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            position = tokens['p']
+            reverse = bool(tokens.get('r', False))
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        
+        # A cursor is only valid for the ordering it was issued for
+        if tokens.get('o') != list(self.ordering) or len(position) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return Cursor(offset=0, reverse=reverse, position=position)
+    
+    def encode_cursor(self, cursor):
+        return keyset_cursor_url(
+            self.base_url, self.ordering, cursor.position, cursor.reverse, self.cursor_query_param
+        )
+    
+    def _get_position_from_instance(self, instance, ordering):
+        position = []
+        for field in ordering:
+            value = instance
+            for attr in field.lstrip('-').split('__'):
+                value = value[attr] if isinstance(value, dict) else getattr(value, attr)
+            position.append(value if value is None or isinstance(value, (int, float)) else str(value))
+        return position
+
+
+class MergedKeysetPagination(KeysetPagination):
+    """
+    Keyset pagination of one stream merged from several querysets, e.g. an
+    author's articles and comments, newest first.
+    
+    Each source is a queryset with its own total ordering; the first field
+    of every ordering is the merge key, in the same direction for all.
+    A page seeks page_size + 1 rows in each source from where that source
+    stopped, k-way merges them and keeps the first page_size. The cursor
+    records every source's own position, so any page costs one indexed
+    query per source, however deep. Only next links are provided.
+    """
+    
+    def paginate_querysets(self, sources, request):
+        """
+        Return the page as (source name, instance) pairs, from `sources`,
+        a dict of source name -> (queryset, ordering).
+        """
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.orderings = {name: list(ordering) for name, (_, ordering) in sources.items()}
+        descending = {ordering[0].startswith('-') for ordering in self.orderings.values()}
+        if len(descending) != 1:
+            raise ImproperlyConfigured('Merged sources must all be ordered in the same direction.')
+        positions = self.decode_positions(request)
+        
+        streams = []
+        for name, (queryset, ordering) in sources.items():
+            self.ordering = tuple(ordering)
+            queryset = queryset.order_by(*ordering)
+            if positions[name] is not None:
+                queryset = queryset.filter(self._seek_filter(positions[name], reverse=False))
+            merge_field = ordering[0].lstrip('-')
+            streams.append([
+                (getattr(instance, merge_field), name, instance)
+                for instance in queryset[:self.page_size + 1]
+            ])
+        merged = list(heapq.merge(*streams, key=operator.itemgetter(0), reverse=descending.pop()))
+        
+        self.page = [(name, instance) for _, name, instance in merged[:self.page_size]]
+        self.has_next = len(merged) > self.page_size
+        for name, instance in self.page:
+            positions[name] = self._get_position_from_instance(instance, self.orderings[name])
+        self.next_positions = positions
+        return self.page
+    
+    def decode_positions(self, request):
+        """Each source's position from the cursor, None for a first page."""
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return dict.fromkeys(self.orderings)
+        try:
+            tokens = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            positions = tokens['p']
+            valid = tokens['o'] == self.orderings and positions.keys() == self.orderings.keys()
+        except (TypeError, ValueError, KeyError, AttributeError):
+            raise NotFound(self.invalid_cursor_message)
+        # A cursor is only valid for the sources and orderings it was issued for
+        if not valid or any(
+            position is not None and len(position) != len(self.orderings[name])
+            for name, position in positions.items()
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return positions
+    
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        tokens = {'o': self.orderings, 'p': self.next_positions}
+        encoded = urlsafe_b64encode(json.dumps(tokens).encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+    
+    def get_previous_link(self):
+        return None
+
+
+class KeysetPaginationMixin:
+    """
+    Viewset mixin making keyset pagination available on request.
+    
+    Clients opt in with ?pagination=cursor and then follow the returned
+    next/previous links; requests without it keep the viewset's regular
+    pagination class.
+    """
+    keyset_pagination_class = KeysetPagination
+    
+    @property
+    def paginator(self):
+        if not hasattr(self, '_paginator') and self.keyset_pagination_class.is_requested(self.request):
+            self._paginator = self.keyset_pagination_class()
+        return super().paginator
\ No newline at end of file
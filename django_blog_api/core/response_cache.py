@@ -0,0 +1,114 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from .cache import get_generation, make_key
+
+STATS_KEY_PREFIX = 'response-cache-stats'
+
+
+def _stats_key(name, outcome):
+    return f'{STATS_KEY_PREFIX}:{name}:{outcome}'
+
+
+def _incr(key):
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def record_cache_outcome(name, hit):
+    """Count a hit or a miss of the named response cache."""
+    _incr(_stats_key(name, 'hits' if hit else 'misses'))
+
+
+def get_cache_stats(names):
+    """Return {name: {'hits': n, 'misses': n}} for the given response caches."""
+    keys = [_stats_key(name, outcome) for name in names for outcome in ('hits', 'misses')]
+    values = cache.get_many(keys)
+    return {
+        name: {
+            outcome: values.get(_stats_key(name, outcome), 0)
+            for outcome in ('hits', 'misses')
+        }
+        for name in names
+    }
+
+
+def normalize_query_params(query_params):
+    """
+    Canonical form of the query string: parameters and their values sorted,
+    empty values dropped, so equivalent requests share a cache entry.
+    """
+    return tuple(sorted(
+        (key, tuple(sorted(value for value in query_params.getlist(key) if value != '')))
+        for key in query_params
+        if any(value != '' for value in query_params.getlist(key))
+    ))
+
+
+class ResponseCacheMixin:
+    """
+    Viewset mixin caching anonymous list/retrieve responses.
+
+    Entries are keyed by the action, URL kwargs, normalized query params and
+    the current cache generation of every namespace in
+    `response_cache_namespaces`. Writes to those models bump the generation
+    (see core.signals), which invalidates all affected entries in O(1).
+    Each response carries an X-Cache: HIT/MISS header and outcomes are
+    counted per `response_cache_name`. Off unless
+    settings.RESPONSE_CACHE_ENABLED (by default, with a shared cache only).
+    """
+    response_cache_actions = ('list', 'retrieve')
+    response_cache_namespaces = ()
+    response_cache_name = None
+
+    def get_response_cache_name(self):
+        return self.response_cache_name or self.basename
+
+    def get_response_cache_key(self, request):
+        generations = [get_generation(namespace) for namespace in self.response_cache_namespaces]
+        return make_key(
+            'response',
+            self.get_response_cache_name(),
+            self.action,
+            sorted(self.kwargs.items()),
+            normalize_query_params(request.query_params),
+            generations,
+        )
+
+    def should_cache_response(self, request):
+        return (
+            settings.RESPONSE_CACHE_ENABLED
+            and self.action in self.response_cache_actions
+            and request.method == 'GET'
+            and not request.user.is_authenticated
+        )
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(super().retrieve, request, *args, **kwargs)
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        """Serve the handler's response from the cache, filling it on a miss."""
+        if not self.should_cache_response(request):
+            return handler(request, *args, **kwargs)
+
+        name = self.get_response_cache_name()
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key)
+        if cached is not None:
+            record_cache_outcome(name, hit=True)
+            response = Response(cached)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, settings.RESPONSE_CACHE_TIMEOUT)
+        record_cache_outcome(name, hit=False)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,36 @@
+from django.apps import apps
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from .cache import invalidate_namespace, model_namespace
+
+# Models whose cached data (pagination counts, API responses) is invalidated on write
+CACHE_TRACKED_MODELS = {'articles.article', 'comments.comment', 'auth.user'}
+
+def invalidate_model_cache(sender, **kwargs):
+    """Bump the cache generation of a tracked model when a row changes"""
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        # Logging in changes nothing that is rendered
+        return
+    invalidate_namespace(model_namespace(sender))
+
+def invalidate_model_cache_on_relations(sender, instance, action, model, **kwargs):
+    """Bump the cache generation of a tracked model when its relations (e.g. tags) change"""
+    if action.startswith('post_'):
+        # Either side may be the tracked one (article.tags.add(), group.user_set.add())
+        for namespace in {model_namespace(type(instance)), model_namespace(model)} & CACHE_TRACKED_MODELS:
+            invalidate_namespace(namespace)
+
+def connect_cache_invalidation():
+    """
+    Connect the receivers to the tracked models (and their proxies) and to
+    their many-to-many through models only: a delete receiver listening to
+    every sender keeps Django from fast-deleting the rows of any model.
+    """
+    for model in apps.get_models():
+        if model_namespace(model) not in CACHE_TRACKED_MODELS:
+            continue
+        post_save.connect(invalidate_model_cache, sender=model)
+        post_delete.connect(invalidate_model_cache, sender=model)
+        for field in model._meta.many_to_many:
+            m2m_changed.connect(invalidate_model_cache_on_relations, sender=field.remote_field.through)
+
+connect_cache_invalidation()
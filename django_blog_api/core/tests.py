@@ -1,3 +1,370 @@
-from django.test import TestCase
+import json
+import logging
+import os
+import tempfile
+from unittest import mock
+from django.conf import settings
+from django.test import TestCase, override_settings
+from django.core.cache import cache
+from django.urls import reverse, resolve
+from django.db import connection
+from django.db.models.deletion import Collector
+from django.test.utils import CaptureQueriesContext
+from django.contrib.auth.models import User, Group
+from django.contrib.contenttypes.models import ContentType
+from rest_framework.test import APIClient
+from rest_framework import status
+from taggit.models import Tag, TaggedItem
+from articles.models import Article
+from comments.models import Comment
+from comments.paths import backfill_paths
+from users.models import Profile, RevokedToken
+from core.background import delete_in_batches
+from core.models import ThrottleBucket
+from core.throttling import CacheBucketStore, DatabaseBucketStore
+from core.logs import QueueFileHandler, error_sampler
 
-# Create your tests here.
+# Every endpoint is exercised at each of these page sizes; its budget must
+# hold for all of them, i.e. the query count may not grow with the page.
+PAGE_SIZES = (10, 100, 1000)
+
+# Maximum number of queries each endpoint may issue for a single request.
+QUERY_BUDGETS = {
+    'article-list': 4,      # ETag fingerprint, count, page (author joined), tags
+    'article-detail': 3,    # ETag fingerprint, article (author joined), tags
+    'article-comments': 5,  # ETag fingerprint, article exists, count, roots, all replies
+    'comment-detail': 4,    # ETag fingerprint (comment, thread), comment, all replies
+    'user-list': 2,         # group check, keyset page (profile joined)
+    'user-detail': 3,       # group check (view and object), user (profile joined)
+    'user-activity': 3,     # user exists, articles page, comments page (article joined)
+}
+
+
+class QueryBudgetTests(TestCase):
+    """
+    Fails whenever an API endpoint exceeds its declared query budget.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        size = max(PAGE_SIZES)
+        cls.admin_user = User.objects.create_user(
+            username='budget_admin',
+            email='budget_admin@test.com',
+            password='adminpass123'
+        )
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        cls.admin_user.groups.add(admin_group)
+
+        users = User.objects.bulk_create(
+            User(username=f'budget_user_{i}', email=f'budget_user_{i}@test.com')
+            for i in range(size)
+        )
+        Profile.objects.bulk_create(Profile(user=user) for user in users)
+
+        articles = Article.objects.bulk_create(
+            Article(
+                title=f'Budget Article {i}',
+                content='Query budget article content',
+                author=users[i],
+                status='published'
+            )
+            for i in range(size)
+        )
+        tags = [Tag.objects.create(name='budget', slug='budget'),
+                Tag.objects.create(name='perf', slug='perf')]
+        content_type = ContentType.objects.get_for_model(Article)
+        TaggedItem.objects.bulk_create(
+            TaggedItem(content_type=content_type, object_id=article.id, tag=tag)
+            for article in articles for tag in tags
+        )
+
+        cls.article = articles[0]
+        roots = Comment.objects.bulk_create(
+            Comment(article=cls.article, author=users[i], content='Root comment')
+            for i in range(size)
+        )
+        Comment.objects.bulk_create(
+            Comment(article=cls.article, author=users[i], content='Reply comment',
+                    reply_to=root)
+            for i, root in enumerate(roots)
+        )
+        backfill_paths(Comment)
+        # A deep thread must not cost more queries than a shallow one
+        parent = roots[0]
+        for i in range(8):
+            parent = Comment.objects.create(
+                article=cls.article, author=users[i], content='Nested reply', reply_to=parent
+            )
+        cls.comment = roots[0]
+        cls.author = users[0]
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def endpoints(self):
+        """Yield (budget name, url, user) for every budgeted endpoint."""
+        yield 'article-list', reverse('article-list'), None
+        yield 'article-detail', reverse('article-detail', kwargs={'pk': self.article.id}), None
+        yield ('article-comments',
+               reverse('article-comments', kwargs={'article_id': self.article.id}), None)
+        yield 'comment-detail', reverse('comment-detail', kwargs={'pk': self.comment.id}), None
+        yield 'user-list', reverse('user-list'), self.admin_user
+        yield 'user-detail', reverse('user-detail', kwargs={'pk': self.admin_user.id}), self.admin_user
+        yield 'user-activity', reverse('user-activity', kwargs={'pk': self.author.id}), None
+
+    def test_endpoints_within_query_budget(self):
+        """Test every endpoint stays within its query budget at every page size"""
+        for name, url, user in self.endpoints():
+            pagination_class = resolve(url).func.cls.pagination_class
+            for page_size in PAGE_SIZES:
+                with self.subTest(endpoint=name, page_size=page_size):
+                    self.client.force_authenticate(user=user)
+                    # Measure the uncached path
+                    cache.clear()
+                    with mock.patch.object(pagination_class, 'page_size', page_size), \
+                            CaptureQueriesContext(connection) as queries:
+                        response = self.client.get(url)
+                    self.assertEqual(response.status_code, status.HTTP_200_OK)
+                    self.assertLessEqual(
+                        len(queries), QUERY_BUDGETS[name],
+                        f'{name} issued {len(queries)} queries at page size {page_size}:\n'
+                        + '\n'.join(query['sql'] for query in queries.captured_queries)
+                    )
+
+
+class PaginationCountStrategyTests(TestCase):
+    """
+    Tests for the count strategies of StandardResultsSetPagination.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='count_author',
+            email='count_author@test.com',
+            password='authorpass123'
+        )
+        for i in range(3):
+            Article.objects.create(
+                title=f'Count Article {i}',
+                content='Count strategy article content',
+                author=self.author
+            )
+        self.client = APIClient()
+        self.url = reverse('article-list')
+
+    def count_queries(self, queries):
+        return [query for query in queries.captured_queries if '"__count"' in query['sql']]
+
+    @override_settings(PAGINATION_COUNT_STRATEGY='cached')
+    def test_cached_count_skips_count_query_until_write(self):
+        """Test cached counts are reused until an article is written"""
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(self.count_queries(queries), [])
+
+        Article.objects.create(
+            title='Count Article 3',
+            content='Count strategy article content',
+            author=self.author
+        )
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 4)
+
+    @override_settings(PAGINATION_COUNT_STRATEGY='cached')
+    def test_cached_count_is_per_filter_set(self):
+        """Test cached counts are keyed by the active filters"""
+        Article.objects.filter(title='Count Article 0').update(status='published')
+        self.assertEqual(self.client.get(self.url).data['count'], 3)
+        self.assertEqual(self.client.get(f'{self.url}?status=published').data['count'], 1)
+
+    @override_settings(PAGINATION_COUNT_STRATEGY='estimated')
+    def test_estimated_count_falls_back_to_exact_count(self):
+        """Test the estimated strategy reports an exact count without a planner estimate"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.data['count'], 3)
+        self.assertNotIn('count_is_estimate', response.data)
+
+    @override_settings(PAGINATION_COUNT_STRATEGY='none')
+    def test_countless_pagination(self):
+        """Test the count-free strategy only reports has_next"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'{self.url}?page_size=2')
+        self.assertEqual(self.count_queries(queries), [])
+        self.assertNotIn('count', response.data)
+        self.assertNotIn('total_pages', response.data)
+        self.assertTrue(response.data['has_next'])
+        self.assertEqual(len(response.data['results']), 2)
+
+        response = self.client.get(response.data['next'])
+        self.assertFalse(response.data['has_next'])
+        self.assertTrue(response.data['has_previous'])
+        self.assertEqual(len(response.data['results']), 1)
+
+        response = self.client.get(f'{self.url}?page_size=2&page=3')
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class CacheStatsTests(TestCase):
+    """
+    Tests for the response cache hit/miss counters.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.admin_user = User.objects.create_user(
+            username='stats_admin',
+            email='stats_admin@test.com',
+            password='adminpass123'
+        )
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        self.admin_user.groups.add(admin_group)
+
+    @override_settings(RESPONSE_CACHE_ENABLED=True)
+    def test_cache_stats_count_hits_and_misses(self):
+        """Test the cache stats endpoint reports article response cache outcomes"""
+        self.client.get(reverse('article-list'))
+        self.client.get(reverse('article-list'))
+        self.client.force_authenticate(user=self.admin_user)
+        response = self.client.get(reverse('cache-stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['response_cache']['article'], {'hits': 1, 'misses': 1})
+
+    def test_response_cache_is_off_by_default_with_a_local_cache(self):
+        """Test a process-local cache does not serve cached responses"""
+        self.client.get(reverse('article-list'))
+        self.assertNotIn('X-Cache', self.client.get(reverse('article-list')))
+
+    def test_untracked_models_are_fast_deleted(self):
+        """Test cache invalidation receivers leave other models fast-deletable"""
+        collector = Collector(using='default')
+        self.assertTrue(collector.can_fast_delete(ThrottleBucket.objects.all()))
+        self.assertTrue(collector.can_fast_delete(RevokedToken.objects.all()))
+        self.assertFalse(collector.can_fast_delete(Comment.objects.all()))
+
+    def test_batched_deletes_invalidate_once_per_batch(self):
+        """Test delete_in_batches bumps a namespace once per batch, not once per row"""
+        article = Article.objects.create(title='Batched', content='Batched content', author=self.admin_user)
+        Comment.objects.bulk_create([
+            Comment(article=article, author=self.admin_user, content=f'Comment {i}') for i in range(6)
+        ])
+        with mock.patch('core.cache.bump_generation') as bump_generation:
+            self.assertEqual(delete_in_batches(Comment.objects.order_by('pk'), batch_size=3), 6)
+        self.assertEqual(bump_generation.call_args_list, [mock.call('comments.comment')] * 2)
+
+
+class ThrottleTests(TestCase):
+    """
+    Tests for the token-bucket throttles and their stores.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_buckets_refill_over_time(self):
+        """Test both stores spend a bucket's burst, then refill one token per 1/rate seconds"""
+        for store in (DatabaseBucketStore(), CacheBucketStore()):
+            with self.subTest(store=type(store).__name__):
+                key = f'test:{type(store).__name__}'
+                self.assertEqual(store.consume(key, 2, 1.0, now=1000.0), (True, 0))
+                self.assertEqual(store.consume(key, 2, 1.0, now=1000.0), (True, 0))
+                self.assertEqual(store.consume(key, 2, 1.0, now=1000.0), (False, 1.0))
+                self.assertEqual(store.consume(key, 2, 1.0, now=1000.5), (False, 0.5))
+                self.assertEqual(store.consume(key, 2, 1.0, now=1001.0), (True, 0))
+                # Never refills past its capacity
+                self.assertEqual(store.consume(key, 2, 1.0, now=2000.0), (True, 0))
+                self.assertEqual(store.consume(key, 2, 1.0, now=2000.0), (True, 0))
+                self.assertFalse(store.consume(key, 2, 1.0, now=2000.0)[0])
+
+    def test_cache_store_denies_while_the_bucket_is_locked(self):
+        """Test a bucket whose lock cannot be taken is denied rather than let through"""
+        store = CacheBucketStore()
+        cache.add('test:locked:lock', 1, store.lock_timeout)
+        self.assertEqual(store.consume('test:locked', 2, 1.0), (False, store.lock_timeout))
+        cache.delete('test:locked:lock')
+        self.assertEqual(store.consume('test:locked', 2, 1.0), (True, 0))
+
+    def test_comment_creation_is_throttled_per_user(self):
+        """Test comment creation is rejected with 429 once the user's budget is spent"""
+        user = User.objects.create_user(username='throttled', password='throttledpass123')
+        users_group, _ = Group.objects.get_or_create(name='users')
+        user.groups.add(users_group)
+        article = Article.objects.create(
+            title='Throttled Article', content='Throttled article content', author=user
+        )
+        url = reverse('article-comments', kwargs={'article_id': article.id})
+        rest_framework = {
+            **settings.REST_FRAMEWORK,
+            'DEFAULT_THROTTLE_RATES': {'comment_create': '2/min'},
+        }
+        self.client.force_authenticate(user=user)
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            for _ in range(2):
+                response = self.client.post(url, {'content': 'A comment'}, format='json')
+                self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            response = self.client.post(url, {'content': 'A comment'}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+            self.assertIn('Retry-After', response)
+            # Reading is not throttled
+            self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+
+class ErrorLoggingTests(TestCase):
+    """
+    Tests for the structured, sampled logging of API errors.
+    """
+
+    def setUp(self):
+        error_sampler.reset()
+
+    def test_client_errors_are_counted_and_logged_without_traceback(self):
+        """Test a 404 gets the standard error body, a counter and a traceback-free record"""
+        with self.assertLogs('core.utils', level='WARNING') as logs:
+            response = self.client.get(reverse('article-detail', kwargs={'pk': 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertEqual(response.data['error_code'], 'not_found')
+        self.assertFalse(response.data['success'])
+        record, = logs.records
+        self.assertIsNone(record.exc_info)
+        self.assertEqual(record.fields['status'], 404)
+        self.assertEqual(record.fields['path'], reverse('article-detail', kwargs={'pk': 0}))
+        self.assertEqual(error_sampler.counts(), {'not_found': 1})
+
+    @override_settings(ERROR_LOG_SAMPLE_BURST=2, ERROR_LOG_SAMPLE_RATE=5)
+    def test_repeated_errors_are_sampled(self):
+        """Test only the first errors of a code and then one in ERROR_LOG_SAMPLE_RATE are logged"""
+        decisions = [error_sampler.record('error_400') for _ in range(12)]
+        logged = [i + 1 for i, (sampled, _) in enumerate(decisions) if sampled]
+        self.assertEqual(logged, [1, 2, 7, 12])
+        self.assertEqual(decisions[6], (True, 4))
+        self.assertEqual(error_sampler.record('not_found'), (True, 0))
+        self.assertEqual(error_sampler.counts(), {'error_400': 12, 'not_found': 1})
+
+    def test_queue_handler_writes_json_lines_in_the_background(self):
+        """Test records are written as JSON lines by the handler's writer thread"""
+        directory = tempfile.mkdtemp()
+        filename = os.path.join(directory, 'errors.log')
+        handler = QueueFileHandler(filename=filename)
+        logger = logging.getLogger('core.tests.errors')
+        logger.addHandler(handler)
+        try:
+            logger.warning('API error: %s', 'Not found.', extra={'fields': {'status': 404}})
+            try:
+                raise ValueError('boom')
+            except ValueError as error:
+                logger.error('Unhandled exception: %s', error, exc_info=error)
+        finally:
+            logger.removeHandler(handler)
+            handler.close()
+        with open(filename) as log_file:
+            warning, error = [json.loads(line) for line in log_file]
+        os.remove(filename)
+        os.rmdir(directory)
+        self.assertEqual((warning['message'], warning['status']), ('API error: Not found.', 404))
+        self.assertNotIn('traceback', warning)
+        self.assertIn('ValueError: boom', error['traceback'])
@@ -0,0 +1,156 @@
+import math
+import time
+from functools import lru_cache
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils.module_loading import import_string
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from .models import ThrottleBucket
+
+# Seconds per period of a 'number/period' rate, as in DRF's throttles
+RATE_PERIODS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400}
+
+
+def parse_rate(rate):
+    """
+    Turn a 'number/period' rate (e.g. '10/min') into the bucket's capacity
+    and its refill rate in tokens per second: a bucket holds `number` tokens
+    and refills completely over one period.
+    """
+    number, period = rate.split('/')
+    capacity = int(number)
+    return capacity, capacity / RATE_PERIODS[period[0]]
+
+
+class DatabaseBucketStore:
+    """
+    Token buckets stored as rows of ThrottleBucket.
+
+    Refilling and taking a token is a single conditional UPDATE, so it is
+    atomic across all processes sharing the database. A request costs one
+    query, plus an INSERT the first time a client is seen (or after
+    clear_expired() dropped its full bucket).
+    """
+
+    def consume(self, key, capacity, rate, now=None):
+        """
+        Take one token from the bucket, refilling it first. Return
+        (allowed, wait): whether a token was available and, if not, the
+        seconds until one will be.
+        """
+        now = time.time() if now is None else now
+        if self._take(key, capacity, rate, now):
+            return True, 0
+        # get_or_create() falls back to a get if another process inserts first
+        bucket, created = ThrottleBucket.objects.get_or_create(
+            key=key, defaults={'tokens': capacity - 1, 'updated': now}
+        )
+        if created:
+            return True, 0
+        if self._take(key, capacity, rate, now):
+            return True, 0
+        available = min(capacity, bucket.tokens + (now - bucket.updated) * rate)
+        return False, max(0, (1 - available) / rate)
+
+    def _take(self, key, capacity, rate, now):
+        refilled = Least(Value(float(capacity)), F('tokens') + (Value(now) - F('updated')) * Value(rate))
+        return ThrottleBucket.objects.filter(key=key).alias(available=refilled).filter(
+            available__gte=1
+        ).update(tokens=refilled - 1, updated=now) == 1
+
+    def clear_expired(self, max_refill_time, now=None):
+        """Delete buckets untouched for `max_refill_time` seconds: they are full again."""
+        now = time.time() if now is None else now
+        return ThrottleBucket.objects.filter(updated__lt=now - max_refill_time).delete()[0]
+
+
+class CacheBucketStore:
+    """
+    Token buckets stored in the default cache, for a cache server shared
+    by all workers (memcached, Redis).
+
+    Django's cache API has no compare-and-set, so the read-refill-write of
+    a bucket runs under a short per-bucket lock taken with cache.add();
+    requests that cannot take it are denied. Buckets expire from the cache
+    once they would be full again.
+    """
+    lock_attempts = 10
+    lock_timeout = 1
+
+    def consume(self, key, capacity, rate, now=None):
+        """Same contract as DatabaseBucketStore.consume()."""
+        lock_key = f'{key}:lock'
+        for _ in range(self.lock_attempts):
+            if cache.add(lock_key, 1, self.lock_timeout):
+                break
+            time.sleep(0.001)
+        else:
+            # Never block a request on a contended (or crashed) lock holder,
+            # nor let it bypass the budget: deny until the lock expires
+            return False, self.lock_timeout
+        try:
+            now = time.time() if now is None else now
+            tokens, updated = cache.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            cache.set(key, (tokens, now), timeout=math.ceil((capacity - tokens) / rate) or 1)
+            return allowed, 0 if allowed else (1 - tokens) / rate
+        finally:
+            cache.delete(lock_key)
+
+
+@lru_cache(maxsize=None)
+def get_bucket_store(path=None):
+    """Return the bucket store configured by settings.THROTTLE_STORE (one instance per path)."""
+    return import_string(path or settings.THROTTLE_STORE)()
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token-bucket throttle with a separate budget per scope.
+
+    The scope comes from the view's get_throttle_scope(request) if it has
+    one (e.g. only searches or only comment creation), otherwise from the
+    `scope` attribute; requests without a scope are not throttled and cost
+    nothing. Budgets are the 'number/period' rates of
+    REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], counted per user, or per IP
+    address for anonymous requests, in the shared store of
+    settings.THROTTLE_STORE.
+    """
+    scope = None
+
+    def get_scope(self, request, view):
+        get_throttle_scope = getattr(view, 'get_throttle_scope', None)
+        if get_throttle_scope is not None:
+            return get_throttle_scope(request)
+        return self.scope
+
+    def get_client(self, request):
+        if request.user and request.user.is_authenticated:
+            return f'user:{request.user.pk}'
+        return f'ip:{self.get_ident(request)}'
+
+    def allow_request(self, request, view):
+        self.wait_time = None
+        scope = self.get_scope(request, view)
+        if scope is None:
+            return True
+        try:
+            rate = api_settings.DEFAULT_THROTTLE_RATES[scope]
+        except KeyError:
+            raise ImproperlyConfigured(f"No throttle rate set for the '{scope}' scope.")
+        if rate is None:
+            return True
+        capacity, refill_rate = parse_rate(rate)
+        key = f'throttle:{scope}:{self.get_client(request)}'
+        allowed, self.wait_time = get_bucket_store().consume(key, capacity, refill_rate)
+        return allowed
+
+    def wait(self):
+        return self.wait_time
@@ -1,12 +1,13 @@
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import APIException, NotFound, ValidationError, PermissionDenied
-from rest_framework.views import exception_handler
+from rest_framework.views import exception_handler, set_rollback
+from django.core.exceptions import PermissionDenied as DjangoPermissionDenied
+from django.http import Http404
+from .logs import error_sampler
 import logging
-import traceback
-import json
 
-# Set up logging
+# API errors are logged as structured records (see LOGGING in settings)
 logger = logging.getLogger(__name__)
 
 def error_response(message, status_code=status.HTTP_400_BAD_REQUEST, errors=None, error_code=None):
@@ -64,85 +65,86 @@ def custom_exception_handler(exc, context):
     Custom exception handler for standardized error responses.
     
     This handler takes the standard DRF exception handler response and
-    reformats it to match our standardized error response format.
+    reformats it to match our standardized error response format, keeping
+    its headers (e.g. Retry-After, WWW-Authenticate).
+    
+    Every error is counted per error_code. Client errors (4xx) are expected,
+    so they are logged without a traceback and, when they repeat, only
+    sampled (see core.logs.ErrorSampler); server errors are always logged
+    with their traceback. Records are written by a background thread.
     """
     # Call DRF's default exception handler first
     response = exception_handler(exc, context)
     
-    # Get request details for logging
-    request = context.get("request", None)
-    method = getattr(request, "method", "")
-    path = getattr(request, "path", "")
-    user_id = getattr(request.user, "id", "Anonymous") if request else "Unknown"
-    
-    # Log the error with trace
-    if response is not None:
-        logger.error(
-            f"API Error: {exc}, Status: {response.status_code}, "
-            f"User: {user_id}, Method: {method}, Path: {path}\n"
-            f"Traceback: {traceback.format_exc()}"
-        )
-    else:
-        logger.error(
-            f"Unhandled Exception: {exc}, "
-            f"User: {user_id}, Method: {method}, Path: {path}\n"
-            f"Traceback: {traceback.format_exc()}"
-        )
+    if response is None:
         # If it's not an API exception, it's likely a server error
-        return Response(
-            {
-                "success": False,
-                "message": "An internal server error occurred.",
-                "error_code": "server_error"
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
-    
-    # Format the response to match our error_response format
-    if isinstance(exc, ValidationError):
+        set_rollback()
+        response = Response(status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        response.data = {
+            "success": False,
+            "message": "An internal server error occurred.",
+            "error_code": "server_error"
+        }
+    elif isinstance(exc, ValidationError):
         # Validation errors have a different format
-        return Response(
-            {
-                "success": False,
-                "message": "Validation error",
-                "errors": exc.detail,
-                "error_code": "validation_error"
-            },
-            status=response.status_code
-        )
-    elif isinstance(exc, NotFound):
-        return Response(
-            {
-                "success": False,
-                "message": str(exc),
-                "error_code": "not_found"
-            },
-            status=status.HTTP_404_NOT_FOUND
-        )
-    elif isinstance(exc, PermissionDenied):
-        return Response(
-            {
-                "success": False,
-                "message": "You do not have permission to perform this action.",
-                "error_code": "permission_denied"
-            },
-            status=status.HTTP_403_FORBIDDEN
-        )
-    
-    # For other exceptions, format the response consistently
-    if hasattr(response, 'data'):
+        response.data = {
+            "success": False,
+            "message": "Validation error",
+            "errors": exc.detail,
+            "error_code": "validation_error"
+        }
+    elif isinstance(exc, (NotFound, Http404)):
+        response.data = {
+            "success": False,
+            "message": str(exc),
+            "error_code": "not_found"
+        }
+    elif isinstance(exc, (PermissionDenied, DjangoPermissionDenied)):
+        response.data = {
+            "success": False,
+            "message": "You do not have permission to perform this action.",
+            "error_code": "permission_denied"
+        }
+    else:
+        # For other exceptions, format the response consistently
         if isinstance(response.data, dict) and 'detail' in response.data:
             message = response.data['detail']
         else:
             message = str(exc)
-            
-        return Response(
-            {
-                "success": False,
-                "message": message,
-                "error_code": f"error_{response.status_code}"
-            },
-            status=response.status_code
-        )
+        response.data = {
+            "success": False,
+            "message": message,
+            "error_code": f"error_{response.status_code}"
+        }
+    
+    log_api_error(exc, context, response)
+    return response
+
+def log_api_error(exc, context, response):
+    """Count the error and, unless it is sampled out, log it as a structured record."""
+    error_code = response.data["error_code"]
+    sampled, suppressed = error_sampler.record(error_code)
+    server_error = response.status_code >= 500
+    if not (sampled or server_error):
+        return
     
-    return response
\ No newline at end of file
+    request = context.get("request")
+    view = context.get("view")
+    # Only read a user that was already authenticated: authenticating here
+    # could raise again
+    user = getattr(request, "_user", None)
+    fields = {
+        "status": response.status_code,
+        "error_code": error_code,
+        "exception": type(exc).__name__,
+        "method": getattr(request, "method", None),
+        "path": getattr(request, "path", None),
+        "view": type(view).__name__ if view is not None else None,
+        "user_id": getattr(user, "pk", None),
+    }
+    if suppressed:
+        fields["suppressed"] = suppressed
+    if server_error:
+        logger.error("Unhandled exception: %s", exc, exc_info=exc, extra={"fields": fields})
+    else:
+        logger.warning("API error: %s", exc, extra={"fields": fields})
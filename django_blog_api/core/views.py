@@ -1,3 +1,74 @@
-from django.shortcuts import render
+import mimetypes
+from pathlib import Path
+from urllib.parse import quote
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse, HttpResponseNotModified
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+from django.views.static import was_modified_since
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+from utils.permissions import IsAdminUser
+from .logs import error_sampler
+from .response_cache import get_cache_stats
 
-# Create your views here.
+# Response caches reported by cache_stats
+RESPONSE_CACHE_NAMES = ['article']
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def cache_stats(request):
+    """
+    Return hit/miss counters of the API response caches (admin only).
+    """
+    return Response({'response_cache': get_cache_stats(RESPONSE_CACHE_NAMES)})
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def error_stats(request):
+    """
+    Return the number of API errors per error_code counted by the process
+    serving the request since it started (admin only).
+    """
+    return Response({'errors': error_sampler.counts()})
+
+
+@require_safe
+def serve_media(request, path):
+    """
+    Serve an uploaded file from MEDIA_ROOT.
+    
+    Stored names are never reused (see users.avatars.profile_pic_path), so
+    responses may be cached for MEDIA_CACHE_MAX_AGE and are marked
+    immutable. With MEDIA_SENDFILE_HEADER set, the web server in front
+    sends the file (X-Accel-Redirect for nginx, X-Sendfile for Apache or
+    lighttpd) and no worker is held for the transfer; otherwise the file
+    is streamed with FileResponse, which uses the server's sendfile()
+    support where it has one (wsgi.file_wrapper).
+    """
+    try:
+        full_path = Path(safe_join(settings.MEDIA_ROOT, path))
+    except SuspiciousFileOperation:
+        raise Http404
+    if not full_path.is_file():
+        raise Http404
+    mtime = full_path.stat().st_mtime
+    if not was_modified_since(request.META.get('HTTP_IF_MODIFIED_SINCE'), mtime):
+        return HttpResponseNotModified()
+    
+    header = settings.MEDIA_SENDFILE_HEADER
+    if header:
+        content_type = mimetypes.guess_type(full_path.name)[0] or 'application/octet-stream'
+        response = HttpResponse(content_type=content_type)
+        if header.lower() == 'x-accel-redirect':
+            response[header] = settings.MEDIA_SENDFILE_PREFIX.rstrip('/') + '/' + quote(path)
+        else:
+            response[header] = str(full_path)
+    else:
+        response = FileResponse(full_path.open('rb'))
+    response['Last-Modified'] = http_date(mtime)
+    patch_cache_control(response, public=True, max_age=settings.MEDIA_CACHE_MAX_AGE, immutable=True)
+    return response
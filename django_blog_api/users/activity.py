@@ -0,0 +1,35 @@
+from django.db.models.functions import Left
+from articles.models import Article
+from articles.serializers import EXCERPT_LENGTH
+from comments.models import Comment
+
+# Order of each source of the feed, newest first, as kept by the
+# (author, -date, id) index of its table
+ARTICLE_ORDERING = ('-publication_date', 'id')
+COMMENT_ORDERING = ('-created_at', 'id')
+
+
+def activity_sources(author_id):
+    """
+    The sources of an author's activity feed for MergedKeysetPagination:
+    their published articles and their comments on published articles,
+    without deleted ones, each read from the author's range of its index
+    and only with the rendered columns.
+    """
+    articles = (
+        Article.objects
+        .filter(author_id=author_id, status='published', hidden_at__isnull=True)
+        .only('id', 'title', 'status', 'publication_date')
+        .annotate(excerpt=Left('content', EXCERPT_LENGTH))
+    )
+    comments = (
+        Comment.objects
+        .filter(author_id=author_id, hidden_at__isnull=True,
+                article__status='published', article__hidden_at__isnull=True)
+        .select_related('article')
+        .only('id', 'content', 'created_at', 'reply_to_id', 'article__id', 'article__title')
+    )
+    return {
+        'article': (articles, ARTICLE_ORDERING),
+        'comment': (comments, COMMENT_ORDERING),
+    }
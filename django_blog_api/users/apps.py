@@ -3,4 +3,8 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
-    verbose_name = 'Blog Users'
\ No newline at end of file
+    verbose_name = 'Blog Users'
+
+    def ready(self):
+        """Import signals when Django starts"""
+        import users.signals
\ No newline at end of file
@@ -0,0 +1,27 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from .models import ClaimUser
+from .revocation import is_revoked
+from .tokens import USERNAME_CLAIM
+
+
+class ClaimUserAuthentication(JWTAuthentication):
+    """
+    JWT authentication without a database hit: request.user is a ClaimUser
+    built from the token's claims (id, username; groups are read from the
+    token by the permission classes), which loads the User row only if a
+    view reads another field. Deactivated users are rejected through the
+    revocation check (see users.revocation), which reads the is_active
+    column at most every few seconds per user.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+        if is_revoked(user_id):
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return ClaimUser.from_claims(user_id, validated_token.get(USERNAME_CLAIM))
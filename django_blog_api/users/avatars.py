@@ -0,0 +1,91 @@
+import os
+import uuid
+from io import BytesIO
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+# Thumbnail formats, by file extension: WebP for clients that accept it,
+# JPEG for the others
+THUMBNAIL_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', {'quality': 85, 'optimize': True, 'progressive': True}),
+}
+
+
+def profile_pic_path(instance, filename):
+    """
+    Store every upload under a new random name, so a URL always refers to
+    the same bytes and can be cached forever.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    return f'profile_pics/{uuid.uuid4().hex}{extension}'
+
+
+def thumbnail_name(name, size, extension):
+    """Storage name of the `size` thumbnail of the picture stored as `name`."""
+    stem = os.path.splitext(os.path.basename(name))[0]
+    return f'profile_pics/thumbs/{stem}_{size}.{extension}'
+
+
+def thumbnail_names(name):
+    """Every thumbnail name of a picture, as stored in profile_pic_thumbnails."""
+    return {
+        str(size): {extension: thumbnail_name(name, size, extension) for extension in THUMBNAIL_FORMATS}
+        for size in settings.PROFILE_PIC_SIZES
+    }
+
+
+def render_thumbnails(source):
+    """
+    Yield (size, extension, bytes) for every thumbnail of the image file
+    `source`, cropped to a square.
+
+    JPEG sources are decoded at a reduced scale (draft mode) close to the
+    largest size, which is much faster and lighter than decoding the full
+    resolution and then shrinking it.
+    """
+    largest = max(settings.PROFILE_PIC_SIZES)
+    with Image.open(source) as image:
+        image.draft('RGB', (largest, largest))
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for size in sorted(settings.PROFILE_PIC_SIZES, reverse=True):
+            image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            for extension, (image_format, options) in THUMBNAIL_FORMATS.items():
+                output = BytesIO()
+                image.save(output, image_format, **options)
+                yield size, extension, output.getvalue()
+
+
+def generate_thumbnails(profile_id):
+    """
+    Write the thumbnails of a profile's picture and record them on the
+    profile. Runs in the background after an upload (see
+    ProfileSerializer.update) or from generate_profile_thumbnails.
+    """
+    from .models import Profile
+
+    profile = Profile.objects.filter(pk=profile_id).only('profile_pic').first()
+    if profile is None or not profile.profile_pic:
+        return
+    name = profile.profile_pic.name
+    with default_storage.open(name) as source:
+        for size, extension, content in render_thumbnails(source):
+            target = thumbnail_name(name, size, extension)
+            default_storage.delete(target)
+            default_storage.save(target, ContentFile(content))
+    # Unless the picture was replaced in the meantime
+    updated = Profile.objects.filter(pk=profile_id, profile_pic=name).update(
+        profile_pic_thumbnails=thumbnail_names(name)
+    )
+    if not updated:
+        delete_picture_files(name)
+
+
+def delete_picture_files(name):
+    """Remove a replaced picture and its thumbnails from storage."""
+    default_storage.delete(name)
+    for formats in thumbnail_names(name).values():
+        for thumbnail in formats.values():
+            default_storage.delete(thumbnail)
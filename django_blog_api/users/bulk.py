@@ -0,0 +1,45 @@
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from core.cache import invalidate_namespace, model_namespace
+from .groups import forget_user_groups
+
+
+def bulk_create_users(entries, batch_size=1000):
+    """
+    Create many users with a fixed number of queries per batch.
+
+    `entries` are dicts of User fields plus an optional raw `password`
+    (users without one get an unusable password) and optional `groups`
+    (group names, which must exist). Users are inserted with bulk_create
+    and their group memberships with one more bulk INSERT; no profile is
+    created (see get_profile). Bulk writes skip model signals, so the users
+    cache generation is refreshed here. Returns the users in input order.
+    """
+    users, memberships = [], []
+    for entry in entries:
+        fields = dict(entry)
+        password = fields.pop('password', None)
+        memberships.append(fields.pop('groups', ()))
+        fields['username'] = User.normalize_username(fields['username'])
+        fields['email'] = User.objects.normalize_email(fields.get('email', ''))
+        user = User(**fields)
+        user.password = make_password(password)
+        users.append(user)
+
+    names = {name for group_names in memberships for name in group_names}
+    groups = dict(Group.objects.filter(name__in=names).values_list('name', 'id')) if names else {}
+    unknown = names - groups.keys()
+    if unknown:
+        raise ValueError(f"Unknown groups: {', '.join(sorted(unknown))}")
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=batch_size)
+        User.groups.through.objects.bulk_create([
+            User.groups.through(user_id=user.pk, group_id=groups[name])
+            for user, group_names in zip(users, memberships)
+            for name in dict.fromkeys(group_names)
+        ], batch_size=batch_size)
+        invalidate_namespace(model_namespace(User))
+    forget_user_groups([user.pk for user in users])
+    return users
@@ -0,0 +1,64 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.core.cache import cache
+from core.cache import bump_generation, get_generation, make_key
+
+# JWT claim listing the names of the user's groups
+GROUPS_CLAIM = 'groups'
+
+# Cache namespace of group memberships; bumped when a group is renamed or
+# deleted, or memberships change in bulk
+GROUPS_NAMESPACE = 'auth.group'
+
+
+def _cache_key(user_id):
+    return make_key('user-groups', get_generation(GROUPS_NAMESPACE), user_id)
+
+
+def user_group_names(user_id):
+    """
+    Names of a user's groups, from the cache; the database is only queried
+    on a miss. A process-local cache would keep serving memberships changed
+    by other processes, so without a shared cache the database is always
+    queried.
+    """
+    if not settings.SHARED_CACHE:
+        return _load_group_names(user_id)
+    key = _cache_key(user_id)
+    names = cache.get(key)
+    if names is None:
+        names = _load_group_names(user_id)
+        cache.set(key, names, settings.GROUPS_CACHE_TIMEOUT)
+    return names
+
+
+def _load_group_names(user_id):
+    return frozenset(Group.objects.filter(user__id=user_id).values_list('name', flat=True))
+
+
+def request_group_names(request):
+    """
+    Names of the groups of the request's user, resolved once per request:
+    from the access token's groups claim when authenticated by JWT (no
+    lookup at all), otherwise from user_group_names().
+    """
+    names = getattr(request, '_group_names', None)
+    if names is None:
+        user = request.user
+        claim = request.auth.get(GROUPS_CLAIM) if hasattr(request.auth, 'get') else None
+        if not user or not user.is_authenticated:
+            names = frozenset()
+        elif claim is not None:
+            names = frozenset(claim)
+        else:
+            names = user_group_names(user.pk)
+        request._group_names = names
+    return names
+
+
+def forget_user_groups(user_ids=None):
+    """Drop the cached memberships of some users, or of everyone if `user_ids` is None."""
+    if user_ids is None:
+        bump_generation(GROUPS_NAMESPACE)
+    else:
+        cache.delete_many([_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,118 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+
+logger = logging.getLogger(__name__)
+
+class HashingBusy(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many logins in progress, please retry shortly.'
+    default_code = 'hashing_busy'
+
+
+@lru_cache(maxsize=None)
+def _hashing_pool():
+    """
+    The executor running password hashes, and the slots bounding the
+    hashes running or waiting for it. Created on first use so tests and
+    commands can change the settings.
+    """
+    workers = settings.PASSWORD_HASHING_WORKERS
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+    return executor, threading.BoundedSemaphore(workers + settings.PASSWORD_HASHING_QUEUE)
+
+
+def submit_hashing(func, *args):
+    """
+    Submit a password hashing function to the bounded hashing executor and
+    return its future.
+
+    At most PASSWORD_HASHING_WORKERS hashes run at once per process,
+    however many logins arrive together, so the remaining CPU keeps
+    serving other requests. Up to PASSWORD_HASHING_QUEUE more wait for a
+    worker; beyond that the request fails at once with 503 (HashingBusy)
+    instead of holding its worker thread in a queue.
+    """
+    executor, slots = _hashing_pool()
+    if not slots.acquire(blocking=False):
+        raise HashingBusy()
+    future = executor.submit(func, *args)
+    # The slot is held until the hash is done, even if the caller gave up
+    future.add_done_callback(lambda _: slots.release())
+    return future
+
+
+def run_hashing(func, *args):
+    """
+    Run a password hashing function on the bounded hashing executor (see
+    submit_hashing) and wait for its result, at most
+    PASSWORD_HASHING_TIMEOUT seconds.
+    """
+    future = submit_hashing(func, *args)
+    try:
+        return future.result(timeout=settings.PASSWORD_HASHING_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise HashingBusy()
+
+
+def hash_password(raw_password):
+    """Hash a password with the preferred hasher (the first of PASSWORD_HASHERS)."""
+    return run_hashing(make_password, raw_password)
+
+
+def verify_password(user, raw_password):
+    """
+    Check a user's password. A hash made by another hasher than the
+    preferred one, or with outdated parameters, is transparently replaced
+    by a new hash of the now known password.
+    """
+    outdated = []
+    valid = run_hashing(check_password, raw_password, user.password, outdated.append)
+    if valid and outdated:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return valid
+
+
+class HashingModelBackend(ModelBackend):
+    """
+    ModelBackend running the password hashes through run_hashing(), for
+    django.contrib.auth.authenticate() (AUTHENTICATION_BACKENDS).
+
+    HashingBusy reaches API views, which answer it with 503; other callers
+    (the admin's login form) only know "no user", so for them the login
+    fails with a logged warning instead of a server error.
+    """
+
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        try:
+            return self._authenticate(username, password, **kwargs)
+        except HashingBusy:
+            if isinstance(request, Request):
+                raise
+            logger.warning('Login of %r rejected: every password hashing slot is taken', username)
+            return None
+
+    def _authenticate(self, username, password, **kwargs):
+        if username is None:
+            username = kwargs.get(User.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = User._default_manager.get_by_natural_key(username)
+        except User.DoesNotExist:
+            # Hash anyway so response times do not reveal which usernames exist
+            hash_password(password)
+            return None
+        if verify_password(user, password) and self.user_can_authenticate(user):
+            return user
+        return None
@@ -0,0 +1,89 @@
+import json
+import statistics
+import threading
+import time
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from django.urls import reverse
+
+BENCH_USERNAME = 'bench_login'
+BENCH_PASSWORD = 'bench-login-password'
+
+
+class Command(BaseCommand):
+    help = ('Measures logins per second, and the latency of concurrent article list '
+            'requests with and without that login load')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--duration', type=float, default=10,
+                            help='Seconds each phase runs (default: 10)')
+        parser.add_argument('--logins', type=int, default=8,
+                            help='Concurrent login clients (default: 8)')
+        parser.add_argument('--readers', type=int, default=2,
+                            help='Concurrent article list clients (default: 2)')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        user.set_password(BENCH_PASSWORD)
+        user.save()
+
+        # Measure hashing, not the login throttle
+        rates = {scope: None for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']}
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates}):
+            _, idle = self.run_phase(options['duration'], 0, options['readers'])
+            logins, loaded = self.run_phase(options['duration'], options['logins'], options['readers'])
+
+        self.stdout.write(f"Hasher: {settings.PASSWORD_HASHERS[0].rsplit('.', 1)[-1]}, "
+                          f"hashing workers: {settings.PASSWORD_HASHING_WORKERS}")
+        self.stdout.write(f"Logins: {logins['ok'] / options['duration']:.1f}/s "
+                          f"({logins['ok']} ok, {logins['busy']} rejected as busy, {logins['failed']} failed)")
+        self.stdout.write(f'Article list latency idle:        {self.describe(idle)}')
+        self.stdout.write(f'Article list latency under login: {self.describe(loaded)}')
+
+    def run_phase(self, duration, login_clients, read_clients):
+        """Run login and read clients in threads for `duration` seconds."""
+        deadline = time.monotonic() + duration
+        logins = {'ok': 0, 'busy': 0, 'failed': 0}
+        latencies = []
+        lock = threading.Lock()
+
+        def login():
+            client = Client(HTTP_HOST='localhost')
+            body = json.dumps({'username': BENCH_USERNAME, 'password': BENCH_PASSWORD})
+            while time.monotonic() < deadline:
+                response = client.post(reverse('login'), body, content_type='application/json')
+                outcome = {200: 'ok', 503: 'busy'}.get(response.status_code, 'failed')
+                with lock:
+                    logins[outcome] += 1
+
+        def read():
+            client = Client(HTTP_HOST='localhost')
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                client.get(reverse('article-list'))
+                with lock:
+                    latencies.append(time.perf_counter() - start)
+
+        threads = ([threading.Thread(target=self.in_thread, args=(login,)) for _ in range(login_clients)]
+                   + [threading.Thread(target=self.in_thread, args=(read,)) for _ in range(read_clients)])
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return logins, latencies
+
+    def in_thread(self, func):
+        try:
+            func()
+        finally:
+            connections.close_all()
+
+    def describe(self, latencies):
+        if not latencies:
+            return 'no requests'
+        quantiles = statistics.quantiles(latencies, n=20) if len(latencies) > 1 else latencies * 19
+        return (f'p50 {statistics.median(latencies) * 1000:.1f} ms, '
+                f'p95 {quantiles[18] * 1000:.1f} ms ({len(latencies)} requests)')
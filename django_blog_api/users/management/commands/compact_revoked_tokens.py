@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from users.revocation import compact_revoked_tokens
+
+
+class Command(BaseCommand):
+    help = 'Deletes the revocations of refresh tokens that have expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None,
+                            help='Rows deleted per transaction (default: settings.DELETION_BATCH_SIZE)')
+
+    def handle(self, *args, **options):
+        deleted = compact_revoked_tokens(options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired token revocations.'))
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from users.avatars import generate_thumbnails
+from users.models import Profile
+
+
+class Command(BaseCommand):
+    help = ('Renders the missing thumbnails of profile pictures, e.g. after the server '
+            'restarted during a background render or PROFILE_PIC_SIZES changed')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--all', action='store_true',
+                            help='Render the thumbnails of every picture again')
+
+    def handle(self, *args, **options):
+        profiles = Profile.objects.exclude(profile_pic='').exclude(profile_pic__isnull=True)
+        if not options['all']:
+            profiles = profiles.filter(profile_pic_thumbnails={})
+        rendered = 0
+        for profile_id in list(profiles.values_list('pk', flat=True)):
+            generate_thumbnails(profile_id)
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(f'Rendered the thumbnails of {rendered} profile pictures.'))
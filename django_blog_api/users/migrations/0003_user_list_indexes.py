@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-17 03:05
+
+from django.db import migrations
+
+# auth_user belongs to django.contrib.auth, so its extra indexes for the
+# admin user list are created with SQL: the case-insensitive prefix
+# searches (UPPER(col::text) LIKE 'ABC%' on PostgreSQL), the date_joined
+# ordering and the few inactive users
+POSTGRES_INDEXES = {
+    'auth_user_username_upper_idx':
+        'CREATE INDEX auth_user_username_upper_idx ON auth_user (UPPER(username::text) text_pattern_ops)',
+    'auth_user_email_upper_idx':
+        'CREATE INDEX auth_user_email_upper_idx ON auth_user (UPPER(email::text) text_pattern_ops)',
+}
+INDEXES = {
+    'auth_user_date_joined_idx':
+        'CREATE INDEX auth_user_date_joined_idx ON auth_user (date_joined, id)',
+    'auth_user_inactive_idx':
+        'CREATE INDEX auth_user_inactive_idx ON auth_user (id) WHERE NOT is_active',
+}
+
+
+def _indexes(schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return {**POSTGRES_INDEXES, **INDEXES}
+    return INDEXES
+
+
+def create_indexes(apps, schema_editor):
+    """Create the user list indexes the database supports"""
+    for sql in _indexes(schema_editor).values():
+        schema_editor.execute(sql)
+
+
+def drop_indexes(apps, schema_editor):
+    for name in _indexes(schema_editor):
+        schema_editor.execute(f'DROP INDEX IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0002_claimuser'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.7 on 2026-10-17 02:58
+
+import users.avatars
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_user_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_pic_thumbnails',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AlterField(
+            model_name='profile',
+            name='profile_pic',
+            field=models.ImageField(blank=True, null=True, upload_to=users.avatars.profile_pic_path),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.1.7 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_profile_pic_thumbnails'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(help_text="The token's unique id (jti claim)", max_length=64, unique=True)),
+                ('expires_at', models.DateTimeField(db_index=True, help_text='When the token expires')),
+                ('revoked_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+    ]
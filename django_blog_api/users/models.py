@@ -1,7 +1,6 @@
-from django.db import models
+from django.db import models, DEFAULT_DB_ALIAS
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
-from django.dispatch import receiver
+from .avatars import profile_pic_path
 
 class Profile(models.Model):
     """
@@ -12,22 +11,66 @@ class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='profile')
     bio = models.TextField(max_length=500, blank=True)
     birth_date = models.DateField(null=True, blank=True)
-    profile_pic = models.ImageField(upload_to='profile_pics/', null=True, blank=True)
+    profile_pic = models.ImageField(upload_to=profile_pic_path, null=True, blank=True)
+    # {size: {extension: storage name}} of the picture's thumbnails, filled
+    # in the background once they are rendered (see users.avatars)
+    profile_pic_thumbnails = models.JSONField(default=dict, blank=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
     def __str__(self):
         return f"{self.user.username}'s profile"
 
-@receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    """Create a user profile when a new user is created"""
-    if created:
-        Profile.objects.create(user=instance)
+class RevokedToken(models.Model):
+    """
+    A refresh token that may no longer be used, because it was rotated
+    (exchanged for a new one) or revoked at logout. Each process answers
+    revocation checks from a Bloom filter of these rows (see
+    users.revocation); rows are deleted once the token has expired anyway.
+    """
+    jti = models.CharField(max_length=64, unique=True, help_text="The token's unique id (jti claim)")
+    expires_at = models.DateTimeField(db_index=True, help_text="When the token expires")
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    
+    def __str__(self):
+        return self.jti
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save the user profile when the user is updated"""
+class ClaimUser(User):
+    """
+    A User built from the claims of an access token without a query (see
+    users.authentication.ClaimUserAuthentication).
+    
+    Only the claim fields (id, username, is_active) are set; the others
+    are deferred and all loaded with one query the first time any of them
+    is read. Being a User, it can be assigned to foreign keys and saved.
+    """
+    # Concrete User fields filled from the token, in model field order
+    CLAIM_FIELDS = ('id', 'username', 'is_active')
+    
+    class Meta:
+        proxy = True
+    
+    @classmethod
+    def from_claims(cls, user_id, username=None):
+        """Build the user of a valid, unrevoked token (so an active one)."""
+        if username is None:
+            return cls.from_db(DEFAULT_DB_ALIAS, ['id', 'is_active'], [user_id, True])
+        return cls.from_db(DEFAULT_DB_ALIAS, list(cls.CLAIM_FIELDS), [user_id, username, True])
+    
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        # Reading one deferred field loads all of them at once
+        if fields is not None:
+            deferred = self.get_deferred_fields()
+            if deferred.intersection(fields):
+                fields = deferred.union(fields)
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+
+def get_profile(user):
+    """
+    The user's profile, or an unsaved one with the default values if the
+    user never wrote theirs. Profiles are created lazily, on the first
+    write (see ProfileSerializer), so saving a User never touches them.
+    """
     try:
-        instance.profile.save()
+        return user.profile
     except Profile.DoesNotExist:
-        Profile.objects.create(user=instance)
\ No newline at end of file
+        return Profile(user=user)
\ No newline at end of file
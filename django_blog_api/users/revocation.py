@@ -0,0 +1,191 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from core.background import delete_in_batches
+from .models import RevokedToken
+
+# Users this process recently found active, so most requests do not
+# query their account: user id -> monotonic time checked. Deactivated
+# users are looked up every time; they are few and their requests fail anyway.
+_checked = {}
+
+# Bound on the users remembered by _checked
+LOCAL_MAX_USERS = 10000
+
+
+def revoke_user(user_id):
+    """
+    Reject the user's access tokens from now on. The database (the
+    is_active column) is the revocation list, so this only makes this
+    process look the user up again; other processes do within
+    settings.JWT_REVOCATION_CHECK_INTERVAL seconds.
+    """
+    _checked.pop(user_id, None)
+
+
+def restore_user(user_id):
+    """Accept the user's access tokens again, e.g. once the account is reactivated."""
+    _checked.pop(user_id, None)
+
+
+def is_revoked(user_id):
+    """
+    Whether the user's tokens were revoked because the account was
+    deactivated or deleted. Read from the database at most every
+    settings.JWT_REVOCATION_CHECK_INTERVAL seconds per user and process.
+    """
+    now = time.monotonic()
+    checked = _checked.get(user_id)
+    if checked is not None and now - checked <= settings.JWT_REVOCATION_CHECK_INTERVAL:
+        return False
+    if not User.objects.filter(pk=user_id, is_active=True).exists():
+        _checked.pop(user_id, None)
+        return True
+    if len(_checked) >= LOCAL_MAX_USERS:
+        _checked.clear()
+    _checked[user_id] = now
+    return False
+
+
+# Revocations recorded by other processes are picked up from rows revoked
+# since the last synchronization minus this margin, which covers rows
+# committed late and clock differences between servers
+SYNC_OVERLAP = timedelta(seconds=10)
+
+
+class BloomFilter:
+    """
+    Set of strings with no false negatives and a false positive rate of
+    `error_rate` while it holds at most `capacity` of them, in about 1.2
+    bytes per key at 1%. Keys cannot be removed; rebuild it instead.
+    """
+    
+    def __init__(self, capacity, error_rate=0.01):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+    
+    def _positions(self, key):
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hash_count)]
+    
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+    
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+    
+    @property
+    def full(self):
+        return self.count >= self.capacity
+
+
+class RevokedTokenFilter:
+    """
+    This process's view of the revoked refresh tokens (RevokedToken rows):
+    a Bloom filter answers "not revoked" for almost every token without a
+    query, and only possible matches are confirmed with a lookup by jti.
+    
+    The filter is brought up to date with the rows revoked elsewhere at most
+    every settings.JWT_REVOCATION_CHECK_INTERVAL seconds (one indexed range
+    query), and rebuilt from the unexpired rows every
+    settings.JWT_REVOCATION_FILTER_REBUILD seconds or when it fills up, which
+    drops the tokens that expired in the meantime.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._filter = None
+        self._synced_at = None
+        self._checked = 0.0
+        self._built = 0.0
+    
+    def add(self, jti):
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(jti)
+    
+    def might_contain(self, jti):
+        self._refresh()
+        return jti in self._filter
+    
+    def contains(self, jti):
+        return self.might_contain(jti) and RevokedToken.objects.filter(jti=jti).exists()
+    
+    def _refresh(self):
+        now = time.monotonic()
+        if self._filter is not None and now - self._checked <= settings.JWT_REVOCATION_CHECK_INTERVAL:
+            return
+        with self._lock:
+            if self._filter is not None and now - self._checked <= settings.JWT_REVOCATION_CHECK_INTERVAL:
+                return
+            if (self._filter is None or self._filter.full
+                    or now - self._built > settings.JWT_REVOCATION_FILTER_REBUILD):
+                self._rebuild(now)
+            else:
+                self._sync()
+            self._checked = now
+    
+    def _rebuild(self, now):
+        synced_at = timezone.now()
+        unexpired = RevokedToken.objects.filter(expires_at__gt=synced_at)
+        capacity = max(settings.JWT_REVOCATION_FILTER_CAPACITY, 2 * unexpired.count())
+        bloom = BloomFilter(capacity)
+        for jti in unexpired.values_list('jti', flat=True).iterator():
+            bloom.add(jti)
+        self._filter, self._synced_at, self._built = bloom, synced_at, now
+    
+    def _sync(self):
+        synced_at = timezone.now()
+        recent = RevokedToken.objects.filter(revoked_at__gte=self._synced_at - SYNC_OVERLAP)
+        for jti in recent.values_list('jti', flat=True):
+            if jti not in self._filter:
+                self._filter.add(jti)
+        self._synced_at = synced_at
+
+
+_revoked_tokens = RevokedTokenFilter()
+
+
+def revoke_token(token):
+    """
+    Revoke a refresh token until it expires. Returns False if it was
+    already revoked, which makes rotating a token safe against concurrent
+    use of the same token: only one of them can revoke it.
+    """
+    jti = token[jwt_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    try:
+        with transaction.atomic():
+            RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+    except IntegrityError:
+        return False
+    _revoked_tokens.add(jti)
+    return True
+
+
+def is_token_revoked(token):
+    """Whether a refresh token was revoked; usually answered without a query."""
+    return _revoked_tokens.contains(token[jwt_settings.JTI_CLAIM])
+
+
+def compact_revoked_tokens(batch_size=None):
+    """
+    Delete the revocations of tokens that have expired and return how many
+    were deleted. Each process's filter drops them at its next rebuild.
+    """
+    return delete_in_batches(RevokedToken.objects.filter(expires_at__lte=timezone.now()), batch_size)
@@ -1,20 +1,123 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.files.storage import default_storage
 from django.contrib.auth.password_validation import validate_password
-from .models import Profile
+from core.background import run_in_background
+from core.fieldsets import SparseFieldsetMixin
+from .avatars import delete_picture_files, generate_thumbnails
+from articles.models import Article
+from comments.models import Comment
+from .models import Profile, get_profile
+from .hashing import hash_password
 
 class ProfileSerializer(serializers.ModelSerializer):
+    profile_pic_thumbnails = serializers.SerializerMethodField()
+    
     class Meta:
         model = Profile
-        fields = ['bio', 'birth_date', 'profile_pic', 'created_at']
+        fields = ['bio', 'birth_date', 'profile_pic', 'profile_pic_thumbnails', 'created_at']
+    
+    def get_profile_pic_thumbnails(self, obj):
+        """
+        URLs of the picture's square thumbnails by size and format, e.g.
+        {"128": {"webp": ..., "jpeg": ...}}; empty until they are rendered.
+        """
+        request = self.context.get('request')
+        urls = {}
+        for size, formats in obj.profile_pic_thumbnails.items():
+            urls[size] = {}
+            for extension, name in formats.items():
+                url = default_storage.url(name)
+                urls[size][extension] = request.build_absolute_uri(url) if request else url
+        return urls
+    
+    def validate_profile_pic(self, value):
+        if value and value.size > settings.PROFILE_PIC_MAX_UPLOAD_SIZE:
+            raise serializers.ValidationError(
+                f"Profile pictures may not exceed {settings.PROFILE_PIC_MAX_UPLOAD_SIZE // 1024} KB."
+            )
+        return value
+    
+    def update(self, instance, validated_data):
+        """
+        Write only the fields that changed; a profile that was never saved
+        (see get_profile) is inserted. Unchanged data causes no query.
+        
+        A new picture is stored as uploaded and its thumbnails are rendered
+        in the background; the files of the replaced picture are removed.
+        """
+        changed = [
+            name for name, value in validated_data.items()
+            if self._has_changed(instance, name, value)
+        ]
+        picture_changed = 'profile_pic' in changed
+        replaced_picture = instance.profile_pic.name if picture_changed else None
+        for name in changed:
+            setattr(instance, name, validated_data[name])
+        if picture_changed:
+            instance.profile_pic_thumbnails = {}
+            changed.append('profile_pic_thumbnails')
+        if instance._state.adding:
+            instance.save()
+        elif changed:
+            instance.save(update_fields=changed)
+        if replaced_picture:
+            run_in_background(delete_picture_files, replaced_picture)
+        if picture_changed and instance.profile_pic:
+            run_in_background(generate_thumbnails, instance.pk)
+        return instance
+    
+    def _has_changed(self, instance, name, value):
+        if name == 'profile_pic':
+            # Any upload replaces the picture
+            return value is not None or bool(instance.profile_pic)
+        return getattr(instance, name) != value
+
+class UserProfileField(ProfileSerializer):
+    """The user's profile, with default values if it was never written."""
+    def get_attribute(self, instance):
+        return get_profile(instance)
 
-class UserSerializer(serializers.ModelSerializer):
-    profile = ProfileSerializer(read_only=True)
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    profile = UserProfileField(read_only=True)
     
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'first_name', 'last_name', 'profile']
 
+class ArticleActivitySerializer(serializers.ModelSerializer):
+    """An article in an author's activity feed."""
+    created_at = serializers.DateTimeField(source='publication_date', read_only=True)
+    excerpt = serializers.CharField(read_only=True)
+    
+    class Meta:
+        model = Article
+        fields = ['id', 'created_at', 'title', 'status', 'excerpt']
+
+class CommentActivitySerializer(serializers.ModelSerializer):
+    """A comment in an author's activity feed, with the article it is on."""
+    article_title = serializers.CharField(source='article.title', read_only=True)
+    
+    class Meta:
+        model = Comment
+        fields = ['id', 'created_at', 'article', 'article_title', 'reply_to', 'content']
+
+class ActivitySerializer(serializers.BaseSerializer):
+    """
+    A (type, instance) item of an activity feed, rendered by the serializer
+    of its type with a `type` field added.
+    """
+    serializers_by_type = {
+        'article': ArticleActivitySerializer,
+        'comment': CommentActivitySerializer,
+    }
+    
+    def to_representation(self, item):
+        kind, instance = item
+        data = self.serializers_by_type[kind](instance, context=self.context).data
+        return {'type': kind, **data}
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
     password2 = serializers.CharField(write_only=True, required=True)
@@ -34,8 +137,17 @@ class UserRegistrationSerializer(serializers.ModelSerializer):
         return attrs
     
     def create(self, validated_data):
+        """
+        Create the user as create_user() would, hashing the password on the
+        bounded hashing executor (see users.hashing).
+        """
         validated_data.pop('password2')
-        user = User.objects.create_user(**validated_data)
+        password = validated_data.pop('password')
+        validated_data['username'] = User.normalize_username(validated_data['username'])
+        validated_data['email'] = User.objects.normalize_email(validated_data.get('email'))
+        user = User(**validated_data)
+        user.password = hash_password(password)
+        user.save()
         return user
 
 class LoginSerializer(serializers.Serializer):
@@ -0,0 +1,37 @@
+from django.contrib.auth.models import Group, User
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from .groups import forget_user_groups
+from .revocation import restore_user, revoke_user
+
+@receiver(m2m_changed, sender=User.groups.through)
+def forget_changed_memberships(sender, instance, action, reverse, pk_set, **kwargs):
+    """Drop cached group names when users are added to or removed from groups"""
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        forget_user_groups([instance.pk])
+    elif pk_set is not None:
+        forget_user_groups(pk_set)
+    else:
+        # group.user_set.clear(): the users are not known any more
+        forget_user_groups()
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def forget_all_memberships(sender, **kwargs):
+    """A renamed or deleted group changes the group names of all its members"""
+    forget_user_groups()
+
+@receiver(post_save)
+def revoke_deactivated_user(sender, instance, update_fields=None, **kwargs):
+    """
+    Reject the tokens of a deactivated user, and accept them again once it
+    is reactivated (users and their proxies, e.g. ClaimUser)
+    """
+    if not isinstance(instance, User) or (update_fields is not None and 'is_active' not in update_fields):
+        return
+    if instance.is_active:
+        restore_user(instance.pk)
+    else:
+        revoke_user(instance.pk)
\ No newline at end of file
@@ -1,8 +1,34 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from PIL import Image
+from django.test import TestCase, override_settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.core.cache import cache
+from django.utils import timezone
 from django.urls import reverse
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 from rest_framework import status
-from django.contrib.auth.models import User
+from rest_framework_simplejwt.tokens import AccessToken
+from django.contrib.auth.models import User, Group
+from django.contrib.auth import authenticate
+from django.contrib.auth.hashers import get_hasher, make_password
+from django.http import HttpRequest
+from django.contrib.auth.signals import user_login_failed
+from users.authentication import ClaimUserAuthentication
+from users.bulk import bulk_create_users
+from users.hashing import _hashing_pool
+from articles.models import Article
+from comments.models import Comment
+from users.models import Profile, RevokedToken
+from users.revocation import BloomFilter, compact_revoked_tokens, is_revoked, is_token_revoked
+from users.tokens import ClaimsRefreshToken
+from users.groups import user_group_names
+from users.views import deactivate_account, profile_detail
 import json
 
 class UserAuthTests(TestCase):
@@ -14,6 +40,9 @@ class UserAuthTests(TestCase):
             password='existingpass123'
         )
         
+        # Token revocations live in the cache
+        cache.clear()
+        
         # Set up API client
         self.client = APIClient()
         
@@ -95,4 +124,323 @@ class UserAuthTests(TestCase):
         refresh_response = self.client.post(refresh_url, data=json.dumps(refresh_data), content_type='application/json')
         
         self.assertEqual(refresh_response.status_code, status.HTTP_200_OK)
-        self.assertTrue('access' in refresh_response.data)
\ No newline at end of file
+        self.assertTrue('access' in refresh_response.data)
+    
+    def test_login_token_carries_groups(self):
+        """Test login tokens carry the user's groups and permission checks then query no groups"""
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        self.existing_user.groups.add(admin_group)
+        data = {'username': 'existing_user', 'password': 'existingpass123'}
+        response = self.client.post(reverse('login'), data=json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['user']['user_group'], 'admin')
+        access = response.data['access']
+        self.assertEqual(AccessToken(access)['groups'], ['admin'])
+        
+        cache.clear()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('user-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse([query for query in queries.captured_queries if 'auth_group' in query['sql']])
+    
+    @override_settings(SHARED_CACHE=True)
+    def test_group_membership_cache_follows_changes(self):
+        """Test cached group names are dropped when memberships or groups change"""
+        cache.clear()
+        self.assertEqual(user_group_names(self.existing_user.pk), frozenset())
+        editors, _ = Group.objects.get_or_create(name='editors')
+        self.existing_user.groups.add(editors)
+        self.assertEqual(user_group_names(self.existing_user.pk), {'editors'})
+        with self.assertNumQueries(0):
+            user_group_names(self.existing_user.pk)
+        
+        editors.name = 'writers'
+        editors.save()
+        self.assertEqual(user_group_names(self.existing_user.pk), {'writers'})
+        editors.user_set.remove(self.existing_user)
+        self.assertEqual(user_group_names(self.existing_user.pk), frozenset())
+    
+    def test_group_membership_is_not_cached_per_process(self):
+        """Test group names are read from the database without a shared cache"""
+        editors, _ = Group.objects.get_or_create(name='editors')
+        self.existing_user.groups.add(editors)
+        self.assertEqual(user_group_names(self.existing_user.pk), {'editors'})
+        # Removed by another process: no invalidation reaches this one
+        User.groups.through.objects.filter(user=self.existing_user).delete()
+        self.assertEqual(user_group_names(self.existing_user.pk), frozenset())
+    
+    def login(self):
+        data = {'username': 'existing_user', 'password': 'existingpass123'}
+        response = self.client.post(reverse('login'), data=json.dumps(data), content_type='application/json')
+        return response.data['access']
+    
+    def test_stateless_authentication_loads_user_lazily(self):
+        """Test token authentication builds the user from claims and loads the row only when needed"""
+        access = self.login()
+        request = APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        # The revocation check reads the account at most every few seconds
+        ClaimUserAuthentication().authenticate(request)
+        with self.assertNumQueries(0):
+            user, token = ClaimUserAuthentication().authenticate(request)
+            self.assertEqual((user.pk, user.username), (self.existing_user.pk, 'existing_user'))
+            self.assertTrue(user.is_active and user.is_authenticated)
+        # Any other field loads the whole row once
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, 'existing@test.com')
+            self.assertEqual(user.first_name, '')
+        self.assertIsInstance(user, User)
+    
+    def test_deactivated_user_tokens_are_rejected(self):
+        """Test deactivating an account revokes its still unexpired access tokens"""
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        self.existing_user.groups.add(admin_group)
+        access = self.login()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(self.client.get(reverse('user-list')).status_code, status.HTTP_200_OK)
+        
+        request = APIRequestFactory().post('/', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(deactivate_account(request).status_code, status.HTTP_200_OK)
+        self.assertFalse(User.objects.get(pk=self.existing_user.pk).is_active)
+        self.assertEqual(self.client.get(reverse('user-list')).status_code, status.HTTP_401_UNAUTHORIZED)
+        
+        # Reactivating the account accepts its tokens again
+        user = User.objects.get(pk=self.existing_user.pk)
+        user.is_active = True
+        user.save()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {self.login()}')
+        self.assertEqual(self.client.get(reverse('user-list')).status_code, status.HTTP_200_OK)
+    
+    def test_revocation_is_read_from_the_database(self):
+        """Test a deactivation by another process is seen once the check interval expires"""
+        user_id = self.existing_user.pk
+        self.assertFalse(is_revoked(user_id))
+        # No signal reaches this process
+        User.objects.filter(pk=user_id).update(is_active=False)
+        with self.assertNumQueries(0):
+            self.assertFalse(is_revoked(user_id))
+        with override_settings(JWT_REVOCATION_CHECK_INTERVAL=-1):
+            self.assertTrue(is_revoked(user_id))
+        User.objects.filter(pk=user_id).update(is_active=True)
+        self.assertFalse(is_revoked(user_id))
+    
+    def test_login_upgrades_outdated_password_hash(self):
+        """Test a password hashed by a non-preferred hasher is rehashed on login"""
+        User.objects.filter(pk=self.existing_user.pk).update(
+            password=make_password('existingpass123', hasher='pbkdf2_sha1')
+        )
+        self.assertTrue(self.login())
+        password = User.objects.get(pk=self.existing_user.pk).password
+        self.assertTrue(password.startswith(get_hasher().algorithm + '$'))
+        self.assertTrue(self.login())
+    
+    def test_login_fails_fast_when_hashing_is_saturated(self):
+        """Test failed logins are signalled and logins get 503 at once while every hashing slot is taken"""
+        failures = []
+        def record_failure(sender, credentials, **kwargs):
+            failures.append(credentials['username'])
+        user_login_failed.connect(record_failure)
+        self.addCleanup(user_login_failed.disconnect, record_failure)
+        data = {'username': 'existing_user', 'password': 'wrongpass123'}
+        response = self.client.post(reverse('login'), data=json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(failures, ['existing_user'])
+        
+        _, slots = _hashing_pool()
+        taken = 0
+        while slots.acquire(blocking=False):
+            taken += 1
+        try:
+            data['password'] = 'existingpass123'
+            response = self.client.post(reverse('login'), data=json.dumps(data), content_type='application/json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            # Outside the API (admin login) the login fails instead of erroring
+            with self.assertLogs('users.hashing', 'WARNING'):
+                self.assertIsNone(authenticate(HttpRequest(), **data))
+        finally:
+            for _ in range(taken):
+                slots.release()
+    
+    def test_profile_is_written_only_when_it_changes(self):
+        """Test saving a user leaves its profile alone and profiles are created on first write"""
+        with CaptureQueriesContext(connection) as queries:
+            self.existing_user.save()
+        self.assertFalse(any('users_profile' in query['sql'] for query in queries))
+        self.assertFalse(Profile.objects.exists())
+        
+        access = self.login()
+        factory = APIRequestFactory()
+        response = profile_detail(factory.get('/', HTTP_AUTHORIZATION=f'Bearer {access}'))
+        self.assertEqual(response.data['bio'], '')
+        self.assertFalse(Profile.objects.exists())
+        
+        request = factory.patch('/', {'bio': 'Hello'}, format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.assertEqual(profile_detail(request).status_code, status.HTTP_200_OK)
+        self.assertEqual(Profile.objects.get(user=self.existing_user).bio, 'Hello')
+        
+        request = factory.patch('/', {'bio': 'Hello'}, format='json', HTTP_AUTHORIZATION=f'Bearer {access}')
+        with CaptureQueriesContext(connection) as queries:
+            profile_detail(request)
+        self.assertFalse(any(query['sql'].startswith('UPDATE') for query in queries))
+    
+    def test_bulk_create_users(self):
+        """Test bulk user creation uses a fixed number of queries whatever the number of users"""
+        editors, _ = Group.objects.get_or_create(name='editors')
+        entries = [
+            {'username': f'bulk_user_{i}', 'email': f'bulk{i}@TEST.com', 'password': 'bulkpass123',
+             'groups': ['editors'] if i % 2 else []}
+            for i in range(6)
+        ]
+        # Groups, then users and memberships in a savepoint
+        with self.assertNumQueries(5):
+            users = bulk_create_users(entries)
+        self.assertEqual(users[1].email, 'bulk1@test.com')
+        self.assertTrue(User.objects.get(username='bulk_user_3').check_password('bulkpass123'))
+        self.assertEqual(user_group_names(users[1].pk), frozenset({'editors'}))
+        self.assertEqual(user_group_names(users[2].pk), frozenset())
+        self.assertEqual(editors.user_set.count(), 3)
+        with self.assertRaises(ValueError):
+            bulk_create_users([{'username': 'bulk_other', 'groups': ['missing']}])
+    
+    def test_admin_user_list_searches_filters_and_pages(self):
+        """Test the admin user list prefix search, group/active filters and keyset pages"""
+        admin_group, _ = Group.objects.get_or_create(name='admin')
+        editors, _ = Group.objects.get_or_create(name='editors')
+        self.existing_user.groups.add(admin_group)
+        users = bulk_create_users([
+            {'username': f'listed_{i}', 'email': f'listed{i}@test.com', 'is_active': i != 2,
+             'groups': ['editors'] if i % 2 else []}
+            for i in range(5)
+        ])
+        self.client.force_authenticate(user=self.existing_user)
+        url = reverse('user-list')
+        
+        def usernames(params):
+            return [user['username'] for user in self.client.get(url, params).data['results']]
+        
+        self.assertEqual(usernames({'search': 'LISTED_3'}), ['listed_3'])
+        self.assertEqual(usernames({'search': 'EXISTING@'}), ['existing_user'])
+        self.assertEqual(usernames({'search': 'isted'}), [])
+        self.assertEqual(usernames({'is_active': 'false'}), ['listed_2'])
+        self.assertEqual(usernames({'group': 'editors'}), ['listed_1', 'listed_3'])
+        
+        response = self.client.get(url, {'page_size': 4})
+        self.assertNotIn('count', response.data)
+        # Group lookup (not cached without a shared cache), page
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data['next'])
+        self.assertEqual([user['id'] for user in response.data['results']], [users[3].pk, users[4].pk])
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(response.data['results'][0]['profile']['bio'], '')
+    
+    def test_profile_picture_thumbnails_are_rendered_and_served(self):
+        """Test an uploaded picture gets sized thumbnail URLs served with long-lived cache headers"""
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        
+        def upload(name):
+            content = BytesIO()
+            Image.new('RGB', (600, 400), 'teal').save(content, 'PNG')
+            request = APIRequestFactory().patch(
+                '/', {'profile_pic': SimpleUploadedFile(name, content.getvalue(), 'image/png')},
+                format='multipart', HTTP_AUTHORIZATION=f'Bearer {access}'
+            )
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(profile_detail(request).status_code, status.HTTP_200_OK)
+            # Close the uploaded temporary file, as the request handler would
+            request.close()
+            return profile_detail(APIRequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {access}')).data
+        
+        access = self.login()
+        with override_settings(MEDIA_ROOT=media_root, BACKGROUND_TASKS_INLINE=True):
+            data = upload('me.png')
+            thumbnails = data['profile_pic_thumbnails']
+            self.assertEqual(set(thumbnails), {'48', '128', '256'})
+            self.assertEqual(set(thumbnails['48']), {'webp', 'jpeg'})
+            profile = Profile.objects.get(user=self.existing_user)
+            with default_storage.open(profile.profile_pic_thumbnails['48']['webp']) as thumbnail:
+                self.assertEqual(Image.open(thumbnail).size, (48, 48))
+            
+            response = self.client.get(thumbnails['128']['jpeg'])
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response['Content-Type'], 'image/jpeg')
+            self.assertIn('immutable', response['Cache-Control'])
+            with override_settings(MEDIA_SENDFILE_HEADER='X-Accel-Redirect'):
+                response = self.client.get(thumbnails['128']['jpeg'])
+            self.assertTrue(response['X-Accel-Redirect'].startswith('/protected-media/profile_pics/thumbs/'))
+            self.assertEqual(response.content, b'')
+            
+            # Replacing the picture removes the old files
+            upload('me-again.png')
+            self.assertFalse(default_storage.exists(profile.profile_pic.name))
+            self.assertFalse(default_storage.exists(profile.profile_pic_thumbnails['48']['webp']))
+            self.assertEqual(self.client.get(thumbnails['128']['jpeg']).status_code, status.HTTP_404_NOT_FOUND)
+    
+    def test_refresh_tokens_rotate_and_are_revoked(self):
+        """Test refreshing rotates the refresh token and rotated or logged out tokens are rejected"""
+        url = reverse('token_refresh')
+        refresh = str(ClaimsRefreshToken.for_user(self.existing_user))
+        response = self.client.post(url, {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        rotated = response.data['refresh']
+        self.assertNotEqual(rotated, refresh)
+        # Tokens that were never revoked are let through without a query
+        with override_settings(JWT_REVOCATION_CHECK_INTERVAL=60), self.assertNumQueries(0):
+            self.assertFalse(is_token_revoked(ClaimsRefreshToken.for_user(self.existing_user)))
+        self.assertEqual(self.client.post(url, {'refresh': refresh}, format='json').status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        
+        response = self.client.post(reverse('logout'), {'refresh': rotated}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.post(url, {'refresh': rotated}, format='json').status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+        
+        # Expired revocations are compacted away
+        RevokedToken.objects.update(expires_at=timezone.now())
+        self.assertEqual(compact_revoked_tokens(), 2)
+    
+    def test_bloom_filter_has_no_false_negatives(self):
+        """Test the revocation Bloom filter finds every key and rarely matches others"""
+        bloom = BloomFilter(1000)
+        keys = [f'jti-{i}' for i in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        false_positives = sum(f'other-{i}' in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertTrue(bloom.full)
+    
+    def test_activity_feed_merges_articles_and_comments(self):
+        """Test the activity feed pages through articles and comments newest first at a constant cost"""
+        other_user = User.objects.create_user(username='other_user', password='otherpass123')
+        start = timezone.now() - timedelta(days=1)
+        expected = []
+        for i in range(4):
+            article = Article.objects.create(title=f'Activity article {i}', content='Activity content',
+                                             author=self.existing_user, status='published')
+            Article.objects.filter(pk=article.pk).update(publication_date=start + timedelta(hours=3 * i))
+            comment = Comment.objects.create(article=article, author=self.existing_user, content='Mine')
+            Comment.objects.filter(pk=comment.pk).update(created_at=start + timedelta(hours=3 * i + 1))
+            Comment.objects.create(article=article, author=other_user, content='Not mine')
+            expected += [('article', article.pk), ('comment', comment.pk)]
+        expected.reverse()
+        # Deleted articles and their comments are left out
+        Article.objects.filter(pk=expected[1][1]).update(hidden_at=timezone.now())
+        expected = expected[2:]
+        # So are drafts and archived articles, and comments on them
+        for status_name in ('draft', 'archived'):
+            article = Article.objects.create(title=f'Unpublished {status_name}', content='Activity content',
+                                             author=self.existing_user, status=status_name)
+            Comment.objects.create(article=article, author=self.existing_user, content='On a draft')
+        
+        url = reverse('user-activity', kwargs={'pk': self.existing_user.pk})
+        response = self.client.get(url, {'page_size': 4})
+        items = [(item['type'], item['id']) for item in response.data['results']]
+        self.assertEqual(response.data['results'][0]['article_title'], 'Activity article 2')
+        while response.data['next']:
+            with self.assertNumQueries(3):
+                response = self.client.get(response.data['next'])
+            items += [(item['type'], item['id']) for item in response.data['results']]
+        self.assertEqual(items, expected)
+        self.assertEqual(self.client.get(reverse('user-activity', kwargs={'pk': 0})).status_code,
+                         status.HTTP_404_NOT_FOUND)
\ No newline at end of file
@@ -0,0 +1,54 @@
+from django.contrib.auth.models import User
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from .groups import GROUPS_CLAIM, user_group_names
+from .revocation import is_token_revoked, revoke_token
+
+# JWT claim with the user's username
+USERNAME_CLAIM = 'username'
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry the username and the user's
+    group names, so authentication and permission checks need no query
+    (see users.authentication). The groups claim is read afresh every time
+    an access token is issued, which bounds how long a group change takes
+    to apply to ACCESS_TOKEN_LIFETIME.
+    """
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token[USERNAME_CLAIM] = user.get_username()
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        access[GROUPS_CLAIM] = sorted(user_group_names(self.payload[api_settings.USER_ID_CLAIM]))
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        # A rotated refresh token is revoked as it is exchanged, so a
+        # stolen copy used before or after its owner fails
+        if is_token_revoked(refresh) or (api_settings.ROTATE_REFRESH_TOKENS and not revoke_token(refresh)):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+        # Access tokens are not checked against the database, so make sure
+        # a deactivated user cannot mint new ones
+        user_id = refresh.get(api_settings.USER_ID_CLAIM)
+        if not User.objects.filter(pk=user_id, is_active=True).exists():
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return super().validate(attrs)
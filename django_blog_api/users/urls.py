@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
-from .views import RegisterView, get_user_profile, profile_detail, deactivate_account, UserViewSet, login_view
+from .views import RegisterView, get_user_profile, profile_detail, deactivate_account, UserViewSet, login_view, logout_view
 
 router = DefaultRouter()
 router.register(r'users', UserViewSet, basename='user')
@@ -11,6 +11,7 @@ urlpatterns = [
     path('token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('login/', login_view, name='login'),
+    path('logout/', logout_view, name='logout'),
     path('user/', get_user_profile, name='user-profile'),
     path('profile/', profile_detail, name='current-user-profile'),
     path('deactivate/', deactivate_account, name='deactivate-account'),
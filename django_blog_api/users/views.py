@@ -1,21 +1,71 @@
 from rest_framework import viewsets, generics, permissions, status
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
-from rest_framework.decorators import api_view, permission_classes
-from rest_framework_simplejwt.tokens import RefreshToken
-from django.contrib.auth.models import User, Group
+from rest_framework.decorators import action, api_view, permission_classes, throttle_classes
 from django.contrib.auth import authenticate
-from .serializers import UserSerializer, UserRegistrationSerializer, LoginSerializer, ProfileSerializer
-from .models import Profile
+from django.contrib.auth.models import User, Group
+from django.shortcuts import get_object_or_404
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from django_filters.rest_framework import DjangoFilterBackend
+from .serializers import (
+    UserSerializer, UserRegistrationSerializer, LoginSerializer, ProfileSerializer, ActivitySerializer
+)
+from .activity import activity_sources
+from .models import get_profile
+from .groups import user_group_names
+from .revocation import revoke_token
+from .tokens import ClaimsRefreshToken
 from utils.permissions import IsAdminUser
+from utils.filter_classes import UserFilter
+from core.pagination import KeysetPagination, MergedKeysetPagination
+from core.fieldsets import SparseFieldsetViewMixin
+from core.throttling import TokenBucketThrottle
+
+class LoginThrottle(TokenBucketThrottle):
+    """Limits password checks per client IP (the 'login' throttle scope)."""
+    scope = 'login'
 
-class UserViewSet(viewsets.ReadOnlyModelViewSet):
+class UserViewSet(SparseFieldsetViewMixin, viewsets.ReadOnlyModelViewSet):
     """
     API endpoint for listing and retrieving users (admin only).
+    Supports sparse fieldsets with ?fields= / ?omit=, case-insensitive
+    prefix search on username and email (?search=), filters by group and
+    active status, and is always keyset paginated, so any page of a
+    table of millions of users costs the same single indexed query.
+    Anyone can read a user's activity feed at /users/{id}/activity/.
     """
-    queryset = User.objects.all()
+    # Profiles are joined; users without one get the defaults
+    queryset = User.objects.select_related('profile')
     serializer_class = UserSerializer
     permission_classes = [IsAdminUser]
+    pagination_class = KeysetPagination
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, filters.SearchFilter]
+    filterset_class = UserFilter
+    # Prefix matches (istartswith) use the UPPER(...) pattern indexes of
+    # users migration 0003 on PostgreSQL
+    search_fields = ['^username', '^email']
+    ordering_fields = ['id', 'username', 'date_joined']
+    ordering = ['id']
+    
+    def get_permissions(self):
+        """Activity feeds only show published articles and comments, so anyone may read them."""
+        if self.action == 'activity':
+            return [permissions.AllowAny()]
+        return super().get_permissions()
+    
+    @action(detail=True, methods=['get'])
+    def activity(self, request, pk=None):
+        """
+        The user's articles and comments as one stream, newest first.
+        Pages are merged from one keyset query per source (see
+        MergedKeysetPagination), so deep pages cost the same as the first.
+        """
+        author = get_object_or_404(User.objects.only('id'), pk=pk)
+        paginator = MergedKeysetPagination()
+        page = paginator.paginate_querysets(activity_sources(author.pk), request)
+        serializer = ActivitySerializer(page, many=True, context=self.get_serializer_context())
+        return paginator.get_paginated_response(serializer.data)
 
 class RegisterView(generics.CreateAPIView):
     """
@@ -34,8 +84,8 @@ class RegisterView(generics.CreateAPIView):
         users_group, _ = Group.objects.get_or_create(name='users')
         user.groups.add(users_group)
         
-        # Generate tokens
-        refresh = RefreshToken.for_user(user)
+        # Generate tokens (the access token carries the user's claims)
+        refresh = ClaimsRefreshToken.for_user(user)
         
         return Response({
             'user': {
@@ -49,21 +99,23 @@ class RegisterView(generics.CreateAPIView):
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
+@throttle_classes([LoginThrottle])
 def login_view(request):
     """
     Authenticate user and return JWT tokens.
+    Throttled per client, since every attempt hashes a password; hashing
+    runs on the bounded hashing executor (see users.hashing.HashingModelBackend).
     """
     serializer = LoginSerializer(data=request.data)
     if serializer.is_valid():
         username = serializer.validated_data['username']
         password = serializer.validated_data['password']
-        user = authenticate(username=username, password=password)
+        user = authenticate(request, username=username, password=password)
         
         if user:
-            refresh = RefreshToken.for_user(user)
-            
-            # Add user groups to token
-            user_groups = [group.name for group in user.groups.all()]
+            # The access token carries the user's claims (username, groups)
+            refresh = ClaimsRefreshToken.for_user(user)
+            user_groups = user_group_names(user.pk)
             
             # Determine primary user group for frontend permissions
             user_group = "users"  # Default
@@ -87,6 +139,23 @@ def login_view(request):
         status=status.HTTP_401_UNAUTHORIZED
     )
 
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])
+def logout_view(request):
+    """
+    Revoke the given refresh token, so it can no longer be refreshed.
+    Access tokens already issued from it stay valid until they expire.
+    """
+    try:
+        refresh = ClaimsRefreshToken(request.data.get('refresh') or '')
+    except TokenError as error:
+        raise InvalidToken(error.args[0])
+    revoke_token(refresh)
+    return Response(
+        {'detail': 'Logged out successfully'},
+        status=status.HTTP_200_OK
+    )
+
 @api_view(['GET'])
 @permission_classes([permissions.IsAuthenticated])
 def get_user_profile(request):
@@ -94,27 +163,28 @@ def get_user_profile(request):
     Get the profile for the authenticated user.
     """
     user = request.user
-    serializer = UserSerializer(user)
+    serializer = UserSerializer(user, context={'request': request})
     return Response(serializer.data)
 
 @api_view(['GET', 'PUT', 'PATCH'])
 @permission_classes([permissions.IsAuthenticated])
 def profile_detail(request):
     """
-    Get or update user profile.
+    Get or update user profile. Reading a profile that was never written
+    returns the defaults; the first update creates it.
     """
-    try:
-        profile = request.user.profile
-    except Profile.DoesNotExist:
-        profile = Profile.objects.create(user=request.user)
+    profile = get_profile(request.user)
     
     if request.method == 'GET':
-        serializer = ProfileSerializer(profile)
+        serializer = ProfileSerializer(profile, context={'request': request})
         return Response(serializer.data)
     
     elif request.method in ['PUT', 'PATCH']:
+        # Pictures are streamed to a temporary file, never held in memory
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
         partial = request.method == 'PATCH'
-        serializer = ProfileSerializer(profile, data=request.data, partial=partial)
+        serializer = ProfileSerializer(profile, data=request.data, partial=partial,
+                                       context={'request': request})
         if serializer.is_valid():
             serializer.save()
             return Response(serializer.data)
@@ -124,7 +194,8 @@ def profile_detail(request):
 @permission_classes([permissions.IsAuthenticated])
 def deactivate_account(request):
     """
-    Deactivate the user's account
+    Deactivate the user's account. Saving it revokes the user's access
+    tokens (see users.signals), so they are rejected within seconds.
     """
     user = request.user
     user.is_active = False
@@ -1,5 +1,9 @@
 from django_filters import rest_framework as filters
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
+from django.contrib.auth.models import User
 from articles.models import Article
+from articles.search import full_text_search, full_text_search_available
 
 class ArticleFilter(filters.FilterSet):
     """
@@ -13,4 +17,48 @@ class ArticleFilter(filters.FilterSet):
 
     class Meta:
         model = Article
-        fields = ['title', 'content', 'author', 'tags']
\ No newline at end of file
+        fields = ['title', 'content', 'author', 'tags']
+
+class UserFilter(filters.FilterSet):
+    """
+    Filter class for the admin user list.
+    Provides filtering by group name and active status.
+    """
+    group = filters.CharFilter(field_name='groups__name')
+
+    class Meta:
+        model = User
+        fields = ['group', 'is_active']
+
+class ArticleSearchFilter(SearchFilter):
+    """
+    Search filter for articles with a PostgreSQL full-text mode.
+
+    ?search_mode=fulltext (the default on PostgreSQL) matches against the
+    stored, GIN-indexed search vector and orders results by rank unless an
+    explicit ordering is requested. ?search_mode=basic, or any non-PostgreSQL
+    database, falls back to the regular SearchFilter over search_fields.
+    """
+    search_mode_param = 'search_mode'
+    search_modes = ('fulltext', 'basic')
+
+    def get_search_mode(self, request):
+        mode = request.query_params.get(self.search_mode_param, 'fulltext')
+        if mode not in self.search_modes:
+            mode = 'fulltext'
+        if mode == 'fulltext' and not full_text_search_available():
+            mode = 'basic'
+        return mode
+
+    def filter_queryset(self, request, queryset, view):
+        if self.get_search_mode(request) == 'basic':
+            return super().filter_queryset(request, queryset, view)
+
+        terms = ' '.join(self.get_search_terms(request))
+        if not terms:
+            return queryset
+
+        queryset = full_text_search(queryset, terms)
+        if not request.query_params.get(api_settings.ORDERING_PARAM):
+            queryset = queryset.order_by('-search_rank', '-publication_date')
+        return queryset
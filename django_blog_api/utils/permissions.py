@@ -1,13 +1,19 @@
 from rest_framework.permissions import BasePermission
+from users.groups import request_group_names
 
 class IsInGroup(BasePermission):
+    """
+    Allows users in any of `group_names`. Memberships are resolved once per
+    request, from the JWT groups claim or the membership cache (see
+    users.groups), so checks cost no queries.
+    """
     group_names = []  # To be defined in subclasses
 
     def has_object_permission(self, request, view, obj):
-        return any(request.user.groups.filter(name=group_name).exists() for group_name in self.group_names)
+        return self.has_permission(request, view)
     
     def has_permission(self, request, view):
-        return any(request.user.groups.filter(name=group_name).exists() for group_name in self.group_names)
+        return not request_group_names(request).isdisjoint(self.group_names)
 
 # Subclasses for each group:
 class IsAdminUser(IsInGroup):
@@ -27,14 +33,15 @@ class AnyUser(IsInGroup):
 
 class IsOwner(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user
+        # Compare ids so the author is not loaded
+        return obj.author_id == request.user.pk
 
     def has_permission(self, request, view):
         return True
     
 class IsOwnerOrAdmin(BasePermission):
     def has_object_permission(self, request, view, obj):
-        return obj.author == request.user or request.user.groups.filter(name="admin").exists()
+        return obj.author_id == request.user.pk or "admin" in request_group_names(request)
 
     def has_permission(self, request, view):
         return True
\ No newline at end of file